@@ -0,0 +1,120 @@
+"""Concurrency and request-rate control for the scraper's fetch path.
+
+``AdaptiveLimiter`` is an AIMD (additive increase, multiplicative decrease)
+limit on requests in flight, driven by upstream feedback:
+
+* every healthy response grows the limit by ``1 / limit`` (about +1 per
+  round trip's worth of responses);
+* a 429, a timeout or a 5xx, or a smoothed latency that has risen well
+  above the lowest smoothed latency seen, cuts the limit by ``decrease``, at most once
+  per round trip so one burst of throttled responses counts once;
+* a ``Retry-After`` header pauses all new requests until it expires.
+
+``RateLimiter`` is a fixed ceiling on request starts per second, for
+endpoints with a known budget.
+"""
+import asyncio
+import time
+from typing import Optional
+
+LATENCY_ALPHA = 0.2  # EWMA weight of the newest latency sample
+WARMUP_SAMPLES = 10  # Responses averaged before the latency baseline is trusted
+
+
+class AdaptiveLimiter:
+    """Async context manager that admits at most ``limit`` requests at once."""
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 64,
+                 decrease: float = 0.5, latency_tolerance: float = 2.0):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.samples = 0
+        self.best_latency: Optional[float] = None
+        self.smoothed_latency: Optional[float] = None
+        self.paused_until = 0.0
+        self.decreases = 0
+        self.peak_limit = self.limit
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        async with self._cond:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=wait if wait > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        """A healthy response arrived after ``latency`` seconds."""
+        self.samples += 1
+        if self.smoothed_latency is None:
+            self.smoothed_latency = latency
+        else:
+            self.smoothed_latency += LATENCY_ALPHA * (latency - self.smoothed_latency)
+        if self.samples >= WARMUP_SAMPLES:
+            # Baseline on the smoothed value so per-response jitter is not mistaken for load
+            if self.best_latency is None or self.smoothed_latency < self.best_latency:
+                self.best_latency = self.smoothed_latency
+        if self.best_latency is not None and \
+                self.smoothed_latency > self.latency_tolerance * self.best_latency:
+            self._back_off()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Upstream answered 429; honour Retry-After for every request."""
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self._back_off()
+
+    def on_error(self) -> None:
+        """Timeout, connection error or 5xx: treat as congestion."""
+        self._back_off()
+
+    def _back_off(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self.smoothed_latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        self.decreases += 1
+        if self.smoothed_latency is not None and self.best_latency is not None:
+            # Let the latency signal re-settle from the new, lower load
+            self.smoothed_latency = min(self.smoothed_latency,
+                                        self.latency_tolerance * self.best_latency)
+
+    def report(self) -> str:
+        return (f"adaptive concurrency: final {int(self.limit)}, peak {int(self.peak_limit)}, "
+                f"{self.decreases} back-off(s), best latency "
+                f"{(self.best_latency or 0) * 1000:.0f} ms")
+
+
+class RateLimiter:
+    """Spaces request starts so that at most ``rate`` begin per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
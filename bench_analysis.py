@@ -0,0 +1,253 @@
+"""Scaling benchmark for the analysis side (load, aggregation, rendering).
+
+Generates synthetic catalogs (``synthetic_catalog.py``) at each ``--sizes``
+value, once per seed and kept in ``--data-dir``, then for every size and
+input format runs the ``create_charts.py`` pipeline in a fresh process:
+
+    load_s     load_table (JSON parse or snapshot read + typed columns)
+    stats_s    compute_stats, shared by every chart
+    payload_s  the chart's own aggregation (chart_payloads)
+    render_s   drawing and savefig
+    peak MB    peak RSS: after the load, and while rendering each chart
+
+Each chart renders in a child forked after the aggregation, so its peak RSS
+is its own rather than the high-water mark of the charts before it (where
+fork is unavailable, charts render in-process and peaks are cumulative).
+With two or more sizes a scaling exponent per chart and format is printed
+(1.0 = linear in the record count). Results can be saved as a baseline and
+compared against later runs, like bench_scraper.py.
+
+    python bench_analysis.py --sizes 10000 100000 1000000 --formats json snapshot
+    python bench_analysis.py --save-baseline bench/analysis_baseline.json
+    python bench_analysis.py --baseline bench/analysis_baseline.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from competition_table import load_table
+from create_charts import CHARTS, TREND_CHARTS, chart_payloads, compute_stats, load_pyplot, render_charts
+from synthetic_catalog import write_catalog
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TABLE_CHARTS = [name for name in CHARTS if name not in TREND_CHARTS]
+EXTENSIONS = {'json': '.json', 'ndjson': '.ndjson', 'snapshot': '.snap'}
+TIMINGS = ('load_s', 'stats_s', 'payload_s', 'render_s')
+# Differences below these are noise, whatever the tolerance
+MIN_SECONDS = 0.05
+MIN_MB = 10.0
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def dataset_path(data_dir: str, size: int, fmt: str, seed: int, html_scale: float) -> str:
+    scale = f"_h{html_scale:g}" if html_scale != 1.0 else ""
+    return os.path.join(data_dir, f"competitions_{size}_s{seed}{scale}{EXTENSIONS[fmt]}")
+
+
+def ensure_dataset(data_dir: str, size: int, fmt: str, seed: int, html_scale: float) -> str:
+    """Path of the synthetic catalog, generating it on first use."""
+    path = dataset_path(data_dir, size, fmt, seed, html_scale)
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_catalog(path, size, seed, html_scale, fmt=fmt)
+        print(f"Generated {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB) "
+              f"in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def _render(name: str, payload: Dict[str, Any], out_dir: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        errors = render_charts({name: payload}, out_dir, workers=1)
+    return {'render_s': round(time.perf_counter() - start, 3), 'peak_rss_mb': peak_rss_mb(),
+            'error': errors.get(name)}
+
+
+def _render_child(name: str, payload: Dict[str, Any], out_dir: str, result_queue) -> None:
+    result_queue.put(_render(name, payload, out_dir))
+
+
+def render_isolated(name: str, payload: Dict[str, Any], out_dir: str) -> Dict[str, Any]:
+    """Render one chart in a forked child so its peak RSS is measured on its own."""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return _render(name, payload, out_dir)
+    ctx = multiprocessing.get_context('fork')
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_render_child, args=(name, payload, out_dir, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+    return result
+
+
+def _scenario(path: str, fmt: str, size: int, charts: List[str], result_queue) -> None:
+    rows = []
+    base = {'records': size, 'format': fmt, 'file_mb': round(os.path.getsize(path) / 1024 / 1024, 1)}
+    try:
+        start = time.perf_counter()
+        table = load_table(path, fmt)
+        load_s = time.perf_counter() - start
+        load_rss = peak_rss_mb()
+        start = time.perf_counter()
+        stats = compute_stats(table)
+        stats_s = time.perf_counter() - start
+        del table
+        base.update(load_s=round(load_s, 3), stats_s=round(stats_s, 3), load_rss_mb=load_rss)
+        load_pyplot()  # import matplotlib before forking, outside the render timings
+        with tempfile.TemporaryDirectory() as out_dir:
+            for name in charts:
+                start = time.perf_counter()
+                payload = chart_payloads(stats, [name])[name]
+                payload_s = time.perf_counter() - start
+                rows.append({**base, 'chart': name, 'payload_s': round(payload_s, 3),
+                             **render_isolated(name, payload, out_dir)})
+    except Exception as exc:
+        rows.append({**base, 'chart': '*', 'error': repr(exc)})
+    result_queue.put(rows)
+
+
+def run_scenario(path: str, fmt: str, size: int, charts: List[str]) -> List[Dict[str, Any]]:
+    """Load, aggregate and render ``charts`` in a fresh process; one row per chart."""
+    result_queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_scenario, args=(path, fmt, size, charts, result_queue))
+    proc.start()
+    rows = result_queue.get()
+    proc.join()
+    return rows
+
+
+def scaling(results: List[Dict[str, Any]]) -> List[Tuple[str, str, str, float]]:
+    """(format, chart, measure, exponent) between the smallest and largest size.
+
+    The exponent is d log(time) / d log(records): ~1 scales linearly, >1 is
+    worse than linear, ~0 does not depend on the catalog size.
+    """
+    by_key: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for r in results:
+        if not r.get('error'):
+            by_key.setdefault((r['format'], r['chart']), []).append(r)
+    exponents = []
+    for (fmt, chart), rows in by_key.items():
+        rows.sort(key=lambda r: r['records'])
+        small, large = rows[0], rows[-1]
+        if large['records'] == small['records']:
+            continue
+        for measure in TIMINGS:
+            if small[measure] > 0 and large[measure] > 0:
+                exponent = math.log(large[measure] / small[measure]) / \
+                    math.log(large['records'] / small['records'])
+                exponents.append((fmt, chart, measure, round(exponent, 2)))
+    return exponents
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """Timings or peak RSS more than ``tolerance`` above the baseline."""
+    previous = {(b['records'], b['format'], b['chart']): b for b in baseline}
+    regressions = []
+    for r in results:
+        b = previous.get((r['records'], r['format'], r['chart']))
+        if not b or r.get('error') or b.get('error'):
+            continue
+        label = f"records={r['records']} format={r['format']} chart={r['chart']}"
+        for measure in TIMINGS:
+            if r[measure] > b[measure] * (1 + tolerance) and r[measure] - b[measure] > MIN_SECONDS:
+                regressions.append(f"{label}: {measure} {r[measure]} vs baseline {b[measure]}")
+        for measure in ('load_rss_mb', 'peak_rss_mb'):
+            now, then = r.get(measure), b.get(measure)
+            if now is not None and then is not None and \
+                    now > then * (1 + tolerance) and now - then > MIN_MB:
+                regressions.append(f"{label}: {measure} {now} vs baseline {then}")
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'records':>8} {'format':>8} {'file MB':>8} {'chart':<24} {'load s':>7} " \
+             f"{'stats s':>7} {'agg s':>7} {'render s':>8} {'load MB':>8} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+
+    def cell(r: Dict[str, Any], key: str, width: int) -> str:
+        value = r.get(key)
+        return f"{value if value is not None else '-':>{width}}"
+
+    for r in results:
+        print(f"{r['records']:>8} {r['format']:>8} {r['file_mb']:>8} {r['chart']:<24} "
+              f"{cell(r, 'load_s', 7)} {cell(r, 'stats_s', 7)} {cell(r, 'payload_s', 7)} "
+              f"{cell(r, 'render_s', 8)} {cell(r, 'load_rss_mb', 8)} {cell(r, 'peak_rss_mb', 8)}"
+              + (f"  ERROR {r['error']}" if r.get('error') else ""))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark chart generation on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000],
+                        help="catalog sizes in records (default: %(default)s)")
+    parser.add_argument("--formats", nargs="+", choices=list(EXTENSIONS), default=['json', 'snapshot'])
+    parser.add_argument("--charts", nargs="+", choices=TABLE_CHARTS, default=TABLE_CHARTS,
+                        metavar="CHART", help="charts to measure (default: all but the trend charts)")
+    parser.add_argument("--data-dir", default="bench_data",
+                        help="where generated catalogs are kept and reused (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--html-scale", type=float, default=1.0,
+                        help="details HTML length multiplier (default: %(default)s)")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="fail if timings or RSS regress against this")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed increase vs baseline (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = []
+    for size in args.sizes:
+        for fmt in args.formats:
+            path = ensure_dataset(args.data_dir, size, fmt, args.seed, args.html_scale)
+            results.extend(run_scenario(path, fmt, size, args.charts))
+
+    print_table(results)
+    exponents = scaling(results)
+    if exponents:
+        print(f"\nScaling exponents, {min(args.sizes)} -> {max(args.sizes)} records "
+              f"(1.0 = linear):")
+        for fmt, chart, measure, exponent in exponents:
+            if measure in ('load_s', 'stats_s') and chart != args.charts[0]:
+                continue  # shared by every chart of the scenario
+            print(f"  {fmt:>8} {chart if measure in ('payload_s', 'render_s') else '*':<24} "
+                  f"{measure:<10} {exponent:>5}")
+    for path in (args.json, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 1 if any(r.get('error') for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
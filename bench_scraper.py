@@ -0,0 +1,197 @@
+"""Throughput benchmark for the scraper against the local mock API.
+
+Starts ``mock_unstop_server.py`` in a subprocess, then runs the real
+``fetch_all_competitions`` once per (concurrency, per_page) combination, each
+in a fresh process so peak RSS is measured per scenario. Reports pages/sec,
+records/sec, p50/p99 request latency and peak memory, and can compare
+against a saved baseline to catch regressions in CI without network access.
+
+    python bench_scraper.py --total 20000 --concurrency 1 4 8 16 --per-page 50 100
+    python bench_scraper.py --save-baseline bench/scraper_baseline.json
+    python bench_scraper.py --baseline bench/scraper_baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import socket
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+import mock_unstop_server
+from scrape_competitions import FetchConfig, fetch_all_competitions
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(settings: mock_unstop_server.MockSettings, port: int) -> multiprocessing.Process:
+    """Run the mock API in a subprocess and wait until it answers."""
+    proc = multiprocessing.Process(target=mock_unstop_server.serve,
+                                   args=(settings, None, '127.0.0.1', port), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/_stats', timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("mock server did not start")
+
+
+def _scenario(base_url: str, concurrency: int, per_page: int, result_queue) -> None:
+    latencies: List[float] = []
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        latencies.append(time.perf_counter() - ctx.start)
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    config = FetchConfig(base_url=base_url, concurrency=concurrency, per_page=per_page,
+                         backoff_base=0.05, trace_configs=[trace])
+
+    error = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            records = len(asyncio.run(fetch_all_competitions(config)))
+        except Exception as exc:
+            records, error = 0, repr(exc)
+    elapsed = time.perf_counter() - start
+
+    pages = (records + per_page - 1) // per_page
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    result_queue.put({
+        'concurrency': concurrency,
+        'per_page': per_page,
+        'records': records,
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0,
+        'records_per_sec': round(records / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+        'error': error,
+    })
+
+
+def run_scenario(base_url: str, concurrency: int, per_page: int) -> Dict[str, Any]:
+    """Run one scrape in a fresh process and return its measurements."""
+    result_queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_scenario,
+                                   args=(base_url, concurrency, per_page, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """Scenarios whose records/sec fell more than ``tolerance`` below the baseline."""
+    previous = {(b['concurrency'], b['per_page']): b for b in baseline}
+    regressions = []
+    for r in results:
+        b = previous.get((r['concurrency'], r['per_page']))
+        if b and r['records_per_sec'] < b['records_per_sec'] * (1 - tolerance):
+            regressions.append(f"concurrency={r['concurrency']} per_page={r['per_page']}: "
+                               f"{r['records_per_sec']} records/sec vs baseline {b['records_per_sec']}")
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'conc':>5} {'per_page':>8} {'records':>8} {'req':>6} {'pages/s':>9} " \
+             f"{'records/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['concurrency']:>5} {r['per_page']:>8} {r['records']:>8} {r['requests']:>6} "
+              f"{r['pages_per_sec']:>9} {r['records_per_sec']:>10} {r['p50_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>8}"
+              + (f"  ERROR {r['error']}" if r['error'] else ""))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against the mock API")
+    parser.add_argument("--total", type=int, default=5000, help="records served (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--per-page", type=int, nargs="+", default=[25, 50, 100])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="fail if records/sec regress against this")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed records/sec drop vs baseline (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    settings = mock_unstop_server.MockSettings(
+        total=args.total, latency=args.latency, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, rate_limit=args.rate_limit, retry_after=0.1,
+        seed=args.seed)
+    port = _free_port()
+    server = start_mock_server(settings, port)
+    base_url = f'http://127.0.0.1:{port}{mock_unstop_server.SEARCH_PATH}'
+
+    results = []
+    try:
+        for per_page in args.per_page:
+            for concurrency in args.concurrency:
+                results.append(run_scenario(base_url, concurrency, per_page))
+    finally:
+        server.terminate()
+        server.join()
+
+    print_table(results)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
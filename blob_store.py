@@ -0,0 +1,215 @@
+"""Compressed side store for the heavy text/HTML fields of competitions.
+
+At ingest, ``BlobSplitter`` moves long string fields such as ``details`` out
+of each record into a SQLite file of zlib-compressed blobs keyed by
+``(competition id, field)``. The record keeps a short reference in their
+place::
+
+    {"id": 1234, "title": "...", "details": "blob:1234/details", ...}
+
+so the CSV, JSON and snapshot outputs only carry the fields the analysis
+reads. ``BlobStore.get``/``resolve`` decompress a field only when asked for,
+optionally as a cleaned plain-text version stored alongside the HTML.
+"""
+import hashlib
+import re
+import sqlite3
+import zlib
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+DEFAULT_BLOBS = "competitions_blobs.db"
+BLOB_FIELDS = ('details',)  # Always moved, whatever their length
+BLOB_MIN_CHARS = 2048  # Other top-level strings at least this long are moved too
+REF_PREFIX = "blob:"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    text BLOB,
+    PRIMARY KEY (id, field)
+);
+"""
+
+_BLOCK_TAGS = {'p', 'div', 'br', 'li', 'ul', 'ol', 'tr', 'table', 'h1', 'h2', 'h3', 'h4',
+               'h5', 'h6', 'section', 'article', 'blockquote'}
+_SPACES = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+        if tag == 'li':
+            self.parts.append('- ')
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Readable plain text of an HTML fragment: tags dropped, whitespace tidied."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    text = _SPACES.sub(' ', ''.join(parser.parts))
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_LINES.sub('\n\n', text).strip()
+
+
+def blob_ref(comp_id: Any, field: str) -> str:
+    return f"{REF_PREFIX}{comp_id}/{field}"
+
+
+def parse_ref(value: Any) -> Optional[Tuple[int, str]]:
+    """``(id, field)`` of a blob reference, or None for any other value."""
+    if not isinstance(value, str) or not value.startswith(REF_PREFIX):
+        return None
+    comp_id, _, field = value[len(REF_PREFIX):].partition('/')
+    try:
+        return int(comp_id), field
+    except ValueError:
+        return None
+
+
+class BlobStore:
+    """SQLite file of compressed field values keyed by ``(id, field)``."""
+
+    def __init__(self, path: str = DEFAULT_BLOBS):
+        self.path = path
+        # Streaming exports write from a worker thread; writes are never concurrent
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._digests: Optional[Dict[Tuple[int, str], str]] = None
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "BlobStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def put_many(self, items: Iterable[Tuple[int, str, str]], plain_text: bool = False) -> int:
+        """Store ``(id, field, value)`` items; unchanged values are not rewritten.
+
+        Returns the number of blobs written.
+        """
+        if self._digests is None:
+            self._digests = {(comp_id, field): digest for comp_id, field, digest
+                             in self.conn.execute("SELECT id, field, digest FROM blobs")}
+        rows = []
+        for comp_id, field, value in items:
+            raw = value.encode('utf-8')
+            digest = hashlib.sha1(raw).hexdigest()
+            if self._digests.get((comp_id, field)) == digest:
+                continue
+            text = zlib.compress(html_to_text(value).encode('utf-8')) if plain_text else None
+            rows.append((comp_id, field, digest, len(raw), zlib.compress(raw), text))
+            self._digests[(comp_id, field)] = digest
+        if rows:
+            self.conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+        return len(rows)
+
+    def get(self, comp_id: int, field: str, text: bool = False) -> Optional[str]:
+        """One field's value (or its plain-text version, when stored)."""
+        row = self.conn.execute(f"SELECT {'text' if text else 'data'} FROM blobs"
+                                " WHERE id = ? AND field = ?", (comp_id, field)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def resolve(self, record: Dict[str, Any], fields: Optional[Iterable[str]] = None,
+                text: bool = False) -> Dict[str, Any]:
+        """Copy of ``record`` with its blob references (or just ``fields``) loaded."""
+        wanted = set(fields) if fields is not None else None
+        resolved = dict(record)
+        for name, value in record.items():
+            ref = parse_ref(value)
+            if ref is not None and (wanted is None or name in wanted):
+                resolved[name] = self.get(ref[0], ref[1], text=text)
+        return resolved
+
+    def sizes(self) -> Tuple[int, int]:
+        """``(raw bytes, compressed bytes)`` of every stored blob."""
+        raw, packed = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return raw, packed
+
+
+class BlobSplitter:
+    """Moves heavy fields out of records into a ``BlobStore`` at ingest."""
+
+    def __init__(self, store: BlobStore, fields: Iterable[str] = BLOB_FIELDS,
+                 min_chars: int = BLOB_MIN_CHARS, plain_text: bool = False):
+        self.store = store
+        self.fields = frozenset(fields)
+        self.min_chars = min_chars
+        self.plain_text = plain_text
+        self.written = 0
+        self._seen: Set[Tuple[int, str]] = set()
+
+    def _heavy(self, name: str, value: Any) -> bool:
+        return isinstance(value, str) and (name in self.fields or len(value) >= self.min_chars) \
+            and not value.startswith(REF_PREFIX)
+
+    def split(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield copies of ``records`` with heavy fields replaced by references.
+
+        Fields already stored during this splitter's lifetime are not hashed
+        again, so several passes over the same records stay cheap.
+        """
+        pending = []
+        for record in records:
+            comp_id = record.get('id')
+            heavy = [name for name, value in record.items() if self._heavy(name, value)] \
+                if comp_id is not None else []
+            if not heavy:
+                yield record
+                continue
+            light = dict(record)
+            for name in heavy:
+                if (comp_id, name) not in self._seen:
+                    self._seen.add((comp_id, name))
+                    pending.append((comp_id, name, record[name]))
+                light[name] = blob_ref(comp_id, name)
+            if len(pending) >= 500:
+                self.written += self.store.put_many(pending, self.plain_text)
+                pending = []
+            yield light
+        if pending:
+            self.written += self.store.put_many(pending, self.plain_text)
+
+    def split_list(self, records: Iterable[Dict[str, Any]]) -> list:
+        return list(self.split(records))
+
+    @property
+    def referenced(self) -> int:
+        return len(self._seen)
+
+    def report(self) -> str:
+        raw, packed = self.store.sizes()
+        return (f"Blobs: {self.referenced} heavy field(s) referenced, {self.written} written to "
+                f"{self.store.path} ({raw / 1e6:.1f} MB stored as {packed / 1e6:.1f} MB)")
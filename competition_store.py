@@ -0,0 +1,302 @@
+"""Local SQLite store for incremental scraping.
+
+Competitions are upserted by ``id``. A row is only rewritten when its content
+hash changes, and every insert, update and disappearance is recorded in a
+changelog, so an hourly run writes roughly as much as actually changed.
+"""
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from derived_fields import add_derived
+
+DEFAULT_DB = "competitions.db"
+
+# Countdown fields the API recomputes on every request; they would make every
+# record look changed on every run without carrying any new information.
+VOLATILE_FIELDS = ('remaining_time', 'remain_days', 'remainingDaysArray')
+
+# Listing fields that move without touching ``updated_at`` (which is what
+# triggers a detail refetch), so a cached detail record is stale for them.
+LISTING_FIELDS = frozenset({'registerCount', 'viewsCount', 'updated_at', 'status', 'regn_open',
+                            'regnRequirements'})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS competitions (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    removed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    inserted INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    unchanged INTEGER DEFAULT 0,
+    removed INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS changelog (
+    run_id INTEGER NOT NULL,
+    competition_id INTEGER NOT NULL,
+    change TEXT NOT NULL,
+    at TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS changelog_run ON changelog (run_id);
+CREATE TABLE IF NOT EXISTS listings (
+    target TEXT NOT NULL,
+    competition_id INTEGER NOT NULL,
+    PRIMARY KEY (target, competition_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS details (
+    id INTEGER PRIMARY KEY,
+    listing_updated_at TEXT,
+    fetched_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _stable_view(value: Any) -> Any:
+    """Copy of ``value`` without the volatile countdown fields."""
+    if isinstance(value, dict):
+        return {k: _stable_view(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_stable_view(v) for v in value]
+    return value
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Hash of a competition's content, ignoring volatile countdown fields."""
+    payload = json.dumps(_stable_view(record), sort_keys=True, ensure_ascii=False,
+                         separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def merge_detail(record: Dict[str, Any], detail: Dict[str, Any]) -> Dict[str, Any]:
+    """A listing record with its cached detail merged in.
+
+    The detail adds fields (rounds, timeline) and replaces ones it has in
+    fuller form (prizes, filters), but the listing's ``LISTING_FIELDS`` win.
+    Derived fields are recomputed from the result.
+    """
+    merged = {**record, **{k: v for k, v in detail.items() if k not in LISTING_FIELDS}}
+    return add_derived(merged)
+
+
+class CompetitionStore:
+    """SQLite-backed store of competitions keyed on ``id``.
+
+    Usage per scrape::
+
+        store.begin_run()
+        store.upsert(page_of_records)   # once per page
+        store.finish_run(complete=True)
+
+    Crawls of separate listings pass ``target`` to ``upsert`` and their
+    ``targets`` to ``finish_run``, so removals stay within those listings.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.run_id: Optional[int] = None
+        self._hashes: Dict[int, str] = {}
+        self._seen: set = set()
+        self._counts: Dict[str, int] = {}
+        self.changed_fields: set = set()  # Top-level fields that differed in this run's updates
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "CompetitionStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def begin_run(self) -> int:
+        """Start a scrape run and load the current content hashes."""
+        cur = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (_now(),))
+        self.conn.commit()
+        self.run_id = cur.lastrowid
+        self._hashes = dict(self.conn.execute(
+            "SELECT id, content_hash FROM competitions WHERE removed_at IS NULL"))
+        self._seen = set()
+        self._counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        self.changed_fields = set()
+        return self.run_id
+
+    def upsert(self, records: Iterable[Dict[str, Any]], target: Optional[str] = None) -> Dict[str, int]:
+        """Insert new and changed records; unchanged ones cost no write.
+
+        ``target`` names the listing the records came from (a crawl target spec).
+        """
+        if self.run_id is None:
+            raise RuntimeError("begin_run() must be called before upsert()")
+        now = _now()
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        changes = []
+        listed = []
+        for record in records:
+            comp_id = record.get('id')
+            if comp_id is None:
+                continue
+            self._seen.add(comp_id)
+            if target is not None:
+                listed.append((target, comp_id))
+            digest = content_hash(record)
+            previous = self._hashes.get(comp_id)
+            if previous == digest:
+                counts['unchanged'] += 1
+                continue
+            # Derived fields are computed here, so only for new and changed records
+            record = add_derived(dict(record))
+            if previous is not None:
+                self._note_changes(comp_id, record)
+            data = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+            updated_at = record.get('updated_at')
+            self.conn.execute(
+                "INSERT INTO competitions (id, content_hash, updated_at, data, first_seen, changed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET content_hash = excluded.content_hash,"
+                " updated_at = excluded.updated_at, data = excluded.data,"
+                " changed_at = excluded.changed_at, removed_at = NULL",
+                (comp_id, digest, updated_at, data, now, now))
+            change = 'inserted' if previous is None else 'updated'
+            changes.append((self.run_id, comp_id, change, now, updated_at))
+            counts[change] += 1
+            self._hashes[comp_id] = digest
+        if changes:
+            self.conn.executemany(
+                "INSERT INTO changelog (run_id, competition_id, change, at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)", changes)
+        if listed:
+            self.conn.executemany("INSERT OR IGNORE INTO listings (target, competition_id) VALUES (?, ?)",
+                                  listed)
+        self.conn.commit()
+        for key, value in counts.items():
+            self._counts[key] += value
+        return counts
+
+    def _note_changes(self, comp_id: int, record: Dict[str, Any]) -> None:
+        row = self.conn.execute("SELECT data FROM competitions WHERE id = ?", (comp_id,)).fetchone()
+        old = json.loads(row[0]) if row else {}
+        self.changed_fields.update(k for k in old.keys() | record.keys() if old.get(k) != record.get(k))
+
+    def versions(self) -> Dict[int, Optional[str]]:
+        """``updated_at`` of every stored (not removed) competition."""
+        return dict(self.conn.execute(
+            "SELECT id, updated_at FROM competitions WHERE removed_at IS NULL"))
+
+    def _unlisted(self, targets: List[str]) -> set:
+        """Drop ids not seen this run from ``targets``; returns those no listing holds any more."""
+        marks = ','.join('?' * len(targets))
+        dropped = {comp_id for (comp_id,) in self.conn.execute(
+            f"SELECT competition_id FROM listings WHERE target IN ({marks})", targets)} - self._seen
+        self.conn.executemany(f"DELETE FROM listings WHERE competition_id = ? AND target IN ({marks})",
+                              [(comp_id, *targets) for comp_id in dropped])
+        still_listed = {comp_id for (comp_id,) in self.conn.execute(
+            "SELECT DISTINCT competition_id FROM listings")}
+        return dropped - still_listed
+
+    def finish_run(self, complete: bool = True,
+                   targets: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Close the run; on a complete scrape, mark ids not seen as removed.
+
+        With ``targets`` the scrape only covered those listings: just the ids
+        upserted under them before, and now listed nowhere, are removed.
+        """
+        now = _now()
+        if complete:
+            gone = [comp_id for comp_id in self._hashes if comp_id not in self._seen]
+            if targets is not None:
+                unlisted = self._unlisted(list(targets))
+                gone = [comp_id for comp_id in gone if comp_id in unlisted]
+            self.conn.executemany("UPDATE competitions SET removed_at = ? WHERE id = ?",
+                                  [(now, comp_id) for comp_id in gone])
+            self.conn.executemany(
+                "INSERT INTO changelog (run_id, competition_id, change, at) VALUES (?, ?, 'removed', ?)",
+                [(self.run_id, comp_id, now) for comp_id in gone])
+            self._counts['removed'] = len(gone)
+        self.conn.execute(
+            "UPDATE runs SET finished_at = ?, inserted = ?, updated = ?, unchanged = ?, removed = ?"
+            " WHERE id = ?",
+            (now, self._counts['inserted'], self._counts['updated'], self._counts['unchanged'],
+             self._counts['removed'], self.run_id))
+        self.conn.commit()
+        return dict(self._counts)
+
+    def run_counts(self) -> Dict[str, int]:
+        """Counts of the current (or last finished) run so far."""
+        return dict(self._counts)
+
+    def iter_records(self, include_removed: bool = False, with_details: bool = False,
+                     targets: Optional[Iterable[str]] = None,
+                     seen: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield stored competitions, newest id first, optionally merged with their details.
+
+        ``targets`` limits them to those listed under the given crawl targets,
+        ``seen`` to those upserted by the current (or last) run.
+        """
+        query = "SELECT c.id, c.data, d.data FROM competitions c LEFT JOIN details d ON d.id = c.id"
+        if not with_details:
+            query = "SELECT c.id, c.data, NULL FROM competitions c"
+        where: List[str] = []
+        params: List[Any] = []
+        if not include_removed:
+            where.append("c.removed_at IS NULL")
+        if targets is not None:
+            targets = list(targets)
+            where.append("c.id IN (SELECT competition_id FROM listings WHERE target IN "
+                         f"({','.join('?' * len(targets))}))")
+            params.extend(targets)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        for comp_id, data, detail in self.conn.execute(query + " ORDER BY c.id DESC", params):
+            if seen and comp_id not in self._seen:
+                continue
+            record = json.loads(data)
+            if detail is not None:
+                record = merge_detail(record, json.loads(detail))
+            yield record
+
+    def detail_versions(self) -> Dict[int, Optional[str]]:
+        """Listing ``updated_at`` each cached detail record was fetched for."""
+        return dict(self.conn.execute("SELECT id, listing_updated_at FROM details"))
+
+    def save_details(self, items: Iterable[Tuple[int, Optional[str], Dict[str, Any]]]) -> None:
+        """Cache ``(id, listing updated_at, detail record)`` tuples."""
+        now = _now()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO details (id, listing_updated_at, fetched_at, data)"
+            " VALUES (?, ?, ?, ?)",
+            [(comp_id, updated_at, now, json.dumps(detail, ensure_ascii=False, separators=(',', ':')))
+             for comp_id, updated_at, detail in items])
+        self.conn.commit()
+
+    def details(self) -> Dict[int, Dict[str, Any]]:
+        """Every cached detail record by id."""
+        return {comp_id: json.loads(data)
+                for comp_id, data in self.conn.execute("SELECT id, data FROM details")}
+
+    def changes(self, run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Changelog entries for one run (default: the latest run)."""
+        if run_id is None:
+            run_id = self.conn.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+        rows = self.conn.execute(
+            "SELECT competition_id, change, at, updated_at FROM changelog WHERE run_id = ?"
+            " ORDER BY rowid", (run_id,))
+        return [{'id': r[0], 'change': r[1], 'at': r[2], 'updated_at': r[3]} for r in rows]
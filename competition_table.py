@@ -0,0 +1,253 @@
+"""Columnar NumPy representation of the competitions dataset.
+
+``build_table`` makes one pass over the records and produces typed arrays
+for numeric and date fields and dictionary-encoded arrays for categorical
+fields, so statistics can be computed with vectorized NumPy operations
+instead of Python loops over a list of dicts. It reads the normalised
+``derived_*`` fields (see derived_fields.py) that the scraper stores with
+each record; snapshots provide them as whole columns.
+"""
+import json
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from derived_fields import DERIVED_FIELDS, DERIVED_VERSION, derived_view
+from snapshot import Snapshot
+from stage_profiler import profiled, stage
+
+# Raw fields derive() reads; snapshots without derived columns decode only these
+TABLE_FIELDS = ('id', 'title', 'registerCount', 'viewsCount', 'end_date', 'updated_at', 'isPaid',
+                'subtype', 'region', 'organisation', 'required_skills', 'filters', 'prizes')
+
+NAT = np.iinfo(np.int64).min  # datetime64 NaT as a raw int64
+
+
+@dataclass
+class Categorical:
+    """Dictionary-encoded column.
+
+    ``labels`` are in order of first appearance and ``codes`` index into them
+    (-1 means missing). For multi-valued fields (skills, filters) ``rows``
+    holds the record each code belongs to.
+    """
+    codes: np.ndarray
+    labels: List[str]
+    rows: Optional[np.ndarray] = None
+
+    def counts(self) -> np.ndarray:
+        """Occurrences of each label, aligned with ``labels``."""
+        return np.bincount(self.codes[self.codes >= 0], minlength=len(self.labels))
+
+    def counter(self) -> Counter:
+        """Counts as a Counter, keeping first-appearance order for ties."""
+        return Counter(dict(zip(self.labels, self.counts().tolist())))
+
+    def relabel(self, fn) -> "Categorical":
+        """Map labels through ``fn``, merging labels that become equal."""
+        index: Dict[str, int] = {}
+        remap = np.empty(len(self.labels) + 1, dtype=np.int32)
+        remap[-1] = -1
+        for i, label in enumerate(self.labels):
+            remap[i] = index.setdefault(fn(label), len(index))
+        return Categorical(remap[self.codes], list(index), self.rows)
+
+
+class _Encoder:
+    """Incremental dictionary encoder used while scanning records."""
+
+    def __init__(self, multi: bool = False):
+        self.index: Dict[str, int] = {}
+        self.codes = array('i')
+        self.rows = array('q') if multi else None
+
+    def add(self, value: Optional[str], row: Optional[int] = None) -> None:
+        if value is None:
+            self.codes.append(-1)
+        else:
+            self.codes.append(self.index.setdefault(value, len(self.index)))
+        if self.rows is not None:
+            self.rows.append(row)
+
+    def finish(self) -> Categorical:
+        rows = np.frombuffer(self.rows, dtype=np.int64) if self.rows is not None else None
+        return Categorical(np.frombuffer(self.codes, dtype=np.int32), list(self.index), rows)
+
+
+@dataclass
+class CompetitionTable:
+    """Typed columns for every field the analysis reads."""
+    ids: np.ndarray             # int64
+    titles: np.ndarray          # object (str)
+    register_count: np.ndarray  # float64, NaN when missing or non-numeric
+    views_count: np.ndarray     # float64, NaN when missing or non-numeric
+    end_date: np.ndarray        # datetime64[s], NaT when missing
+    updated_at: np.ndarray      # datetime64[s], NaT when missing
+    is_paid: np.ndarray         # bool
+    subtype: Categorical
+    region: Categorical
+    organisation: Categorical
+    skills: Categorical
+    eligibility: Categorical
+    categories: Categorical
+    has_cash: np.ndarray        # bool
+    has_certificate: np.ndarray  # bool
+    has_other_prize: np.ndarray  # bool
+    cash_amounts: np.ndarray    # float64, one entry per parseable cash prize
+    cash_rows: np.ndarray       # int64, record owning each cash amount
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the numeric and code arrays."""
+        total = 0
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                total += value.nbytes
+            elif isinstance(value, Categorical):
+                total += value.codes.nbytes + (value.rows.nbytes if value.rows is not None else 0)
+        return total
+
+
+def _float_column(values: List[Any]) -> np.ndarray:
+    """Numbers with None as NaN."""
+    return np.array(values, dtype=np.float64) if values else np.empty(0)
+
+
+def _time_column(values: List[Any]) -> np.ndarray:
+    """Epoch seconds with None as NaT."""
+    seconds = np.array([NAT if v is None else v for v in values], dtype=np.int64)
+    return seconds.view('datetime64[s]')
+
+
+def _encode(values: Iterable[Optional[str]]) -> Categorical:
+    encoder = _Encoder()
+    for value in values:
+        encoder.add(value)
+    return encoder.finish()
+
+
+def _encode_lists(lists: Iterable[List[str]]) -> Categorical:
+    encoder = _Encoder(True)
+    for row, values in enumerate(lists):
+        for value in values:
+            encoder.add(value, row)
+    return encoder.finish()
+
+
+def _table(ids: List[Any], titles: List[Any], columns: Dict[str, List[Any]]) -> CompetitionTable:
+    """Assemble a table from per-record lists of the ``derived_*`` fields."""
+    prize_types = columns['derived_prize_types']
+    cash_rows = [row for row, amounts in enumerate(columns['derived_cash_amounts']) for _ in amounts]
+    cash = [amount for amounts in columns['derived_cash_amounts'] for amount in amounts]
+    return CompetitionTable(
+        ids=np.array([i or 0 for i in ids], dtype=np.int64),
+        titles=np.array([t or '' for t in titles], dtype=object),
+        register_count=_float_column(columns['derived_registrations']),
+        views_count=_float_column(columns['derived_views']),
+        end_date=_time_column(columns['derived_end_ts']),
+        updated_at=_time_column(columns['derived_updated_ts']),
+        is_paid=np.array(columns['derived_paid'], dtype=np.bool_),
+        subtype=_encode(columns['derived_subtype']),
+        region=_encode(columns['derived_region']),
+        organisation=_encode(columns['derived_organisation']),
+        skills=_encode_lists(columns['derived_skills']),
+        eligibility=_encode_lists(columns['derived_eligibility']),
+        categories=_encode_lists(columns['derived_categories']),
+        has_cash=np.array(['cash' in kinds for kinds in prize_types], dtype=np.bool_),
+        has_certificate=np.array(['certificate' in kinds for kinds in prize_types], dtype=np.bool_),
+        has_other_prize=np.array(['other' in kinds for kinds in prize_types], dtype=np.bool_),
+        cash_amounts=np.array(cash, dtype=np.float64),
+        cash_rows=np.array(cash_rows, dtype=np.int64),
+    )
+
+
+@profiled('build_table')
+def build_table(competitions: Iterable[Dict[str, Any]]) -> CompetitionTable:
+    """Convert competition records into a CompetitionTable in one pass.
+
+    Records carrying current ``derived_*`` fields are read as they are;
+    others are derived on the fly.
+    """
+    names = DERIVED_FIELDS[1:]
+    ids: List[Any] = []
+    titles: List[Any] = []
+    columns: Dict[str, List[Any]] = {name: [] for name in names}
+    appenders = [(name, columns[name].append) for name in names]
+    for c in competitions:
+        d = derived_view(c)
+        ids.append(c.get('id'))
+        titles.append(c.get('title'))
+        for name, append in appenders:
+            append(d[name])
+    return _table(ids, titles, columns)
+
+
+@profiled('snapshot_read')
+def table_from_snapshot(snap: Snapshot) -> CompetitionTable:
+    """Build the table straight from the snapshot's derived columns.
+
+    Falls back to ``build_table`` over ``TABLE_FIELDS`` for snapshots written
+    before the fields existed (or by an older derivation).
+    """
+    if 'derived_version' not in snap.fields or \
+            any(v != DERIVED_VERSION for v in snap.column('derived_version')):
+        return build_table(snap.iter_records(TABLE_FIELDS))
+    return _table(snap.column('id'), snap.column('title'),
+                  {name: snap.column(name) for name in DERIVED_FIELDS[1:]})
+
+
+def detect_format(path: str) -> str:
+    if path.endswith('.snap'):
+        return 'snapshot'
+    if path.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'json'
+
+
+def iter_competitions(path: str = 'competitions.json', fmt: Optional[str] = None,
+                      fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Records of a JSON array, NDJSON or snapshot file.
+
+    ``fmt`` is ``'json'``, ``'ndjson'`` or ``'snapshot'``; by default it
+    follows the extension. Snapshots only decode ``fields`` (all if None).
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'snapshot':
+        with Snapshot(path) as snap:
+            yield from snap.iter_records(fields)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        if fmt == 'ndjson':
+            yield from (json.loads(line) for line in f if line.strip())
+        else:
+            with stage('json_load'):
+                records = json.load(f)
+            yield from records
+
+
+@profiled('load')
+def load_table(path: str = 'competitions.json', fmt: Optional[str] = None) -> CompetitionTable:
+    """Load a JSON array, NDJSON or snapshot file of competitions into a table.
+
+    Snapshots only decode the derived columns (or ``TABLE_FIELDS``).
+    """
+    if (fmt or detect_format(path)) == 'snapshot':
+        with Snapshot(path) as snap:
+            return table_from_snapshot(snap)
+    return build_table(iter_competitions(path, fmt))
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, largest first; ties keep input order."""
+    if len(values) <= k:
+        return np.lexsort((np.arange(len(values)), -values))
+    threshold = values[np.argpartition(values, -k)[-k]]
+    candidates = np.flatnonzero(values >= threshold)
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order[:k]]
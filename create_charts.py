@@ -1,52 +1,137 @@
+"""Generate charts from scraped competitions.
+
+Importing this module has no side effects: matplotlib is only imported when
+the first chart is rendered, and data is only loaded by ``main``.
+"""
+import argparse
+import hashlib
+import inspect
 import json
 import os
+import sys
 from collections import Counter
-from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import numpy as np
 
+from competition_table import CompetitionTable, load_table, top_k
+from derived_fields import subtype_label
+from metrics_history import DEFAULT_HISTORY, ROLLUPS_FILE, MetricsHistory
+from stage_profiler import StageProfiler, add_profile_args, profiled, stage
+
+plt = None  # matplotlib.pyplot, imported by load_pyplot() on first render
+
 # Set style for clean, professional charts
-plt.style.use('seaborn-v0_8-whitegrid')
-plt.rcParams['figure.facecolor'] = 'white'
-plt.rcParams['axes.facecolor'] = 'white'
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.size'] = 10
+STYLE_SHEET = 'seaborn-v0_8-whitegrid'
+RC_PARAMS = {
+    'figure.facecolor': 'white',
+    'axes.facecolor': 'white',
+    'font.family': 'sans-serif',
+    'font.size': 10,
+}
+
+# Bump to force every chart to re-render after changes the render cache
+# cannot see (e.g. a matplotlib upgrade)
+CODE_VERSION = 1
+MANIFEST_FILE = '.render_manifest.json'
+TREND_DAYS = 30  # Window of the growth charts, ending at the latest snapshot
+
+
+def apply_style():
+    plt.style.use(STYLE_SHEET)
+    plt.rcParams.update(RC_PARAMS)
+
+
+def load_pyplot():
+    """Import pyplot on first use (headless Agg unless already imported) and apply the style."""
+    global plt
+    if plt is None:
+        if 'matplotlib.pyplot' not in sys.modules:
+            import matplotlib
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+        plt = pyplot
+        apply_style()
+    return plt
 
 # Color palette
 COLORS = ['#4361ee', '#3a0ca3', '#7209b7', '#f72585', '#4cc9f0',
           '#4895ef', '#560bad', '#b5179e', '#f15bb5', '#00bbf9']
 
-# Create charts directory
-os.makedirs('charts', exist_ok=True)
-
-# Load data
-with open('competitions.json', 'r', encoding='utf-8') as f:
-    competitions = json.load(f)
 
-print(f"Loaded {len(competitions)} competitions")
-
-
-def save_chart(fig, filename):
+@dataclass
+class ChartStats:
+    """Every count, array and total the charts need."""
+    total: int = 0
+    total_registrations: int = 0
+    types: Counter = field(default_factory=Counter)
+    orgs: Counter = field(default_factory=Counter)
+    org_names: set = field(default_factory=set)
+    regions: Counter = field(default_factory=Counter)
+    registrations: np.ndarray = field(default_factory=lambda: np.empty(0))
+    top_registered: List[Tuple[str, int]] = field(default_factory=list)
+    skills: Counter = field(default_factory=Counter)
+    eligibility: Counter = field(default_factory=Counter)
+    categories: Counter = field(default_factory=Counter)
+    paid: int = 0
+    free: int = 0
+    prize_types: Counter = field(default_factory=Counter)
+    cash_prizes: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+
+def _truncate(name: str) -> str:
+    """Truncate long organisation names."""
+    return name[:37] + '...' if len(name) > 40 else name
+
+
+@profiled('stats')
+def compute_stats(table: CompetitionTable, top_n: int = 10) -> ChartStats:
+    """Derive every chart aggregate from the columnar table with vectorized ops."""
+    register = np.nan_to_num(table.register_count, nan=0.0)
+    top = top_k(register, top_n)
+
+    # Prize types are listed in order of first appearance, as a Counter would
+    flags = [('Cash Prize', table.has_cash), ('Certificate', table.has_certificate),
+             ('Other Prizes', table.has_other_prize)]
+    present = [(int(np.argmax(mask)), rank, label, int(mask.sum()))
+               for rank, (label, mask) in enumerate(flags) if mask.any()]
+    prize_types = Counter({label: count for _, _, label, count in sorted(present)})
+
+    paid = int(table.is_paid.sum())
+    return ChartStats(
+        total=len(table),
+        total_registrations=int(register.sum()),
+        types=table.subtype.counter(),
+        orgs=table.organisation.relabel(_truncate).counter(),
+        org_names=set(table.organisation.labels),
+        regions=table.region.counter(),
+        registrations=register[register != 0],
+        top_registered=[(table.titles[i], int(register[i])) for i in top],
+        skills=table.skills.counter(),
+        eligibility=table.eligibility.counter(),
+        categories=table.categories.counter(),
+        paid=paid,
+        free=len(table) - paid,
+        prize_types=prize_types,
+        cash_prizes=table.cash_amounts,
+    )
+
+
+def save_chart(fig, filename, out_dir='charts'):
     """Save chart with high quality."""
-    fig.savefig(f'charts/{filename}', dpi=150, bbox_inches='tight',
-                facecolor='white', edgecolor='none')
+    path = os.path.join(out_dir, filename)
+    with stage('savefig'):
+        fig.savefig(path, dpi=150, bbox_inches='tight',
+                    facecolor='white', edgecolor='none')
     plt.close(fig)
-    print(f"Saved: charts/{filename}")
+    print(f"Saved: {path}")
 
 
 # 1. Competition Types Distribution
-def chart_competition_types():
-    types = Counter()
-    for c in competitions:
-        subtype = c.get('subtype') or 'other'
-        # Clean up subtype names
-        subtype = subtype.replace('_', ' ').title()
-        types[subtype] += 1
-
-    # Get top 8 types
-    top_types = types.most_common(8)
-    labels, values = zip(*top_types)
+def chart_competition_types(data, out_dir='charts'):
+    labels, values = zip(*data['top'])
 
     fig, ax = plt.subplots(figsize=(10, 6))
     bars = ax.barh(range(len(labels)), values, color=COLORS[:len(labels)])
@@ -62,24 +147,12 @@ def chart_competition_types():
 
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    save_chart(fig, '01_competition_types.png')
-    return types
+    save_chart(fig, '01_competition_types.png', out_dir)
 
 
 # 2. Top Organizations Hosting Competitions
-def chart_top_organizations():
-    orgs = Counter()
-    for c in competitions:
-        org = c.get('organisation', {})
-        if org and org.get('name'):
-            name = org['name']
-            # Truncate long names
-            if len(name) > 40:
-                name = name[:37] + '...'
-            orgs[name] += 1
-
-    top_orgs = orgs.most_common(10)
-    labels, values = zip(*top_orgs)
+def chart_top_organizations(data, out_dir='charts'):
+    labels, values = zip(*data['top'])
 
     fig, ax = plt.subplots(figsize=(12, 6))
     bars = ax.barh(range(len(labels)), values, color=COLORS[:len(labels)])
@@ -95,20 +168,13 @@ def chart_top_organizations():
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
     plt.tight_layout()
-    save_chart(fig, '02_top_organizations.png')
-    return orgs
+    save_chart(fig, '02_top_organizations.png', out_dir)
 
 
 # 3. Online vs Offline Distribution
-def chart_region_distribution():
-    regions = Counter()
-    for c in competitions:
-        region = c.get('region', 'unknown')
-        if region:
-            regions[region.title()] += 1
-
-    labels = list(regions.keys())
-    values = list(regions.values())
+def chart_region_distribution(data, out_dir='charts'):
+    labels = [label for label, _ in data['regions']]
+    values = [value for _, value in data['regions']]
 
     fig, ax = plt.subplots(figsize=(8, 8))
     wedges, texts, autotexts = ax.pie(values, labels=labels, autopct='%1.1f%%',
@@ -121,35 +187,30 @@ def chart_region_distribution():
         autotext.set_fontweight('bold')
         autotext.set_color('white')
 
-    save_chart(fig, '03_region_distribution.png')
-    return regions
+    save_chart(fig, '03_region_distribution.png', out_dir)
 
 
 # 4. Registration Statistics
-def chart_registration_stats():
-    registrations = []
-    for c in competitions:
-        reg = c.get('registerCount', 0)
-        if reg and isinstance(reg, (int, float)):
-            registrations.append(reg)
+def chart_registration_stats(data, out_dir='charts'):
+    counts, edges = data['hist']
+    median, mean = data['median'], data['mean']
 
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
-    # Histogram
+    # Histogram (pre-binned: one weighted sample per bin)
     ax1 = axes[0]
-    ax1.hist(registrations, bins=30, color=COLORS[0], edgecolor='white', alpha=0.8)
+    ax1.hist(edges[:-1], bins=edges, weights=counts, color=COLORS[0], edgecolor='white', alpha=0.8)
     ax1.set_xlabel('Number of Registrations', fontweight='bold')
     ax1.set_ylabel('Number of Competitions', fontweight='bold')
     ax1.set_title('Distribution of Registrations', fontsize=12, fontweight='bold')
-    ax1.axvline(np.median(registrations), color=COLORS[3], linestyle='--', linewidth=2, label=f'Median: {int(np.median(registrations))}')
-    ax1.axvline(np.mean(registrations), color=COLORS[4], linestyle='--', linewidth=2, label=f'Mean: {int(np.mean(registrations))}')
+    ax1.axvline(median, color=COLORS[3], linestyle='--', linewidth=2, label=f'Median: {int(median)}')
+    ax1.axvline(mean, color=COLORS[4], linestyle='--', linewidth=2, label=f'Mean: {int(mean)}')
     ax1.legend()
 
     # Top 10 by registrations
     ax2 = axes[1]
-    top_reg = sorted(competitions, key=lambda x: x.get('registerCount', 0) or 0, reverse=True)[:10]
-    names = [c['title'][:30] + '...' if len(c['title']) > 30 else c['title'] for c in top_reg]
-    regs = [c.get('registerCount', 0) for c in top_reg]
+    names = [title[:30] + '...' if len(title) > 30 else title for title, _ in data['top']]
+    regs = [reg for _, reg in data['top']]
 
     bars = ax2.barh(range(len(names)), regs, color=COLORS[:len(names)])
     ax2.set_yticks(range(len(names)))
@@ -162,27 +223,16 @@ def chart_registration_stats():
         ax2.text(val + 50, i, f'{val:,}', va='center', fontsize=8, fontweight='bold')
 
     plt.tight_layout()
-    save_chart(fig, '04_registration_stats.png')
-    return registrations
+    save_chart(fig, '04_registration_stats.png', out_dir)
 
 
 # 5. Skills Required Analysis
-def chart_skills_analysis():
-    skills = Counter()
-    for c in competitions:
-        req_skills = c.get('required_skills', [])
-        if req_skills:
-            for skill in req_skills:
-                skill_name = skill.get('skill_name') or skill.get('skill', '')
-                if skill_name:
-                    skills[skill_name] += 1
-
-    if not skills:
+def chart_skills_analysis(data, out_dir='charts'):
+    if not data['top']:
         print("No skills data found")
-        return skills
+        return
 
-    top_skills = skills.most_common(15)
-    labels, values = zip(*top_skills)
+    labels, values = zip(*data['top'])
 
     fig, ax = plt.subplots(figsize=(10, 8))
     bars = ax.barh(range(len(labels)), values, color=COLORS[0])
@@ -197,25 +247,16 @@ def chart_skills_analysis():
 
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    save_chart(fig, '05_skills_required.png')
-    return skills
+    save_chart(fig, '05_skills_required.png', out_dir)
 
 
 # 6. Eligibility Categories
-def chart_eligibility():
-    eligibility = Counter()
-    for c in competitions:
-        filters = c.get('filters', [])
-        for f in filters:
-            if f.get('type') == 'eligible':
-                eligibility[f.get('name', 'Unknown')] += 1
-
-    if not eligibility:
+def chart_eligibility(data, out_dir='charts'):
+    if not data['top']:
         print("No eligibility data found")
-        return eligibility
+        return
 
-    top_elig = eligibility.most_common(10)
-    labels, values = zip(*top_elig)
+    labels, values = zip(*data['top'])
 
     fig, ax = plt.subplots(figsize=(10, 6))
     bars = ax.bar(range(len(labels)), values, color=COLORS[:len(labels)])
@@ -230,14 +271,13 @@ def chart_eligibility():
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
     plt.tight_layout()
-    save_chart(fig, '06_eligibility_categories.png')
-    return eligibility
+    save_chart(fig, '06_eligibility_categories.png', out_dir)
 
 
 # 7. Paid vs Free Competitions
-def chart_paid_vs_free():
-    paid = sum(1 for c in competitions if c.get('isPaid'))
-    free = sum(1 for c in competitions if not c.get('isPaid'))
+def chart_paid_vs_free(data, out_dir='charts'):
+    paid = data['paid']
+    free = data['free']
 
     fig, ax = plt.subplots(figsize=(8, 8))
     values = [free, paid]
@@ -256,25 +296,16 @@ def chart_paid_vs_free():
     # Add count annotation
     ax.text(0, -1.3, f'Free: {free} | Paid: {paid}', ha='center', fontsize=11, fontweight='bold')
 
-    save_chart(fig, '07_paid_vs_free.png')
-    return {'free': free, 'paid': paid}
+    save_chart(fig, '07_paid_vs_free.png', out_dir)
 
 
 # 8. Competition Categories
-def chart_categories():
-    categories = Counter()
-    for c in competitions:
-        filters = c.get('filters', [])
-        for f in filters:
-            if f.get('type') == 'category':
-                categories[f.get('name', 'Unknown')] += 1
-
-    if not categories:
+def chart_categories(data, out_dir='charts'):
+    if not data['top']:
         print("No category data found")
-        return categories
+        return
 
-    top_cats = categories.most_common(12)
-    labels, values = zip(*top_cats)
+    labels, values = zip(*data['top'])
 
     fig, ax = plt.subplots(figsize=(10, 6))
     bars = ax.barh(range(len(labels)), values, color=COLORS[:len(labels)])
@@ -289,39 +320,12 @@ def chart_categories():
 
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
-    save_chart(fig, '08_categories.png')
-    return categories
+    save_chart(fig, '08_categories.png', out_dir)
 
 
 # 9. Prize Analysis
-def chart_prize_analysis():
-    prize_types = Counter()
-    cash_prizes = []
-
-    for c in competitions:
-        prizes = c.get('prizes', [])
-        has_cash = False
-        has_cert = False
-        has_other = False
-
-        for p in prizes:
-            if p.get('cash'):
-                has_cash = True
-                try:
-                    cash_prizes.append(float(p['cash']))
-                except:
-                    pass
-            if p.get('certificate'):
-                has_cert = True
-            if p.get('others'):
-                has_other = True
-
-        if has_cash:
-            prize_types['Cash Prize'] += 1
-        if has_cert:
-            prize_types['Certificate'] += 1
-        if has_other:
-            prize_types['Other Prizes'] += 1
+def chart_prize_analysis(data, out_dir='charts'):
+    prize_types = dict(data['prize_types'])
 
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
 
@@ -338,22 +342,23 @@ def chart_prize_analysis():
 
     # Cash prize distribution
     ax2 = axes[1]
-    if cash_prizes:
-        ax2.hist(cash_prizes, bins=20, color=COLORS[3], edgecolor='white', alpha=0.8)
+    if data['cash_hist']:
+        counts, edges = data['cash_hist']
+        median = data['cash_median']
+        ax2.hist(edges[:-1], bins=edges, weights=counts, color=COLORS[3], edgecolor='white', alpha=0.8)
         ax2.set_xlabel('Cash Prize Amount (₹)', fontweight='bold')
         ax2.set_ylabel('Number of Competitions', fontweight='bold')
         ax2.set_title('Cash Prize Distribution', fontsize=12, fontweight='bold')
-        ax2.axvline(np.median(cash_prizes), color=COLORS[0], linestyle='--', linewidth=2,
-                    label=f'Median: ₹{int(np.median(cash_prizes)):,}')
+        ax2.axvline(median, color=COLORS[0], linestyle='--', linewidth=2,
+                    label=f'Median: ₹{int(median):,}')
         ax2.legend()
 
     plt.tight_layout()
-    save_chart(fig, '09_prize_analysis.png')
-    return prize_types
+    save_chart(fig, '09_prize_analysis.png', out_dir)
 
 
 # 10. Summary Dashboard
-def chart_summary_dashboard():
+def chart_summary_dashboard(data, out_dir='charts'):
     fig = plt.figure(figsize=(16, 10))
     fig.suptitle('Unstop Competitions - Overview Dashboard', fontsize=18, fontweight='bold', y=0.98)
 
@@ -362,14 +367,14 @@ def chart_summary_dashboard():
 
     # Total competitions
     ax1 = fig.add_subplot(gs[0, 0])
-    ax1.text(0.5, 0.5, f'{len(competitions)}', ha='center', va='center',
+    ax1.text(0.5, 0.5, f'{data["total"]}', ha='center', va='center',
              fontsize=48, fontweight='bold', color=COLORS[0])
     ax1.text(0.5, 0.15, 'Total Competitions', ha='center', va='center',
              fontsize=14, color='#666')
     ax1.axis('off')
 
     # Total registrations
-    total_reg = sum(c.get('registerCount', 0) or 0 for c in competitions)
+    total_reg = data['total_registrations']
     ax2 = fig.add_subplot(gs[0, 1])
     ax2.text(0.5, 0.5, f'{total_reg:,}', ha='center', va='center',
              fontsize=36, fontweight='bold', color=COLORS[3])
@@ -378,7 +383,7 @@ def chart_summary_dashboard():
     ax2.axis('off')
 
     # Organizations
-    unique_orgs = len(set(c.get('organisation', {}).get('name', '') for c in competitions if c.get('organisation')))
+    unique_orgs = data['unique_orgs']
     ax3 = fig.add_subplot(gs[0, 2])
     ax3.text(0.5, 0.5, f'{unique_orgs}', ha='center', va='center',
              fontsize=48, fontweight='bold', color=COLORS[2])
@@ -388,14 +393,13 @@ def chart_summary_dashboard():
 
     # Region pie
     ax4 = fig.add_subplot(gs[1, 0])
-    regions = Counter(c.get('region', 'unknown').title() for c in competitions)
+    regions = dict(data['regions'])
     ax4.pie(regions.values(), labels=regions.keys(), autopct='%1.0f%%', colors=COLORS[:len(regions)])
     ax4.set_title('Format', fontweight='bold')
 
     # Top 5 types bar
     ax5 = fig.add_subplot(gs[1, 1])
-    types = Counter((c.get('subtype') or 'other').replace('_', ' ').title() for c in competitions)
-    top5 = types.most_common(5)
+    top5 = data['top_types']
     if top5:
         labels, values = zip(*top5)
         ax5.barh(range(len(labels)), values, color=COLORS[:5])
@@ -406,38 +410,534 @@ def chart_summary_dashboard():
 
     # Free vs Paid
     ax6 = fig.add_subplot(gs[1, 2])
-    paid = sum(1 for c in competitions if c.get('isPaid'))
-    free = len(competitions) - paid
-    ax6.pie([free, paid], labels=['Free', 'Paid'], autopct='%1.0f%%',
+    ax6.pie([data['free'], data['paid']], labels=['Free', 'Paid'], autopct='%1.0f%%',
             colors=[COLORS[0], COLORS[3]], startangle=90)
     ax6.set_title('Pricing', fontweight='bold')
 
-    save_chart(fig, '00_summary_dashboard.png')
+    save_chart(fig, '00_summary_dashboard.png', out_dir)
 
 
-# Run all charts
-if __name__ == '__main__':
+# 11. Registrations and Views Over Time
+def chart_registration_trend(data, out_dir='charts'):
+    times = [datetime.fromtimestamp(ts, timezone.utc) for ts in data['ts']]
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 7), sharex=True)
+    ax1.plot(times, data['registrations'], color=COLORS[0], linewidth=2, marker='o', markersize=3)
+    ax1.fill_between(times, data['registrations'], color=COLORS[0], alpha=0.15)
+    ax1.set_ylabel('Registrations', fontweight='bold')
+    ax1.set_title('Total Registrations and Views Over Time', fontsize=14, fontweight='bold', pad=20)
+
+    ax2.plot(times, data['views'], color=COLORS[3], linewidth=2, marker='o', markersize=3)
+    ax2.fill_between(times, data['views'], color=COLORS[3], alpha=0.15)
+    ax2.set_ylabel('Views', fontweight='bold')
+
+    for ax in (ax1, ax2):
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    save_chart(fig, '10_registration_trend.png', out_dir)
+
+
+# 12. Daily Registration Growth by Competition Type
+def chart_subtype_growth(data, out_dir='charts'):
+    if not data['series']:
+        print("No registration growth recorded yet")
+        return
+    days = [datetime.strptime(day, '%Y-%m-%d') for day in data['days']]
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for i, (label, values) in enumerate(data['series']):
+        ax.plot(days, values, color=COLORS[i % len(COLORS)], linewidth=2, marker='o',
+                markersize=3, label=label)
+    ax.set_ylabel('New Registrations per Day', fontweight='bold')
+    ax.set_title(f"Daily Registration Growth by Competition Type (last {data['window']} days)",
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.legend(fontsize=9)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    save_chart(fig, '11_subtype_growth.png', out_dir)
+
+
+# 13. Organizations Gaining the Most Registrations
+def chart_organisation_growth(data, out_dir='charts'):
+    if not data['top']:
+        print("No registration growth recorded yet")
+        return
+    labels, values = zip(*data['top'])
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(range(len(labels)), values, color=COLORS[:len(labels)])
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels, fontsize=9)
+    ax.invert_yaxis()
+    ax.set_xlabel('New Registrations', fontweight='bold')
+    ax.set_title(f"Top Organizations by Registration Growth (last {data['window']} days)",
+                 fontsize=14, fontweight='bold', pad=20)
+
+    for i, val in enumerate(values):
+        ax.text(val, i, f' +{val:,}', va='center', fontweight='bold', color='#333')
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    plt.tight_layout()
+    save_chart(fig, '12_organisation_growth.png', out_dir)
+
+
+# 14. Fastest Growing Competitions
+def chart_fastest_growing(data, out_dir='charts'):
+    if not data['top']:
+        print("No registration growth recorded yet")
+        return
+    names = [title[:40] + '...' if len(title) > 40 else title for title, _, _ in data['top']]
+    first = [start for _, start, _ in data['top']]
+    growth = [now - start for _, start, now in data['top']]
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(range(len(names)), first, color='#dddddd', label='When first seen')
+    ax.barh(range(len(names)), growth, left=first, color=COLORS[0], label='Growth since')
+    ax.set_yticks(range(len(names)))
+    ax.set_yticklabels(names, fontsize=8)
+    ax.invert_yaxis()
+    ax.set_xlabel('Registrations', fontweight='bold')
+    ax.set_title('Fastest Growing Competitions', fontsize=14, fontweight='bold', pad=20)
+    for i, (start, gain) in enumerate(zip(first, growth)):
+        ax.text(start + gain, i, f' +{gain:,}', va='center', fontsize=8, fontweight='bold')
+    ax.legend()
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    plt.tight_layout()
+    save_chart(fig, '13_fastest_growing.png', out_dir)
+
+
+# Per-chart payloads: only the precomputed data each chart renders, as plain
+# lists and numbers so they are cheap to send to worker processes.
+def _pairs(counter: Counter, n: Optional[int] = None) -> List[List[Any]]:
+    return [[label, int(value)] for label, value in counter.most_common(n)]
+
+
+def _histogram(values: np.ndarray, bins: int) -> Optional[List[List[float]]]:
+    if not len(values):
+        return None
+    counts, edges = np.histogram(values, bins=bins)
+    return [counts.tolist(), edges.tolist()]
+
+
+def _dashboard_payload(stats: ChartStats) -> Dict[str, Any]:
+    return {'total': stats.total, 'total_registrations': stats.total_registrations,
+            'unique_orgs': len(stats.org_names), 'regions': _pairs(stats.regions),
+            'top_types': _pairs(stats.types, 5), 'free': stats.free, 'paid': stats.paid}
+
+
+def _registration_payload(stats: ChartStats) -> Dict[str, Any]:
+    regs = stats.registrations
+    return {'hist': _histogram(regs, 30) or [[], [0.0, 1.0]],
+            'median': float(np.median(regs)) if len(regs) else 0.0,
+            'mean': float(np.mean(regs)) if len(regs) else 0.0,
+            'top': [[title, reg] for title, reg in stats.top_registered]}
+
+
+def _prize_payload(stats: ChartStats) -> Dict[str, Any]:
+    cash = stats.cash_prizes
+    return {'prize_types': [[label, int(value)] for label, value in stats.prize_types.items()],
+            'cash_hist': _histogram(cash, 20),
+            'cash_median': float(np.median(cash)) if len(cash) else 0.0}
+
+
+# Trend payloads read only the history rollups, never the raw partitions.
+def _window_start(history: MetricsHistory) -> Optional[str]:
+    snapshots = history.snapshots()
+    if not snapshots:
+        return None
+    last = datetime.fromtimestamp(snapshots[-1][0], timezone.utc)
+    return (last - timedelta(days=TREND_DAYS - 1)).strftime('%Y-%m-%d')
+
+
+def _trend_payload(history: MetricsHistory) -> Dict[str, Any]:
+    snapshots = history.snapshots()
+    return {'ts': [row[0] for row in snapshots], 'registrations': [row[2] for row in snapshots],
+            'views': [row[3] for row in snapshots]}
+
+
+def _subtype_growth_payload(history: MetricsHistory) -> Dict[str, Any]:
+    since = _window_start(history)
+    top = [key for key, _ in history.top_growth('subtype', since, 6)]
+    rows = history.daily_growth('subtype', since)
+    if not rows:
+        return {'window': TREND_DAYS, 'days': [], 'series': []}
+    start = datetime.strptime(rows[0][0], '%Y-%m-%d')
+    count = (datetime.strptime(rows[-1][0], '%Y-%m-%d') - start).days + 1
+    days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(count)]
+    index = {day: i for i, day in enumerate(days)}
+    series = {key: [0] * count for key in top}
+    for day, key, registrations, _ in rows:
+        if key in series:
+            series[key][index[day]] += registrations
+    return {'window': TREND_DAYS, 'days': days,
+            'series': [[subtype_label(key), series[key]] for key in top]}
+
+
+def _organisation_growth_payload(history: MetricsHistory) -> Dict[str, Any]:
+    top = history.top_growth('organisation', _window_start(history), 10)
+    return {'window': TREND_DAYS,
+            'top': [[_truncate(key), int(growth)] for key, growth in top if growth > 0]}
+
+
+# name -> (output file, render function, payload builder); builders of the
+# TREND_CHARTS take the MetricsHistory, all others the ChartStats
+CHARTS = {
+    'summary_dashboard': ('00_summary_dashboard.png', chart_summary_dashboard, _dashboard_payload),
+    'competition_types': ('01_competition_types.png', chart_competition_types,
+                          lambda s: {'top': _pairs(s.types, 8)}),
+    'top_organizations': ('02_top_organizations.png', chart_top_organizations,
+                          lambda s: {'top': _pairs(s.orgs, 10)}),
+    'region_distribution': ('03_region_distribution.png', chart_region_distribution,
+                            lambda s: {'regions': _pairs(s.regions)}),
+    'registration_stats': ('04_registration_stats.png', chart_registration_stats, _registration_payload),
+    'skills_required': ('05_skills_required.png', chart_skills_analysis,
+                        lambda s: {'top': _pairs(s.skills, 15)}),
+    'eligibility_categories': ('06_eligibility_categories.png', chart_eligibility,
+                               lambda s: {'top': _pairs(s.eligibility, 10)}),
+    'paid_vs_free': ('07_paid_vs_free.png', chart_paid_vs_free,
+                     lambda s: {'free': s.free, 'paid': s.paid}),
+    'categories': ('08_categories.png', chart_categories,
+                   lambda s: {'top': _pairs(s.categories, 12)}),
+    'prize_analysis': ('09_prize_analysis.png', chart_prize_analysis, _prize_payload),
+    'registration_trend': ('10_registration_trend.png', chart_registration_trend, _trend_payload),
+    'subtype_growth': ('11_subtype_growth.png', chart_subtype_growth, _subtype_growth_payload),
+    'organisation_growth': ('12_organisation_growth.png', chart_organisation_growth,
+                            _organisation_growth_payload),
+    'fastest_growing': ('13_fastest_growing.png', chart_fastest_growing,
+                        lambda h: {'top': [list(row) for row in h.fastest_growing(10)]}),
+}
+TREND_CHARTS = frozenset({'registration_trend', 'subtype_growth', 'organisation_growth',
+                          'fastest_growing'})
+
+# Record fields each table chart reads. A change confined to other fields
+# cannot alter its payload; adding or removing competitions affects them all.
+CHART_FIELDS = {
+    'summary_dashboard': {'derived_registrations', 'derived_organisation', 'derived_region',
+                          'derived_subtype', 'derived_paid'},
+    'competition_types': {'derived_subtype'},
+    'top_organizations': {'derived_organisation'},
+    'region_distribution': {'derived_region'},
+    'registration_stats': {'derived_registrations', 'title'},
+    'skills_required': {'derived_skills'},
+    'eligibility_categories': {'derived_eligibility'},
+    'paid_vs_free': {'derived_paid'},
+    'categories': {'derived_categories'},
+    'prize_analysis': {'derived_prize_types', 'derived_cash_amounts'},
+}
+
+
+def affected_charts(changed_fields: Iterable[str], membership_changed: bool = False,
+                    history_changed: bool = False) -> List[str]:
+    """Charts whose payload may differ after a change to the dataset.
+
+    ``changed_fields`` are the record fields that changed in updated
+    competitions; ``membership_changed`` means competitions were added or
+    removed; ``history_changed`` that a snapshot was appended to the history.
+    """
+    changed = set(changed_fields)
+    return [name for name in CHARTS
+            if (history_changed if name in TREND_CHARTS
+                else membership_changed or bool(CHART_FIELDS[name] & changed))]
+
+
+@profiled('aggregate')
+def chart_payloads(source: Any, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Build the render payload for each selected chart from its data source."""
+    payloads = {}
+    for name in names:
+        with stage(name):
+            payloads[name] = CHARTS[name][2](source)
+    return payloads
+
+
+def _init_worker():
+    """Import matplotlib once per pool worker, before the first job arrives."""
+    load_pyplot()
+
+
+def _render_job(name: str, payload: Dict[str, Any], out_dir: str) -> str:
+    load_pyplot()
+    with stage(name):
+        CHARTS[name][1](payload, out_dir)
+    return name
+
+
+@profiled('render')
+def render_charts(payloads: Dict[str, Dict[str, Any]], out_dir: str = 'charts',
+                  workers: Optional[int] = None) -> Dict[str, str]:
+    """Render charts, in a process pool unless ``workers`` is 1.
+
+    A failing chart does not stop the others; returns chart name -> error.
+    """
+    errors: Dict[str, str] = {}
+    if workers == 1 or len(payloads) <= 1:
+        for name, payload in payloads.items():
+            try:
+                _render_job(name, payload, out_dir)
+            except Exception as exc:
+                errors[name] = repr(exc)
+        return errors
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_render_job, name, payload, out_dir): name
+                   for name, payload in payloads.items()}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as exc:
+                errors[futures[future]] = repr(exc)
+    return errors
+
+
+# Render cache: a chart is re-rendered only when the hash of its payload,
+# the style settings or its rendering code changes.
+def _sha256(value: Any) -> str:
+    material = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def static_key(name: str) -> str:
+    """Hash of everything but the data that affects a chart: style and code."""
+    filename, render, _ = CHARTS[name]
+    try:
+        code = inspect.getsource(render) + inspect.getsource(save_chart)
+    except (OSError, TypeError):
+        code = ''
+    return _sha256({'file': filename, 'colors': COLORS, 'style': STYLE_SHEET,
+                    'rc': RC_PARAMS, 'code': code, 'version': CODE_VERSION})
+
+
+def chart_key(name: str, payload: Dict[str, Any]) -> str:
+    """Content hash identifying one rendering of a chart."""
+    return _sha256({'static': static_key(name), 'payload': payload})
+
+
+def input_fingerprint(path: str) -> Dict[str, Any]:
+    """Cheap identity of an input file, used to skip loading it at all."""
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def cache_is_fresh(names: Iterable[str], input_path: str, out_dir: str = 'charts') -> bool:
+    """True when every selected chart was rendered from this exact input file
+    with the current style and code, so neither loading nor rendering is needed."""
+    try:
+        fingerprint = input_fingerprint(input_path)
+    except OSError:
+        return False
+    entries = load_manifest(out_dir).get('charts', {})
+    for name in names:
+        entry = entries.get(name)
+        if (not entry or entry.get('input') != fingerprint
+                or entry.get('static') != static_key(name)):
+            return False
+        if entry.get('file') and not os.path.exists(os.path.join(out_dir, entry['file'])):
+            return False
+    return True
+
+
+def load_manifest(out_dir: str = 'charts') -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'charts': {}}
+
+
+def save_manifest(manifest: Dict[str, Any], out_dir: str = 'charts') -> None:
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _remove_output(out_dir: str, filename: Optional[str]) -> None:
+    if filename and os.path.exists(os.path.join(out_dir, filename)):
+        os.remove(os.path.join(out_dir, filename))
+        print(f"Removed stale: {os.path.join(out_dir, filename)}")
+
+
+def update_charts(payloads: Dict[str, Dict[str, Any]], out_dir: str = 'charts',
+                  workers: Optional[int] = None, force: bool = False,
+                  input_info: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, str]:
+    """Render only the charts whose cache key changed and refresh the manifest.
+
+    ``input_info`` maps chart name -> fingerprint of the file it was built from.
+
+    Outputs tracked in the manifest that no longer belong to any chart, or
+    that a chart stopped producing (e.g. no skills data), are deleted.
+    Returns chart name -> error for charts that failed to render.
+    """
+    manifest = load_manifest(out_dir)
+    entries = manifest.setdefault('charts', {})
+
+    # Outputs of charts that no longer exist
+    for name in [n for n in entries if n not in CHARTS]:
+        _remove_output(out_dir, entries.pop(name).get('file'))
+
+    with stage('cache_keys'):
+        keys = {name: chart_key(name, payload) for name, payload in payloads.items()}
+    stale = {}
+    for name, payload in payloads.items():
+        entry = entries.get(name, {})
+        output = entry.get('file')
+        fresh = entry.get('key') == keys[name] and (
+            output is None or os.path.exists(os.path.join(out_dir, output)))
+        if force or not fresh:
+            stale[name] = payload
+    print(f"Render cache: {len(payloads) - len(stale)} fresh, {len(stale)} to render")
+
+    before = {name: _mtime(out_dir, CHARTS[name][0]) for name in stale}
+    errors = render_charts(stale, out_dir, workers)
+
+    for name in stale:
+        if name in errors:
+            entries.pop(name, None)
+            continue
+        filename = CHARTS[name][0]
+        written = _mtime(out_dir, filename) not in (None, before[name])
+        if not written:
+            _remove_output(out_dir, filename)
+        entries[name] = {'key': keys[name], 'file': filename if written else None}
+    for name in payloads:
+        if name in entries:
+            entries[name].update(static=static_key(name), input=(input_info or {}).get(name))
+    save_manifest(manifest, out_dir)
+    return errors
+
+
+def _mtime(out_dir: str, filename: str) -> Optional[int]:
+    try:
+        return os.stat(os.path.join(out_dir, filename)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def print_summary(stats: ChartStats) -> None:
+    print("\n📊 Quick Statistics:")
+    print(f"   Total Competitions: {stats.total}")
+    print(f"   Total Registrations: {stats.total_registrations:,}")
+    print(f"   Unique Organizations: {len(stats.org_names)}")
+    print(f"   Online: {stats.regions.get('Online', 0)} | Offline: {stats.regions.get('Offline', 0)}")
+    print(f"   Free: {stats.free} | Paid: {stats.paid}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate charts from scraped competitions")
+    parser.add_argument("--input",
+                        help="competitions file to load (default: the newer of "
+                             "competitions.snap and competitions.json)")
+    parser.add_argument("--format", choices=["json", "ndjson", "snapshot"],
+                        help="input format (default: from the file extension)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, metavar="DIR",
+                        help="metrics history written by the scraper, read by the trend charts "
+                             "(default: %(default)s)")
+    parser.add_argument("--output-dir", default="charts",
+                        help="directory for the PNG files (default: %(default)s)")
+    parser.add_argument("--charts", nargs="+", choices=list(CHARTS), metavar="CHART",
+                        help="charts to generate (default: all); one of: " + ", ".join(CHARTS))
+    parser.add_argument("--stats", action="store_true",
+                        help="print the summary statistics only, without rendering")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="render processes; 1 renders in-process (default: %(default)s)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-render every chart, ignoring the render cache")
+    add_profile_args(parser)
+    return parser.parse_args(argv)
+
+
+def default_input(snapshot: str = 'competitions.snap', json_path: str = 'competitions.json') -> str:
+    """The newer of the snapshot and the JSON export, warning when the snapshot is stale.
+
+    Scraper runs with ``--no-snapshot`` (or an older scraper) rewrite the JSON
+    but leave the snapshot behind, so its presence alone is no sign of fresh data.
+    """
+    if not os.path.exists(snapshot):
+        return json_path
+    if os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(snapshot):
+        print(f"Warning: {snapshot} is older than {json_path}; loading {json_path}")
+        return json_path
+    return snapshot
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    profiler = StageProfiler.from_args(args, 'charts')
+    if profiler is None:
+        return generate(args)
+    if args.workers != 1:
+        print("Profiling renders in-process (--workers 1) so savefig is measured")
+        args.workers = 1
+    try:
+        with profiler:
+            return generate(args)
+    finally:
+        print(profiler.summary())
+        print(f"Saved profile to {', '.join(profiler.save())}")
+
+
+def generate(args: argparse.Namespace) -> int:
+    names = args.charts or list(CHARTS)
+    if args.input is None:
+        args.input = default_input()
+
+    # Trend charts read the history rollups; the others the competitions file
+    rollups = os.path.join(args.history, ROLLUPS_FILE)
+    trend_names = [name for name in names if name in TREND_CHARTS]
+    table_names = [name for name in names if name not in TREND_CHARTS]
+    if trend_names and not os.path.exists(rollups):
+        print(f"No metrics history at {rollups}; skipping trend charts")
+        trend_names = []
+
+    if not args.stats and not args.force and \
+            (not table_names or cache_is_fresh(table_names, args.input, args.output_dir)) and \
+            (not trend_names or cache_is_fresh(trend_names, rollups, args.output_dir)):
+        print(f"Charts in {args.output_dir}/ are up to date with {args.input}; nothing to do.")
+        return 0
+
+    # Load data into typed columns
+    stats = None
+    if table_names or args.stats:
+        table = load_table(args.input, args.format)
+        print(f"Loaded {len(table)} competitions")
+        stats = compute_stats(table)
+        del table
+
+    if args.stats:
+        print_summary(stats)
+        return 0
+
+    os.makedirs(args.output_dir, exist_ok=True)
     print("\nGenerating charts...")
     print("=" * 50)
 
-    chart_summary_dashboard()
-    types = chart_competition_types()
-    orgs = chart_top_organizations()
-    regions = chart_region_distribution()
-    registrations = chart_registration_stats()
-    skills = chart_skills_analysis()
-    eligibility = chart_eligibility()
-    paid_free = chart_paid_vs_free()
-    categories = chart_categories()
-    prizes = chart_prize_analysis()
+    payloads = chart_payloads(stats, table_names)
+    inputs = dict.fromkeys(table_names, input_fingerprint(args.input)) if table_names else {}
+    if trend_names:
+        with MetricsHistory(args.history) as history:
+            payloads.update(chart_payloads(history, trend_names))
+        inputs.update(dict.fromkeys(trend_names, input_fingerprint(rollups)))
+    errors = update_charts(payloads, args.output_dir, args.workers, force=args.force,
+                           input_info=inputs)
 
     print("=" * 50)
-    print("All charts generated successfully!")
+    if errors:
+        for name, error in sorted(errors.items()):
+            print(f"Failed: {name}: {error}")
+    else:
+        print("All charts generated successfully!")
 
-    # Print summary stats
-    print("\n📊 Quick Statistics:")
-    print(f"   Total Competitions: {len(competitions)}")
-    print(f"   Total Registrations: {sum(c.get('registerCount', 0) or 0 for c in competitions):,}")
-    print(f"   Unique Organizations: {len(set(c.get('organisation', {}).get('name', '') for c in competitions if c.get('organisation')))}")
-    print(f"   Online: {regions.get('Online', 0)} | Offline: {regions.get('Offline', 0)}")
-    print(f"   Free: {paid_free['free']} | Paid: {paid_free['paid']}")
+    if stats is not None:
+        print_summary(stats)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Normalised, typed fields derived from each competition at ingest.
+
+``derive`` walks a record's nested fields once and returns flat
+``derived_*`` values::
+
+    derived_registrations  registerCount as a number, None when missing/non-numeric
+    derived_views          viewsCount, likewise
+    derived_end_ts         end_date / updated_at as epoch seconds, None when missing
+    derived_updated_ts
+    derived_paid           isPaid as a bool
+    derived_subtype        clean label, e.g. "Online Coding Challenge"
+    derived_region         clean label, e.g. "Online"; None when missing
+    derived_organisation   organisation name; None when missing
+    derived_skills         required skill names
+    derived_eligibility    names of the ``eligible`` filters
+    derived_categories     names of the ``category`` filters
+    derived_prize_types    subset of PRIZE_TYPES, in that order
+    derived_cash_amounts   parseable cash prizes as floats
+    derived_cash_total     their sum
+
+The scraper stores them with the record (the SQLite store only for inserted
+or updated records), so the columnar snapshot holds them as ready-made
+columns and ``competition_table`` never walks nested dicts for data that
+already carries them. ``derived_version`` is bumped whenever a derivation
+changes, which makes older records count as not derived.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+DERIVED_VERSION = 1
+PRIZE_TYPES = ('cash', 'certificate', 'other')
+DERIVED_FIELDS = ('derived_version', 'derived_registrations', 'derived_views', 'derived_end_ts',
+                  'derived_updated_ts', 'derived_paid', 'derived_subtype', 'derived_region',
+                  'derived_organisation', 'derived_skills', 'derived_eligibility',
+                  'derived_categories', 'derived_prize_types', 'derived_cash_amounts',
+                  'derived_cash_total')
+
+
+def subtype_label(subtype: str) -> str:
+    """``online_coding_challenge`` -> ``Online Coding Challenge``."""
+    return subtype.replace('_', ' ').title()
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _timestamp(value: Any) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _cash(value: Any) -> Optional[float]:
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if amount == amount else None  # drop NaN
+
+
+def derive(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``derived_*`` fields of one raw record."""
+    org = record.get('organisation') or {}
+    region = record.get('region', 'unknown') or None
+    skills, eligibility, categories = [], [], []
+    for skill in record.get('required_skills') or []:
+        name = skill.get('skill_name') or skill.get('skill', '')
+        if name:
+            skills.append(name)
+    for f in record.get('filters') or []:
+        if f.get('type') == 'eligible':
+            eligibility.append(f.get('name', 'Unknown'))
+        elif f.get('type') == 'category':
+            categories.append(f.get('name', 'Unknown'))
+    kinds = set()
+    amounts: List[float] = []
+    for p in record.get('prizes') or []:
+        if p.get('cash'):
+            kinds.add('cash')
+            amount = _cash(p['cash'])
+            if amount is not None:
+                amounts.append(amount)
+        if p.get('certificate'):
+            kinds.add('certificate')
+        if p.get('others'):
+            kinds.add('other')
+    return {
+        'derived_version': DERIVED_VERSION,
+        'derived_registrations': _number(record.get('registerCount')),
+        'derived_views': _number(record.get('viewsCount')),
+        'derived_end_ts': _timestamp(record.get('end_date')),
+        'derived_updated_ts': _timestamp(record.get('updated_at')),
+        'derived_paid': bool(record.get('isPaid')),
+        'derived_subtype': subtype_label(record.get('subtype') or 'other'),
+        'derived_region': str(region).title() if region is not None else None,
+        'derived_organisation': (org.get('name') if isinstance(org, dict) else None) or None,
+        'derived_skills': skills,
+        'derived_eligibility': eligibility,
+        'derived_categories': categories,
+        'derived_prize_types': [kind for kind in PRIZE_TYPES if kind in kinds],
+        'derived_cash_amounts': amounts,
+        'derived_cash_total': sum(amounts),
+    }
+
+
+def is_derived(record: Dict[str, Any]) -> bool:
+    """Whether ``record`` carries current derived fields."""
+    return record.get('derived_version') == DERIVED_VERSION
+
+
+def derived_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The record itself when it is derived, otherwise its derived fields."""
+    return record if is_derived(record) else derive(record)
+
+
+def add_derived(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Add (or refresh) the derived fields in place; returns ``record``."""
+    record.update(derive(record))
+    return record
+
+
+def ensure_derived(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield ``records``, deriving only those without current derived fields."""
+    for record in records:
+        yield record if is_derived(record) else add_derived(record)
@@ -0,0 +1,123 @@
+"""Persistent HTTP response cache for the scraper.
+
+Responses are stored compressed in a SQLite file, keyed by URL and query
+parameters, together with their ``ETag`` and ``Last-Modified`` validators.
+``scrape_competitions.fetch_json`` consults it before every request:
+
+* an entry younger than ``ttl`` is replayed without touching the network;
+* otherwise the request carries ``If-None-Match``/``If-Modified-Since`` and a
+  ``304 Not Modified`` answer is served from the cache;
+* in ``offline`` mode the network is never used and a miss is an error.
+"""
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlencode
+
+DEFAULT_CACHE = "http_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    body BLOB NOT NULL
+);
+"""
+
+
+class CacheMiss(Exception):
+    """Offline mode and no cached response for the request."""
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """SQLite-backed response cache with conditional revalidation and replay."""
+
+    def __init__(self, path: str = DEFAULT_CACHE, ttl: Optional[float] = None,
+                 offline: bool = False):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.stats = {'replayed': 0, 'revalidated': 0, 'stored': 0, 'misses': 0, 'bytes_saved': 0}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def key(url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        """Cache key: the URL with its query parameters in a canonical order."""
+        if not params:
+            return url
+        return url + "?" + urlencode(sorted((k, str(v)) for k, v in params.items()))
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        row = self.conn.execute(
+            "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+            (key,)).fetchone()
+        if row is None:
+            self.stats['misses'] += 1
+            return None
+        return CachedResponse(zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def replayable(self, entry: CachedResponse) -> bool:
+        """Whether ``entry`` may be served without asking the server."""
+        fresh = self.ttl is not None and time.time() - entry.stored_at <= self.ttl
+        return fresh or (self.offline and self.ttl is None)
+
+    def replay(self, entry: CachedResponse) -> bytes:
+        self.stats['replayed'] += 1
+        self.stats['bytes_saved'] += len(entry.body)
+        return entry.body
+
+    def revalidated(self, key: str, entry: CachedResponse) -> bytes:
+        """The server answered 304: restart the entry's TTL and serve its body."""
+        self.conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        self.stats['revalidated'] += 1
+        self.stats['bytes_saved'] += len(entry.body)
+        return entry.body
+
+    def store(self, key: str, body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, etag, last_modified, stored_at, size, body)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, etag, last_modified, time.time(), len(body), zlib.compress(body, 6)))
+        self.conn.commit()
+        self.stats['stored'] += 1
+
+    def report(self) -> str:
+        s = self.stats
+        return (f"HTTP cache: {s['replayed']} replayed, {s['revalidated']} not modified, "
+                f"{s['stored']} stored, {s['bytes_saved'] / 1e6:.1f} MB not downloaded")
@@ -0,0 +1,254 @@
+"""Append-only history of per-competition metrics with incrementally maintained rollups.
+
+Every scrape appends one compact row per competition to a partition file
+for its UTC day::
+
+    history/date=2026-01-15/metrics.bin    rows of HISTORY_DTYPE, 32 bytes each
+
+and folds the same rows into ``history/rollups.db``, so trend queries never
+scan the raw history:
+
+* ``snapshots``     totals per scrape (competitions, registrations, views)
+* ``latest``        first and latest counts per competition
+* ``daily_growth``  registration/view growth per day and subtype/organisation
+
+Growth is the change since the previous snapshot of the same competition;
+a competition's first snapshot contributes none. ``rebuild()`` recomputes
+every rollup from the partitions, e.g. after an interrupted run.
+"""
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_HISTORY = "history"
+ROLLUPS_FILE = "rollups.db"
+PARTITION_FILE = "metrics.bin"
+HISTORY_DTYPE = np.dtype([('ts', '<i8'), ('id', '<i8'), ('registrations', '<i8'), ('views', '<i8')])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS competitions (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    subtype TEXT,
+    organisation TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    ts INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    competitions INTEGER NOT NULL,
+    registrations INTEGER NOT NULL,
+    views INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS latest (
+    id INTEGER PRIMARY KEY,
+    first_ts INTEGER NOT NULL,
+    first_registrations INTEGER NOT NULL,
+    first_views INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    registrations INTEGER NOT NULL,
+    views INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_growth (
+    day TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    registrations INTEGER NOT NULL,
+    views INTEGER NOT NULL,
+    PRIMARY KEY (day, dimension, key)
+);
+"""
+ROLLUP_TABLES = ('snapshots', 'latest', 'daily_growth')
+
+
+def _day(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _count(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class HistoryRecorder:
+    """Collects one snapshot page by page; ``commit()`` appends it to the history.
+
+    ``add`` only keeps a small tuple per competition, so it can be fed from
+    a streaming writer thread.
+    """
+
+    def __init__(self, history: "MetricsHistory", ts: int):
+        self.history = history
+        self.ts = ts
+        self.rows: List[Tuple[int, int, int]] = []
+        self.labels: List[Tuple[int, Optional[str], str, Optional[str]]] = []
+        self.committed = False
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            comp_id = record.get('id')
+            if comp_id is None:
+                continue
+            org = record.get('organisation') or {}
+            self.rows.append((comp_id, _count(record.get('registerCount')),
+                              _count(record.get('viewsCount'))))
+            self.labels.append((comp_id, record.get('title'), record.get('subtype') or 'other',
+                                org.get('name') if isinstance(org, dict) else None))
+
+    def commit(self) -> int:
+        """Append the snapshot and update the rollups; returns the rows written (0 if already)."""
+        if self.committed:
+            return 0
+        self.committed = True
+        self.ts, written = self.history._append(self.ts, self.rows, self.labels)
+        return written
+
+
+class MetricsHistory:
+    """Date-partitioned metrics history plus its SQLite rollups."""
+
+    def __init__(self, directory: str = DEFAULT_HISTORY):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, ROLLUPS_FILE))
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MetricsHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Writing
+
+    def recorder(self, ts: Optional[int] = None) -> HistoryRecorder:
+        return HistoryRecorder(self, int(ts if ts is not None else datetime.now(timezone.utc).timestamp()))
+
+    def append(self, records: Iterable[Dict[str, Any]], ts: Optional[int] = None) -> int:
+        """Append one snapshot of ``records``; returns the rows written."""
+        recorder = self.recorder(ts)
+        recorder.add(records)
+        return recorder.commit()
+
+    def partition_path(self, day: str) -> str:
+        return os.path.join(self.directory, f"date={day}", PARTITION_FILE)
+
+    def _append(self, ts: int, rows: List[Tuple[int, int, int]],
+                labels: List[Tuple[int, Optional[str], str, Optional[str]]]) -> Tuple[int, int]:
+        """Write one snapshot; returns its timestamp and the rows written.
+
+        ``ts`` keys the snapshot, so a second snapshot within the same second
+        (e.g. two quick runs) moves to the next free second.
+        """
+        while self.conn.execute("SELECT 1 FROM snapshots WHERE ts = ?", (ts,)).fetchone():
+            ts += 1
+        data = np.empty(len(rows), dtype=HISTORY_DTYPE)
+        data['ts'] = ts
+        if rows:
+            data['id'], data['registrations'], data['views'] = np.array(rows, dtype='<i8').T
+        path = self.partition_path(_day(ts))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as f:
+            data.tofile(f)
+        self.conn.executemany(
+            "INSERT INTO competitions (id, title, subtype, organisation) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(id) DO UPDATE SET title = excluded.title, subtype = excluded.subtype,"
+            " organisation = excluded.organisation", labels)
+        self._fold(ts, data)
+        self.conn.commit()
+        return ts, len(data)
+
+    def _fold(self, ts: int, data: np.ndarray) -> None:
+        """Update the rollups with one snapshot (caller commits)."""
+        day = _day(ts)
+        self.conn.execute(
+            "INSERT INTO snapshots (ts, day, competitions, registrations, views) VALUES (?, ?, ?, ?, ?)",
+            (ts, day, len(data), int(data['registrations'].sum()), int(data['views'].sum())))
+        previous = {comp_id: (regs, views) for comp_id, regs, views
+                    in self.conn.execute("SELECT id, registrations, views FROM latest")}
+        labels = {comp_id: (subtype, org) for comp_id, subtype, org
+                  in self.conn.execute("SELECT id, subtype, organisation FROM competitions")}
+        growth: Dict[Tuple[str, str], List[int]] = {}
+        inserts, updates = [], []
+        for comp_id, regs, views in zip(data['id'].tolist(), data['registrations'].tolist(),
+                                        data['views'].tolist()):
+            before = previous.get(comp_id)
+            if before is None:
+                inserts.append((comp_id, ts, regs, views, ts, regs, views))
+                continue
+            updates.append((ts, regs, views, comp_id))
+            d_regs, d_views = regs - before[0], views - before[1]
+            if not (d_regs or d_views):
+                continue
+            subtype, org = labels.get(comp_id, ('other', None))
+            for key in (('subtype', subtype or 'other'), ('organisation', org or 'Unknown')):
+                total = growth.setdefault(key, [0, 0])
+                total[0] += d_regs
+                total[1] += d_views
+        self.conn.executemany("INSERT INTO latest VALUES (?, ?, ?, ?, ?, ?, ?)", inserts)
+        self.conn.executemany("UPDATE latest SET last_ts = ?, registrations = ?, views = ? WHERE id = ?",
+                              updates)
+        self.conn.executemany(
+            "INSERT INTO daily_growth (day, dimension, key, registrations, views) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(day, dimension, key) DO UPDATE SET"
+            " registrations = registrations + excluded.registrations, views = views + excluded.views",
+            [(day, dim, key, regs, views) for (dim, key), (regs, views) in growth.items()])
+
+    def rebuild(self) -> int:
+        """Recompute every rollup from the raw partitions; returns the snapshots replayed."""
+        for table in ROLLUP_TABLES:
+            self.conn.execute(f"DELETE FROM {table}")
+        snapshots = 0
+        for day in self.days():
+            data = self.read_partition(day)
+            for ts in np.unique(data['ts']):
+                self._fold(int(ts), data[data['ts'] == ts])
+                snapshots += 1
+        self.conn.commit()
+        return snapshots
+
+    # Reading
+
+    def days(self) -> List[str]:
+        """Days with a partition, oldest first."""
+        return sorted(name[5:] for name in os.listdir(self.directory)
+                      if name.startswith('date=') and os.path.exists(self.partition_path(name[5:])))
+
+    def read_partition(self, day: str) -> np.ndarray:
+        """Raw rows of one day, memory-mapped."""
+        path = self.partition_path(day)
+        if not os.path.getsize(path):
+            return np.empty(0, dtype=HISTORY_DTYPE)
+        return np.memmap(path, dtype=HISTORY_DTYPE, mode='r')
+
+    def snapshots(self) -> List[Tuple[int, int, int, int]]:
+        """``(ts, competitions, registrations, views)`` per scrape, oldest first."""
+        return self.conn.execute(
+            "SELECT ts, competitions, registrations, views FROM snapshots ORDER BY ts").fetchall()
+
+    def daily_growth(self, dimension: str, since: Optional[str] = None) -> List[Tuple[str, str, int, int]]:
+        """``(day, key, registrations, views)`` growth rows of ``dimension``, from day ``since``."""
+        return self.conn.execute(
+            "SELECT day, key, registrations, views FROM daily_growth WHERE dimension = ? AND day >= ?"
+            " ORDER BY day", (dimension, since or '')).fetchall()
+
+    def top_growth(self, dimension: str, since: Optional[str] = None,
+                   n: int = 10) -> List[Tuple[str, int]]:
+        """Keys of ``dimension`` with the most registration growth from day ``since``."""
+        return self.conn.execute(
+            "SELECT key, SUM(registrations) AS growth FROM daily_growth WHERE dimension = ? AND day >= ?"
+            " GROUP BY key ORDER BY growth DESC, key LIMIT ?", (dimension, since or '', n)).fetchall()
+
+    def fastest_growing(self, n: int = 10) -> List[Tuple[str, int, int]]:
+        """``(title, registrations when first seen, registrations now)`` of the top growers."""
+        return self.conn.execute(
+            "SELECT COALESCE(c.title, l.id), l.first_registrations, l.registrations FROM latest l"
+            " LEFT JOIN competitions c ON c.id = l.id WHERE l.registrations > l.first_registrations"
+            " ORDER BY l.registrations - l.first_registrations DESC, l.id LIMIT ?", (n,)).fetchall()
@@ -0,0 +1,284 @@
+"""Local stand-in for the Unstop search API, for tuning and benchmarking the scraper.
+
+Serves ``/api/public/opportunity/search-result`` and the per-competition
+detail endpoint with the same response shapes as unstop.com, from a fixture file (JSON array or NDJSON) or synthetic
+records, with configurable latency, error rate and 429 throttling, and
+optionally a listing that keeps changing (``--churn``). Successful
+responses carry ``ETag``/``Last-Modified``, answer conditional requests with
+``304 Not Modified`` and are gzip-compressed when the client accepts it.
+
+    python mock_unstop_server.py --total 20000 --latency 0.05 --error-rate 0.02
+    python scrape_competitions.py --base-url http://127.0.0.1:8765/api/public/opportunity/search-result
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+SEARCH_PATH = "/api/public/opportunity/search-result"
+DETAIL_PATH = "/api/public/competition/{id}"
+DEFAULT_PORT = 8765
+
+SUBTYPES = ['online_coding_challenge', 'quiz', 'hackathon', 'case_study', 'business_plan',
+            'innovation_challenge', 'presentation', 'others']
+SKILLS = ['Python', 'Machine Learning', 'Communication Skills', 'Data Analysis', 'Marketing',
+          'Problem Solving', 'Finance', 'UI/UX Design', 'Java', 'Public Speaking']
+
+
+@dataclass
+class MockSettings:
+    """Behaviour of the mock API."""
+    total: int = 1000
+    latency: float = 0.05  # Mean seconds per response
+    jitter: float = 0.5  # Latency varies by +/- this fraction
+    error_rate: float = 0.0  # Fraction of requests answered with a 5xx
+    throttle_rate: float = 0.0  # Fraction of requests answered with a 429
+    rate_limit: Optional[float] = None  # Requests/sec above which requests get a 429
+    retry_after: float = 1.0  # Retry-After header sent with 429s
+    max_per_page: int = 200  # Larger per_page values are clamped, like the real API
+    opportunities: Tuple[str, ...] = ()  # Spread records over these types and filter by ?opportunity=
+    churn: float = 0.0  # Records updated (or, one in ten, added) per second, moved to the top
+    seed: Optional[int] = None
+
+
+def synthetic_competition(i: int, rng: random.Random,
+                          opportunity: str = 'competitions') -> Dict[str, Any]:
+    """A small record with the fields the scraper and charts read."""
+    comp_id = 1_000_000 + i
+    org_id = rng.randint(1, max(1, rng.choice([20, 200, 2000])))
+    return {
+        'id': comp_id,
+        'title': f"Synthetic Competition {i}",
+        'type': opportunity,
+        'subtype': rng.choice(SUBTYPES),
+        'status': 'LIVE',
+        'region': rng.choice(['online', 'online', 'offline']),
+        'isPaid': rng.random() < 0.15,
+        'registerCount': int(rng.paretovariate(1.2) * 20),
+        'viewsCount': int(rng.paretovariate(1.1) * 300),
+        'end_date': '2026-01-15T23:59:00+05:30',
+        'updated_at': '2025-12-18T10:51:43+05:30',
+        'organisation': {'id': org_id, 'name': f"Organisation {org_id}"},
+        'required_skills': [{'skill_name': s} for s in rng.sample(SKILLS, rng.randint(0, 3))],
+        'filters': [{'type': 'category', 'name': rng.choice(['Hackathon', 'Quiz', 'Business'])},
+                    {'type': 'eligible', 'name': rng.choice(['Engineering Students', 'Everyone'])}],
+        'prizes': [{'rank': 'Winner', 'cash': rng.choice([None, 5000, 10000, 50000]),
+                    'certificate': 1}],
+        'details': '<p>' + 'Lorem ipsum dolor sit amet. ' * rng.randint(5, 60) + '</p>',
+    }
+
+
+def synthetic_detail(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The listing record plus the rounds and timeline only the detail endpoint has."""
+    rng = random.Random(record.get('id'))
+    rounds = [{'id': n, 'title': f"Round {n}", 'type': rng.choice(['quiz', 'submission', 'interview']),
+               'start_date': '2025-12-20T10:00:00+05:30', 'end_date': '2026-01-10T23:59:00+05:30'}
+              for n in range(1, rng.randint(1, 4) + 1)]
+    return {**record, 'rounds': rounds,
+            'timeline': [{'title': 'Registration Deadline', 'date': record.get('end_date')}],
+            'eligibility_text': 'Open to all students.'}
+
+
+def load_fixture(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+class MockUnstopAPI:
+    """Request handler holding the dataset and throttling state."""
+
+    def __init__(self, settings: MockSettings, records: Optional[List[Dict[str, Any]]] = None):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        if records is None:
+            types = settings.opportunities or ('competitions',)
+            records = [synthetic_competition(i, self.rng, types[i % len(types)])
+                       for i in range(settings.total)]
+        self.records = records
+        self.by_id = {record.get('id'): record for record in records}
+        self.by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            self.by_type.setdefault(record.get('type'), []).append(record)
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.not_modified = 0
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.changes = 0
+        self._last_churn = time.monotonic()
+
+    def _churn(self) -> None:
+        """Apply the updates due since the last request, newest first in the listing."""
+        now = time.monotonic()
+        due = int((now - self._last_churn) * self.settings.churn)
+        if not due:
+            return
+        self._last_churn = now
+        stamp = datetime.now(timezone(timedelta(hours=5, minutes=30))).isoformat(timespec='seconds')
+        for _ in range(due):
+            if self.rng.random() < 0.1:
+                types = self.settings.opportunities or ('competitions',)
+                record = synthetic_competition(len(self.records), self.rng, self.rng.choice(types))
+                self.by_id[record['id']] = record
+            else:
+                record = self.records.pop(self.rng.randrange(len(self.records)))
+                record['registerCount'] = (record.get('registerCount') or 0) + self.rng.randint(1, 20)
+            record['updated_at'] = stamp
+            self.records.insert(0, record)
+        self.by_type = {}
+        for record in self.records:
+            self.by_type.setdefault(record.get('type'), []).append(record)
+        self.changes += due
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def _over_rate_limit(self) -> bool:
+        if not self.settings.rate_limit:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        return self._window_count > self.settings.rate_limit
+
+    async def _simulate(self) -> Optional[web.Response]:
+        """Latency, then a 429 or 5xx response when one is due."""
+        s = self.settings
+        self.requests += 1
+        await asyncio.sleep(max(0.0, s.latency * (1 + self.rng.uniform(-s.jitter, s.jitter))))
+
+        if self._over_rate_limit() or self.rng.random() < s.throttle_rate:
+            self.throttled += 1
+            return web.json_response({'message': 'Too Many Requests'}, status=429,
+                                     headers={'Retry-After': str(s.retry_after)})
+        if self.rng.random() < s.error_rate:
+            self.errors += 1
+            return web.json_response({'message': 'Server Error'},
+                                     status=self.rng.choice([500, 502, 503]))
+        return None
+
+    def _respond(self, request: web.Request, payload: Dict[str, Any]) -> web.Response:
+        """JSON response with validators, honouring conditional and gzip requests."""
+        body = json.dumps(payload).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        headers = {'ETag': etag, 'Last-Modified': self.last_modified}
+        if 'If-None-Match' in request.headers:  # takes precedence over If-Modified-Since
+            unchanged = request.headers['If-None-Match'] == etag
+        else:
+            unchanged = request.headers.get('If-Modified-Since') == self.last_modified
+        if unchanged:
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        response = web.Response(body=body, content_type='application/json', headers=headers)
+        response.enable_compression()
+        return response
+
+    async def search(self, request: web.Request) -> web.Response:
+        s = self.settings
+        if s.churn:
+            self._churn()
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        try:
+            page = max(1, int(request.query.get('page', 1)))
+            per_page = min(s.max_per_page, max(1, int(request.query.get('per_page', 18))))
+        except ValueError:
+            return web.json_response({'message': 'Bad Request'}, status=400)
+        records = self.records
+        if s.opportunities:
+            records = self.by_type.get(request.query.get('opportunity'), [])
+        start = (page - 1) * per_page
+        total = len(records)
+        return self._respond(request, {'data': {
+            'current_page': page,
+            'per_page': per_page,
+            'total': total,
+            'last_page': (total + per_page - 1) // per_page,
+            'data': records[start:start + per_page],
+        }})
+
+    async def detail(self, request: web.Request) -> web.Response:
+        failure = await self._simulate()
+        if failure is not None:
+            return failure
+        try:
+            record = self.by_id.get(int(request.match_info['id']))
+        except ValueError:
+            record = None
+        if record is None:
+            return web.json_response({'message': 'Not Found'}, status=404)
+        return self._respond(request, {'data': {'competition': synthetic_detail(record)}})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({'requests': self.requests, 'throttled': self.throttled,
+                                  'errors': self.errors, 'not_modified': self.not_modified,
+                                  'changes': self.changes})
+
+
+def make_app(settings: MockSettings, records: Optional[List[Dict[str, Any]]] = None) -> web.Application:
+    api = MockUnstopAPI(settings, records)
+    app = web.Application()
+    app['api'] = api
+    app.router.add_get(SEARCH_PATH, api.search)
+    app.router.add_get(DETAIL_PATH, api.detail)
+    app.router.add_get('/_stats', api.stats)
+    return app
+
+
+def serve(settings: MockSettings, records: Optional[List[Dict[str, Any]]] = None,
+          host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> None:
+    """Run the mock server until interrupted."""
+    web.run_app(make_app(settings, records), host=host, port=port, print=None)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mock Unstop search API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fixture", help="JSON or NDJSON file of competitions to serve "
+                                          "(default: synthetic records)")
+    parser.add_argument("--total", type=int, default=MockSettings.total,
+                        help="number of synthetic records (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=MockSettings.latency,
+                        help="mean response latency in seconds (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, default=MockSettings.jitter)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, help="requests/sec before answering 429")
+    parser.add_argument("--retry-after", type=float, default=MockSettings.retry_after)
+    parser.add_argument("--max-per-page", type=int, default=MockSettings.max_per_page)
+    parser.add_argument("--opportunities", nargs="+", default=[],
+                        help="serve separate listings per ?opportunity=, e.g. competitions hackathons jobs")
+    parser.add_argument("--churn", type=float, default=0.0,
+                        help="records changed per second; changed and new records move to page 1")
+    parser.add_argument("--seed", type=int)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    settings = MockSettings(total=args.total, latency=args.latency, jitter=args.jitter,
+                            error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                            rate_limit=args.rate_limit, retry_after=args.retry_after,
+                            max_per_page=args.max_per_page, opportunities=tuple(args.opportunities),
+                            churn=args.churn, seed=args.seed)
+    records = load_fixture(args.fixture) if args.fixture else None
+    count = len(records) if records is not None else settings.total
+    print(f"Serving {count} competitions on http://{args.host}:{args.port}{SEARCH_PATH}")
+    serve(settings, records, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
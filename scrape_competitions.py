@@ -1,119 +1,761 @@
+import argparse
 import asyncio
 import aiohttp
+import contextlib
 import csv
 import json
-from typing import List, Dict, Any
+import os
+import random
+import socket
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Awaitable, Callable, Iterable, Optional, Tuple
+
+from adaptive_control import AdaptiveLimiter, RateLimiter
+from blob_store import DEFAULT_BLOBS, BlobSplitter, BlobStore
+from competition_store import CompetitionStore, DEFAULT_DB, merge_detail
+from competition_table import iter_competitions
+from derived_fields import add_derived, ensure_derived
+from http_cache import DEFAULT_CACHE, CacheMiss, ResponseCache
+from metrics_history import DEFAULT_HISTORY, HistoryRecorder, MetricsHistory
+from scrape_metrics import RequestSample, ScrapeMetrics
+from search_index import DEFAULT_INDEX, build_index
+from snapshot import SnapshotWriter, write_snapshot
+from stage_profiler import StageProfiler, add_profile_args, profiled, stage, timed
+from work_queue import DEFAULT_QUEUE, WorkQueue, WorkUnit
+
+try:  # aiohttp decodes brotli responses only when one of these is installed
+    import brotli  # noqa: F401
+    BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI = True
+    except ImportError:
+        BROTLI = False
 
 BASE_URL = "https://unstop.com/api/public/opportunity/search-result"
+DETAIL_URL = "https://unstop.com/api/public/competition/{id}"
+SITE_URL = "https://unstop.com"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36",
     "Accept": "application/json, text/plain, */*",
-    "Referer": "https://unstop.com/competitions?oppstatus=open"
+    "Accept-Encoding": "gzip, deflate, br" if BROTLI else "gzip, deflate",
 }
 PER_PAGE = 50  # Fetch more per request to reduce total requests
 
+# Fetch engine tuning
+MAX_CONCURRENCY = 8  # Requests in flight at once, shared by all pages
+REQUEST_TIMEOUT = 30  # Seconds per request, including reading the body
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5  # Seconds; doubled on every retry
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Adaptive mode: requests in flight start at the configured concurrency and
+# float up to ADAPTIVE_MAX_CONCURRENCY; page sizes are probed largest first
+ADAPTIVE_MAX_CONCURRENCY = 32
+PAGE_SIZE_CANDIDATES = (200, 100, 50)
+
+# Detail enrichment: request budget when no --rate is given, and how many
+# detail records are cached per store commit
+DETAIL_RATE = 20.0
+DETAIL_SAVE_BATCH = 100
+
+# Streaming mode: pages waiting for the writer; bounds memory to roughly
+# (concurrency + STREAM_QUEUE_PAGES) pages regardless of catalog size
+STREAM_QUEUE_PAGES = 4
+PRIORITY_FIELDS = ['id', 'title', 'seo_url', 'public_url', 'type', 'subtype',
+                   'status', 'registerCount', 'viewsCount', 'end_date']
+
+
+@dataclass(frozen=True)
+class CrawlTarget:
+    """One listing to crawl: an opportunity type, a status and extra query filters.
+
+    Written on the command line and in the work queue as
+    ``opportunity:status[:key=value&key=value]``, e.g. ``hackathons:open``.
+    """
+    opportunity: str = "competitions"
+    status: str = "open"
+    filters: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def parse(cls, spec: str) -> "CrawlTarget":
+        opportunity, _, rest = spec.partition(":")
+        status, _, query = rest.partition(":")
+        filters = tuple(sorted(tuple(item.split("=", 1)) for item in query.split("&") if "=" in item))
+        return cls(opportunity or cls.opportunity, status or cls.status, filters)
+
+    @property
+    def spec(self) -> str:
+        spec = f"{self.opportunity}:{self.status}"
+        if self.filters:
+            spec += ":" + "&".join(f"{k}={v}" for k, v in self.filters)
+        return spec
+
+    def params(self, page: int, per_page: int) -> Dict[str, Any]:
+        """Query parameters for one page of this listing."""
+        params = {"opportunity": self.opportunity, "page": page, "per_page": per_page,
+                  "oppstatus": self.status}
+        params.update(self.filters)
+        return params
+
+    def headers(self) -> Dict[str, str]:
+        """Request headers, with the listing page the browser would send as Referer."""
+        return {**HEADERS, "Referer": f"{SITE_URL}/{self.opportunity}?oppstatus={self.status}"}
+
+
+DEFAULT_TARGET = CrawlTarget()
+
+
+@dataclass
+class FetchConfig:
+    """Settings for the fetch engine."""
+    concurrency: int = MAX_CONCURRENCY
+    timeout: float = REQUEST_TIMEOUT
+    max_retries: int = MAX_RETRIES
+    backoff_base: float = BACKOFF_BASE
+    backoff_max: float = BACKOFF_MAX
+    per_page: int = PER_PAGE
+    base_url: str = BASE_URL
+    target: CrawlTarget = DEFAULT_TARGET
+    trace_configs: List[aiohttp.TraceConfig] = field(default_factory=list)
+    metrics: Optional[ScrapeMetrics] = None  # Per-request instrumentation, when set
+    limiter: Optional[AdaptiveLimiter] = None  # AIMD limit below ``concurrency``, when set
+    rate_limiter: Optional[RateLimiter] = None  # Ceiling on request starts per second, when set
+    cache: Optional[ResponseCache] = None  # Persistent response cache, when set
+    page_sizes: Tuple[int, ...] = ()  # per_page values to probe on page 1 (empty: use per_page)
+
+
+class RetryableStatus(Exception):
+    """Upstream answered with a status worth retrying (5xx/429)."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class IncompleteScrapeError(Exception):
+    """Some pages still failed after every retry."""
 
-async def fetch_page(session: aiohttp.ClientSession, page: int) -> Dict[str, Any]:
+    def __init__(self, failed_pages: Dict[Any, str], competitions: List[Dict[str, Any]]):
+        super().__init__(f"{len(failed_pages)} page(s) could not be fetched")
+        self.failed_pages = failed_pages
+        self.competitions = competitions
+
+
+# Async callback receiving (page number, decoded response) for each fetched page
+PageHandler = Callable[[int, Dict[str, Any]], Awaitable[None]]
+# Async callback receiving (work unit, decoded response) for each unit fetched from a queue
+UnitHandler = Callable[[WorkUnit, Dict[str, Any]], Awaitable[None]]
+
+
+def make_session(config: FetchConfig) -> aiohttp.ClientSession:
+    """Create a session with a pooled keep-alive connector and request timeouts."""
+    connector = aiohttp.TCPConnector(
+        limit=config.concurrency,
+        limit_per_host=config.concurrency,
+        keepalive_timeout=60,
+        ttl_dns_cache=300,
+    )
+    timeout = aiohttp.ClientTimeout(total=config.timeout)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                 trace_configs=config.trace_configs or None)
+
+
+def backoff_delay(attempt: int, config: FetchConfig, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter, honouring Retry-After when given."""
+    if retry_after is not None:
+        return min(retry_after, config.backoff_max)
+    return random.uniform(0, min(config.backoff_max, config.backoff_base * 2 ** attempt))
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+def build_params(page: int, per_page: int = PER_PAGE,
+                 target: CrawlTarget = DEFAULT_TARGET) -> Dict[str, Any]:
+    """Query parameters for one page of the search endpoint."""
+    return target.params(page, per_page)
+
+
+@profiled('fetch')
+async def fetch_json(session: aiohttp.ClientSession, params: Dict[str, Any],
+                     config: FetchConfig, url: Optional[str] = None) -> Dict[str, Any]:
+    """GET the search endpoint (or ``url``), retrying timeouts, 5xx and 429 with backoff.
+
+    Every attempt is recorded in ``config.metrics`` when it is set. With a
+    ``config.limiter`` each attempt (but not the backoff sleep) holds a slot,
+    and its outcome is fed back to the limiter. With a ``config.cache`` a
+    replayable entry skips the network, other entries are revalidated with
+    conditional headers, and successful responses are stored.
+    """
+    limiter = config.limiter
+    headers = config.target.headers()
+    cache, key, entry = config.cache, None, None
+    if cache is not None:
+        key = cache.key(url or config.base_url, params)
+        entry = cache.lookup(key)
+        if entry is not None and cache.replayable(entry):
+            with stage('decode'):
+                return json.loads(cache.replay(entry))
+        if cache.offline:
+            raise CacheMiss(key)
+        if entry is not None:
+            headers.update(entry.validators())
+    for attempt in range(config.max_retries + 1):
+        sample = RequestSample(page=params.get("page"), status=None, attempt=attempt)
+        start = time.perf_counter()
+        try:
+            if config.rate_limiter is not None:
+                await config.rate_limiter.wait()
+            async with limiter or contextlib.nullcontext():
+                start = time.perf_counter()  # Time the request, not the wait for a slot
+                async with session.get(url or config.base_url, params=params, headers=headers) as response:
+                    sample.status = response.status
+                    sample.ttfb = time.perf_counter() - start
+                    if response.status in RETRY_STATUSES:
+                        raise RetryableStatus(response.status,
+                                              _parse_retry_after(response.headers.get("Retry-After")))
+                    response.raise_for_status()
+                    not_modified = response.status == 304 and entry is not None
+                    body = entry.body if not_modified else await response.read()
+                    validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                sample.latency = time.perf_counter() - start
+            if limiter is not None:
+                limiter.on_success(sample.latency)
+            sample.size = 0 if not_modified else len(body)
+            decode_start = time.perf_counter()
+            with stage('decode'):
+                data = json.loads(body)
+            sample.decode = time.perf_counter() - decode_start
+            if not_modified:
+                cache.revalidated(key, entry)
+            elif cache is not None:
+                cache.store(key, body, *validators)
+            return data
+        except aiohttp.ClientResponseError as exc:
+            sample.error = type(exc).__name__
+            raise  # 4xx other than 429 will not get better by retrying
+        except (RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            sample.error = type(exc).__name__
+            if sample.latency is None:
+                sample.latency = time.perf_counter() - start
+            if limiter is not None and not isinstance(exc, ValueError):
+                if getattr(exc, "status", None) == 429:
+                    limiter.on_throttle(exc.retry_after)
+                else:
+                    limiter.on_error()
+            if attempt == config.max_retries:
+                raise
+            delay = backoff_delay(attempt, config, getattr(exc, "retry_after", None))
+            print(f"Retrying page {params.get('page')} in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{config.max_retries}): {exc!r}")
+            await asyncio.sleep(delay)
+        finally:
+            if config.metrics is not None:
+                if sample.latency is None:
+                    sample.latency = time.perf_counter() - start
+                config.metrics.observe(sample)
+
+
+async def fetch_page(session: aiohttp.ClientSession, page: int,
+                     config: FetchConfig) -> Dict[str, Any]:
     """Fetch a single page of competitions."""
-    params = {
-        "opportunity": "competitions",
-        "page": page,
-        "per_page": PER_PAGE,
-        "oppstatus": "open"
-    }
-
-    async with session.get(BASE_URL, params=params, headers=HEADERS) as response:
-        data = await response.json()
-        print(f"Fetched page {page} - Status: {response.status}")
-        return data
-
-
-async def get_total_pages(session: aiohttp.ClientSession) -> int:
-    """Get total number of pages available."""
-    params = {
-        "opportunity": "competitions",
-        "page": 1,
-        "per_page": PER_PAGE,
-        "oppstatus": "open"
-    }
-
-    async with session.get(BASE_URL, params=params, headers=HEADERS) as response:
-        data = await response.json()
-        total = data.get("data", {}).get("total", 0)
-        total_pages = (total + PER_PAGE - 1) // PER_PAGE
-        print(f"Total competitions: {total}, Total pages: {total_pages}")
-        return total_pages, data
-
-
-async def fetch_all_competitions() -> List[Dict[str, Any]]:
-    """Fetch all competitions concurrently."""
-    all_competitions = []
+    data = await fetch_json(session, build_params(page, config.per_page, config.target), config)
+    print(f"Fetched page {page}")
+    return data
+
+
+async def get_total_pages(session: aiohttp.ClientSession, config: FetchConfig,
+                          data: Optional[Dict[str, Any]] = None):
+    """Get total number of pages available, from ``data`` if page 1 is already fetched."""
+    if data is None:
+        data = await fetch_json(session, build_params(1, config.per_page, config.target), config)
+    total = data.get("data", {}).get("total", 0)
+    total_pages = (total + config.per_page - 1) // config.per_page
+    print(f"Total {config.target.opportunity}: {total}, Total pages: {total_pages}")
+    return total_pages, data
+
+
+async def fetch_first_page(session: aiohttp.ClientSession, config: FetchConfig,
+                           data: Optional[Dict[str, Any]] = None):
+    """``get_total_pages``, giving page 1 the same final sequential retry as other pages."""
+    try:
+        return await get_total_pages(session, config, data)
+    except (RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+        print(f"Retrying page 1: {exc!r}")
+    return await get_total_pages(session, config)
 
-    async with aiohttp.ClientSession() as session:
-        # First get total pages and first page data
-        total_pages, first_page_data = await get_total_pages(session)
 
-        # Extract first page competitions
-        first_page_competitions = first_page_data.get("data", {}).get("data", [])
-        all_competitions.extend(first_page_competitions)
+def page_items(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Competitions contained in one page response."""
+    return data.get("data", {}).get("data", [])
 
-        # Fetch remaining pages concurrently
-        if total_pages > 1:
-            tasks = [fetch_page(session, page) for page in range(2, total_pages + 1)]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
 
-            for result in results:
-                if isinstance(result, Exception):
-                    print(f"Error fetching page: {result}")
-                    continue
-                competitions = result.get("data", {}).get("data", [])
-                all_competitions.extend(competitions)
+async def probe_page_size(session: aiohttp.ClientSession,
+                          config: FetchConfig) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """Pick the largest of ``config.page_sizes`` the API serves within the timeout.
 
+    Candidates are tried for page 1, largest first, without retries: a
+    timeout, 5xx or rejection moves on to the next smaller size, while a 429
+    backs off and tries the same size again. An API that silently clamps
+    ``per_page`` is detected from the number of items it returns. Returns the
+    chosen size and its page-1 response (``None`` if every candidate failed).
+    """
+    probe = replace(config, max_retries=0)
+    for size in sorted(set(config.page_sizes), reverse=True):
+        data, error, throttled = None, None, 0
+        while data is None:
+            try:
+                data = await fetch_json(session, build_params(1, size, config.target), probe)
+            except RetryableStatus as exc:
+                error = exc
+                if exc.status != 429 or throttled == config.max_retries:
+                    break
+                await asyncio.sleep(backoff_delay(throttled, config, exc.retry_after))
+                throttled += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, CacheMiss) as exc:
+                error = exc
+                break
+        if data is None:
+            print(f"per_page={size} not usable: {error!r}")
+            continue
+        served = len(page_items(data))
+        if 0 < served < min(size, data.get("data", {}).get("total", 0)):
+            print(f"API clamps per_page={size} to {served}")
+            size = served
+        print(f"Using per_page={size}")
+        return size, data
+    return config.per_page, None
+
+
+async def fetch_pages(session: aiohttp.ClientSession, pages: Iterable[int], config: FetchConfig,
+                      on_page: Optional[PageHandler] = None):
+    """Fetch pages with at most ``config.concurrency`` requests in flight.
+
+    With a ``config.limiter`` the pool is sized for ``config.concurrency``
+    and the limiter decides how many of those requests actually run.
+
+    Returns ``(results, failed)`` where ``results`` maps page -> response data
+    and ``failed`` maps page -> the last error seen for it. When ``on_page`` is
+    given each response is handed to it instead and ``results`` stays empty.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for page in pages:
+        queue.put_nowait(page)
+    results: Dict[int, Dict[str, Any]] = {}
+    failed: Dict[int, str] = {}
+
+    async def worker():
+        while True:
+            try:
+                page = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                data = await fetch_page(session, page, config)
+            except Exception as exc:
+                failed[page] = repr(exc)
+                continue
+            if on_page is None:
+                results[page] = data
+            else:
+                await on_page(page, data)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, config.concurrency))))
+    return results, failed
+
+
+async def crawl_pages(config: FetchConfig, on_page: PageHandler) -> Dict[int, str]:
+    """Fetch every page, handing each response to ``on_page`` as it arrives.
+
+    Pages that fail after their retries get one more sequential sweep.
+    Returns the pages that still failed, mapped to their last error; when
+    page 1 fails nothing else can be fetched and it is the only entry.
+    """
+    async with make_session(config) as session:
+        # First get total pages and first page data, settling the page size
+        first_page_data = None
+        if config.page_sizes:
+            per_page, first_page_data = await probe_page_size(session, config)
+            config = replace(config, per_page=per_page)
+        try:
+            total_pages, first_page_data = await fetch_first_page(session, config, first_page_data)
+        except (RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            return {1: repr(exc)}
+        await on_page(1, first_page_data)
+        del first_page_data
+
+        # Fetch remaining pages through the worker pool
+        _, failed = await fetch_pages(session, range(2, total_pages + 1), config, on_page=on_page)
+
+        # Final sweep over pages that exhausted their retries
+        if failed:
+            print(f"Retrying {len(failed)} failed page(s): {sorted(failed)}")
+            retry_config = replace(config, concurrency=1)
+            _, failed = await fetch_pages(session, sorted(failed), retry_config, on_page=on_page)
+    return failed
+
+
+@profiled('crawl')
+async def fetch_all_competitions(config: Optional[FetchConfig] = None) -> List[Dict[str, Any]]:
+    """Fetch all competitions with bounded concurrency.
+
+    If any page still fails after the final sweep, ``IncompleteScrapeError``
+    is raised so a partial dataset is never mistaken for a complete one.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+
+    async def collect(page: int, data: Dict[str, Any]):
+        results[page] = data
+
+    failed = await crawl_pages(config or FetchConfig(), collect)
+
+    all_competitions = []
+    for page in sorted(results):
+        all_competitions.extend(page_items(results[page]))
+
+    if failed:
+        raise IncompleteScrapeError(failed, all_competitions)
     return all_competitions
 
 
+async def plan_crawl(queue: WorkQueue, targets: Iterable[CrawlTarget],
+                     config: Optional[FetchConfig] = None) -> int:
+    """Expand crawl targets into one work unit per page and add them to ``queue``.
+
+    Page 1 of every target is fetched, concurrently, to learn its page count
+    (and its page size when ``config.page_sizes`` is set). Returns the number
+    of units added; pages already in the queue are not added twice. If page 1
+    of any target cannot be fetched, ``IncompleteScrapeError`` is raised after
+    the other targets are planned.
+    """
+    config = config or FetchConfig()
+    failed: Dict[str, str] = {}
+
+    async def plan(session: aiohttp.ClientSession, target: CrawlTarget) -> int:
+        target_config = replace(config, target=target)
+        data = None
+        if config.page_sizes:
+            per_page, data = await probe_page_size(session, target_config)
+            target_config = replace(target_config, per_page=per_page)
+        try:
+            total_pages, _ = await fetch_first_page(session, target_config, data)
+        except (RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            failed[f"{target.spec}#1"] = repr(exc)
+            return 0
+        added = queue.add(target.spec, range(1, total_pages + 1), target_config.per_page)
+        print(f"Planned {target.spec}: {total_pages} page(s), {added} new")
+        return added
+
+    async with make_session(config) as session:
+        added = sum(await asyncio.gather(*(plan(session, target) for target in targets)))
+    if failed:
+        raise IncompleteScrapeError(failed, [])
+    return added
+
+
+async def work_queue(queue: WorkQueue, config: Optional[FetchConfig] = None,
+                     on_unit: Optional[UnitHandler] = None, owner: Optional[str] = None) -> Dict[str, int]:
+    """Fetch units leased from ``queue`` over one connection pool until none are left.
+
+    Each of ``config.concurrency`` workers leases one unit at a time, so any
+    number of processes can work the same queue file. A unit whose fetch
+    still fails after its retries goes back to the queue until it runs out of
+    attempts. Returns the queue's counts per state.
+    """
+    config = config or FetchConfig()
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    target_configs: Dict[str, FetchConfig] = {}
+
+    async def worker():
+        while True:
+            units = queue.lease(owner)
+            if not units:
+                return
+            unit = units[0]
+            unit_config = target_configs.get(unit.target)
+            if unit_config is None:
+                unit_config = replace(config, target=CrawlTarget.parse(unit.target))
+                target_configs[unit.target] = unit_config
+            params = build_params(unit.page, unit.per_page, unit_config.target)
+            try:
+                data = await fetch_json(session, params, unit_config)
+            except Exception as exc:
+                state = queue.fail(unit, repr(exc))
+                print(f"{unit.target} page {unit.page} failed, now {state}: {exc!r}")
+                continue
+            if on_unit is not None:
+                await on_unit(unit, data)
+            queue.complete(unit)
+            print(f"Fetched {unit.target} page {unit.page}")
+
+    async with make_session(config) as session:
+        await asyncio.gather(*(worker() for _ in range(max(1, config.concurrency))))
+    return queue.counts()
+
+
+def detail_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The competition object inside a detail response."""
+    body = data.get("data") or {}
+    return body.get("competition") or body
+
+
+@profiled('enrich')
+async def enrich_details(store: CompetitionStore, competitions: Iterable[Dict[str, Any]],
+                         config: Optional[FetchConfig] = None, url: str = DETAIL_URL) -> Dict[str, int]:
+    """Fetch detail records for ``competitions`` into the store's detail cache.
+
+    Ids are deduplicated, and an id whose cached detail was fetched for the
+    same listing ``updated_at`` is skipped. The rest are fetched from ``url``
+    by ``config.concurrency`` workers (at most ``config.rate_limiter``'s
+    rate) and cached in batches, so an interrupted run keeps its progress.
+    """
+    config = config or FetchConfig()
+    wanted: Dict[int, Optional[str]] = {}
+    for record in competitions:
+        comp_id = record.get("id")
+        if comp_id is not None and comp_id not in wanted:
+            wanted[comp_id] = record.get("updated_at")
+    cached = store.detail_versions()
+    queue: asyncio.Queue = asyncio.Queue()
+    for comp_id, updated_at in wanted.items():
+        if comp_id not in cached or cached[comp_id] != updated_at:
+            queue.put_nowait((comp_id, updated_at))
+    stale = queue.qsize()
+    print(f"Details: {len(wanted)} competitions, {len(wanted) - stale} cached, fetching {stale}")
+
+    batch: List[Tuple[int, Optional[str], Dict[str, Any]]] = []
+    failed: Dict[int, str] = {}
+
+    async def worker():
+        while True:
+            try:
+                comp_id, updated_at = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                data = await fetch_json(session, {}, config, url.format(id=comp_id))
+            except Exception as exc:
+                failed[comp_id] = repr(exc)
+                continue
+            batch.append((comp_id, updated_at, detail_record(data)))
+            if len(batch) >= DETAIL_SAVE_BATCH:
+                store.save_details(batch)
+                batch.clear()
+
+    async with make_session(config) as session:
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, config.concurrency))))
+        finally:
+            store.save_details(batch)
+
+    if failed:
+        print(f"Details: {len(failed)} could not be fetched, e.g. "
+              f"{', '.join(f'{i}: {e}' for i, e in list(failed.items())[:3])}")
+    return {"cached": len(wanted) - stale, "fetched": stale - len(failed), "failed": len(failed)}
+
+
+def merge_details(competitions: List[Dict[str, Any]],
+                  details: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Listing records with their cached detail fields merged in (see ``merge_detail``)."""
+    return [merge_detail(record, details[record["id"]]) if record.get("id") in details else record
+            for record in competitions]
+
+
+Path = Tuple[str, ...]
+
+
 def flatten_dict(d: Dict, parent_key: str = '', sep: str = '_') -> Dict:
-    """Flatten nested dictionaries."""
-    items = []
-    for k, v in d.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(flatten_dict(v, new_key, sep).items())
-        elif isinstance(v, list):
-            items.append((new_key, json.dumps(v, ensure_ascii=False)))
-        else:
-            items.append((new_key, v))
-    return dict(items)
-
-
-def save_to_csv(competitions: List[Dict[str, Any]], filename: str = "competitions.csv"):
-    """Save competitions to CSV file."""
-    if not competitions:
-        print("No competitions to save")
-        return
+    """Flatten nested dictionaries (iteratively; lists become JSON strings)."""
+    flat = {}
+    stack = [(parent_key, d)]
+    while stack:
+        prefix, node = stack.pop()
+        for k, v in node.items():
+            new_key = f"{prefix}{sep}{k}" if prefix else k
+            if isinstance(v, dict):
+                stack.append((new_key, v))
+            elif isinstance(v, list):
+                flat[new_key] = json.dumps(v, ensure_ascii=False)
+            else:
+                flat[new_key] = v
+    return flat
+
+
+def order_columns(keys: Iterable[str]) -> List[str]:
+    """Sort keys for consistent column order, prioritizing important fields."""
+    keys = set(keys)
+    ordered = [k for k in PRIORITY_FIELDS if k in keys]
+    ordered += sorted(k for k in keys if k not in PRIORITY_FIELDS)
+    return ordered
+
+
+class UnknownColumnsError(ValueError):
+    """``columns`` names CSV columns the schema does not have."""
+
+    def __init__(self, unknown: List[str], available: List[str]):
+        super().__init__(f"Unknown columns: {unknown}")
+        self.unknown = unknown
+        self.available = available
+
+
+class FlatSchema:
+    """The set of key paths that flatten to CSV columns.
+
+    A path is a leaf wherever some record holds a non-dict value there, so a
+    key that is ``None`` in one record and a dict in another (e.g.
+    ``festival``) yields both a ``festival`` column and ``festival_*`` ones,
+    exactly like ``flatten_dict``. Infer it once (from all records or a
+    sample), optionally save it, then ``compile()`` a flattener from it.
+    """
+
+    def __init__(self, paths: Iterable[Path] = ()):
+        self.paths: Dict[Path, None] = {}
+        self._leaves: Dict[Path, set] = {}  # prefix -> leaf keys seen under it
+        for path in paths:
+            self._add(tuple(path))
+
+    def _add(self, path: Path) -> None:
+        self.paths[path] = None
+        self._leaves.setdefault(path[:-1], set()).add(path[-1])
+
+    def update(self, records: Iterable[Dict[str, Any]]) -> List[Path]:
+        """Add the leaf paths found in ``records``; returns the new ones."""
+        added = []
+        leaves = self._leaves
+        for record in records:
+            stack = [((), record)]
+            while stack:
+                prefix, node = stack.pop()
+                known = leaves.get(prefix, ())
+                for k, v in node.items():
+                    if type(v) is dict:
+                        stack.append((prefix + (k,), v))
+                    elif k not in known:
+                        self._add(prefix + (k,))
+                        added.append(prefix + (k,))
+                        known = leaves[prefix]
+        return added
+
+    @classmethod
+    @profiled('schema_infer')
+    def infer(cls, records: Iterable[Dict[str, Any]]) -> "FlatSchema":
+        schema = cls()
+        schema.update(records)
+        return schema
+
+    @classmethod
+    def load(cls, filename: str) -> "FlatSchema":
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def save(self, filename: str) -> None:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump([list(p) for p in self.paths], f, indent=1, ensure_ascii=False)
+
+    def columns(self, sep: str = '_') -> List[str]:
+        return order_columns(sep.join(p) for p in self.paths)
 
-    # Flatten all competitions
-    flattened = [flatten_dict(c) for c in competitions]
+    def check_columns(self, columns: Iterable[str], sep: str = '_') -> None:
+        """Raise ``UnknownColumnsError`` unless every name in ``columns`` is a column."""
+        all_columns = self.columns(sep)
+        unknown = sorted(set(columns) - set(all_columns))
+        if unknown:
+            raise UnknownColumnsError(unknown, all_columns)
 
-    # Get all unique keys
-    all_keys = set()
-    for comp in flattened:
-        all_keys.update(comp.keys())
+    def compile(self, columns: Optional[List[str]] = None, sep: str = '_'):
+        """Build a flattener for this schema.
 
-    # Sort keys for consistent column order, prioritizing important fields
-    priority_fields = ['id', 'title', 'seo_url', 'public_url', 'type', 'subtype',
-                       'status', 'registerCount', 'viewsCount', 'end_date']
-    sorted_keys = [k for k in priority_fields if k in all_keys]
-    sorted_keys += sorted([k for k in all_keys if k not in priority_fields])
+        Returns ``(columns, flatten)`` where ``flatten(record)`` returns a list
+        of values aligned with ``columns``. ``columns`` projects the output to
+        a subset of the schema's columns. The flattener is generated Python
+        code with one ``.get`` per schema node, so flattening a record does no
+        recursion and builds no intermediate dicts.
+        """
+        if columns is None:
+            columns = self.columns(sep)
+        self.check_columns(columns, sep)
+        index = {name: i for i, name in enumerate(columns)}
 
+        # Trie of path segments: key -> [column index or None, children]
+        trie: Dict[str, list] = {}
+        for path in self.paths:
+            col = index.get(sep.join(path))
+            if col is None:
+                continue
+            node = trie
+            for key in path[:-1]:
+                node = node.setdefault(key, [None, {}])[1]
+            node.setdefault(path[-1], [None, {}])[0] = col
+
+        lines = ["def flatten(r):", f"    row = [None] * {len(columns)}"]
+
+        def emit(node: Dict[str, list], container: str, depth: int, indent: str):
+            var = f"v{depth}"
+            for key, (col, children) in node.items():
+                lines.append(f"{indent}{var} = {container}.get({key!r})")
+                if children:
+                    lines.append(f"{indent}if type({var}) is dict:")
+                    emit(children, var, depth + 1, indent + "    ")
+                    if col is None:
+                        continue
+                    lines.append(f"{indent}else:")
+                    leaf_indent = indent + "    "
+                else:
+                    leaf_indent = indent
+                lines.append(f"{leaf_indent}if type({var}) is list or type({var}) is dict:")
+                lines.append(f"{leaf_indent}    {var} = dumps({var})")
+                lines.append(f"{leaf_indent}row[{col}] = {var}")
+
+        emit(trie, "r", 0, "    ")
+        lines.append("    return row")
+        namespace = {'dumps': json.JSONEncoder(ensure_ascii=False, check_circular=False).encode}
+        exec(compile("\n".join(lines), "<flatten>", "exec"), namespace)
+        return list(columns), namespace['flatten']
+
+
+@profiled('csv_write')
+def write_csv(competitions: Iterable[Dict[str, Any]], filename: str, schema: FlatSchema,
+              columns: Optional[List[str]] = None) -> int:
+    """Flatten and write records in one streaming pass; returns the row count."""
+    names, flatten = schema.compile(columns)
+    flatten = timed(flatten, 'flatten')
+    count = 0
     with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=sorted_keys, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(flattened)
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for competition in competitions:
+            writer.writerow(flatten(competition))
+            count += 1
+    return count
+
+
+def save_to_csv(competitions: List[Dict[str, Any]], filename: str = "competitions.csv",
+                schema: Optional[FlatSchema] = None, columns: Optional[List[str]] = None):
+    """Save competitions to CSV file.
+
+    Without a ``schema`` one is inferred from the records first (a walk over
+    keys only); ``columns`` limits the output to the named columns.
+    """
+    if not competitions:
+        print("No competitions to save")
+        return
 
-    print(f"Saved {len(competitions)} competitions to {filename}")
+    schema = schema or FlatSchema.infer(competitions)
+    count = write_csv(competitions, filename, schema, columns)
+    print(f"Saved {count} competitions to {filename}")
 
 
+@profiled('json_write')
 def save_to_json(competitions: List[Dict[str, Any]], filename: str = "competitions.json"):
     """Save raw competitions data to JSON."""
     with open(filename, 'w', encoding='utf-8') as f:
@@ -121,25 +763,526 @@ def save_to_json(competitions: List[Dict[str, Any]], filename: str = "competitio
     print(f"Saved raw data to {filename}")
 
 
-async def main():
+class StreamWriter:
+    """Append pages of competitions to NDJSON and CSV files as they arrive.
+
+    Output goes to ``<name>.part`` files that are renamed into place by
+    ``commit()``, so an interrupted run never clobbers the previous output.
+    CSV columns come from ``schema`` or, if none is given, from the first
+    page written; columns that only show up later are reported (the NDJSON
+    file always keeps every field).
+    """
+
+    def __init__(self, ndjson_path: str = "competitions.ndjson", csv_path: str = "competitions.csv",
+                 schema: Optional[FlatSchema] = None, columns: Optional[List[str]] = None,
+                 snapshot_path: Optional[str] = None, history: Optional[HistoryRecorder] = None,
+                 blobs: Optional[BlobSplitter] = None):
+        if schema is not None and columns is not None:
+            schema.check_columns(columns)  # before any file is opened
+        self.ndjson_path = ndjson_path
+        self.history = history
+        self.blobs = blobs
+        self.csv_path = csv_path
+        self._snapshot = SnapshotWriter(snapshot_path) if snapshot_path else None
+        self._ndjson = open(ndjson_path + ".part", 'w', encoding='utf-8')
+        self._csv = open(csv_path + ".part", 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._csv)
+        self.schema = schema
+        self.columns: Optional[List[str]] = columns
+        self._projected = columns is not None
+        self._flatten = None
+        self.dropped_columns: set = set()
+        self.count = 0
+
+    @profiled('write_page')
+    def write_page(self, competitions: List[Dict[str, Any]]) -> None:
+        for competition in competitions:
+            add_derived(competition)
+        if self.blobs is not None:
+            competitions = self.blobs.split_list(competitions)
+        if self._flatten is None:
+            if self.schema is None:
+                self.schema = FlatSchema.infer(competitions)
+            self.columns, self._flatten = self.schema.compile(self.columns)
+            self._writer.writerow(self.columns)
+        elif not self._projected:
+            for path in self.schema.update(competitions):
+                self.dropped_columns.add('_'.join(path))
+        flatten = timed(self._flatten, 'flatten')
+        for competition in competitions:
+            self._ndjson.write(json.dumps(competition, ensure_ascii=False))
+            self._ndjson.write('\n')
+            self._writer.writerow(flatten(competition))
+        if self._snapshot is not None:
+            self._snapshot.write_many(competitions)
+        if self.history is not None:
+            self.history.add(competitions)
+        self.count += len(competitions)
+
+    def _close_files(self) -> None:
+        self._ndjson.close()
+        self._csv.close()
+
+    def close(self) -> None:
+        """Abandon the output: close and delete the ``.part`` files."""
+        self._close_files()
+        if self._snapshot is not None:
+            self._snapshot.abort()
+        for path in (self.ndjson_path + ".part", self.csv_path + ".part"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def commit(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._close_files()
+        os.replace(self.ndjson_path + ".part", self.ndjson_path)
+        os.replace(self.csv_path + ".part", self.csv_path)
+        print(f"Streamed {self.count} competitions to {self.ndjson_path} and {self.csv_path}")
+        if self.dropped_columns:
+            print(f"Note: {len(self.dropped_columns)} column(s) missing from the CSV schema are only "
+                  f"in {self.ndjson_path}: {sorted(self.dropped_columns)[:10]}")
+
+
+@profiled('crawl')
+async def stream_all_competitions(config: Optional[FetchConfig] = None,
+                                  writer: Optional[StreamWriter] = None) -> int:
+    """Fetch all competitions, writing each page to disk as soon as it arrives.
+
+    Fetch workers hand pages to a single writer task through a bounded queue;
+    the writer does its file I/O in a thread so disk writes overlap with the
+    requests still in flight. Returns the number of competitions written.
+    """
+    config = config or FetchConfig()
+    writer = writer or StreamWriter()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_PAGES)
+
+    async def drain():
+        while True:
+            items = await queue.get()
+            if items is None:
+                return
+            await asyncio.to_thread(writer.write_page, items)
+
+    async def enqueue(page: int, data: Dict[str, Any]):
+        put = asyncio.ensure_future(queue.put(page_items(data)))
+        await asyncio.wait({put, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+        if writer_task.done():  # a failed writer must not leave fetchers blocked on a full queue
+            put.cancel()
+            writer_task.result()
+
+    writer_task = asyncio.create_task(drain())
+    try:
+        failed = await crawl_pages(config, enqueue)
+        await queue.put(None)
+        await writer_task
+    except BaseException:
+        writer_task.cancel()
+        writer.close()
+        raise
+
+    if failed:
+        writer.close()
+        raise IncompleteScrapeError(failed, [])
+    writer.commit()
+    return writer.count
+
+
+@profiled('crawl')
+async def sync_to_store(store: CompetitionStore, config: Optional[FetchConfig] = None) -> Dict[str, int]:
+    """Fetch all competitions and upsert them page by page into ``store``.
+
+    Only a complete scrape marks missing competitions as removed, and only
+    those of the crawled listing (``config.target``).
+    """
+    config = config or FetchConfig()
+    target = config.target.spec
+    store.begin_run()
+
+    async def upsert(page: int, data: Dict[str, Any]):
+        store.upsert(page_items(data), target)
+
+    try:
+        failed = await crawl_pages(config, upsert)
+    except BaseException:
+        store.finish_run(complete=False)
+        raise
+    counts = store.finish_run(complete=not failed, targets=[target])
+    print(f"Run {store.run_id}: {counts['inserted']} inserted, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+    if failed:
+        raise IncompleteScrapeError(failed, [])
+    return counts
+
+
+@profiled('crawl')
+async def sync_queue_to_store(store: CompetitionStore, queue: WorkQueue,
+                              config: Optional[FetchConfig] = None,
+                              targets: Optional[List[CrawlTarget]] = None) -> Dict[str, int]:
+    """Work ``queue`` and upsert every fetched page into ``store``.
+
+    A worker of a shared queue only sees part of the catalog, so removals are
+    only recorded when ``targets`` is given, meaning this process planned
+    them and is the queue's only worker, and every unit was fetched. They are
+    scoped to those listings.
+    """
+    store.begin_run()
+
+    async def upsert(unit: WorkUnit, data: Dict[str, Any]):
+        store.upsert(page_items(data), unit.target)
+
+    units = None
+    try:
+        units = await work_queue(queue, config, upsert)
+    finally:
+        complete = bool(targets) and units is not None and \
+            units['pending'] + units['leased'] + units['failed'] == 0
+        counts = store.finish_run(complete=complete,
+                                  targets=[target.spec for target in targets] if complete else None)
+    print(f"Run {store.run_id}: {counts['inserted']} inserted, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged" +
+          (f", {counts['removed']} removed" if complete else ""))
+    print(f"Queue: {units['done']} done, {units['pending'] + units['leased']} left to other "
+          f"workers, {units['failed']} failed")
+    failed = queue.failures()
+    if failed:
+        raise IncompleteScrapeError(failed, [])
+    return counts
+
+
+@profiled('export')
+def export_from_store(store: CompetitionStore, csv_path: str = "competitions.csv",
+                      json_path: str = "competitions.json", schema: Optional[FlatSchema] = None,
+                      columns: Optional[List[str]] = None,
+                      snapshot_path: Optional[str] = None,
+                      blobs: Optional[BlobSplitter] = None) -> FlatSchema:
+    """Regenerate the CSV and JSON exports from the store.
+
+    The CSV is streamed straight from the store; without a ``schema`` one is
+    inferred in an extra pass over the stored records first. Cached detail
+    records from ``--enrich`` runs are merged into their competitions. The
+    store keeps full records; ``blobs`` splits heavy fields out of the exports.
+    Rows stored before derived fields existed are derived on the way out.
+    """
+    def records():
+        rows = ensure_derived(store.iter_records(with_details=True))
+        return blobs.split(rows) if blobs is not None else rows
+
+    schema = schema or FlatSchema.infer(records())
+    count = write_csv(records(), csv_path, schema, columns)
+    print(f"Saved {count} competitions to {csv_path}")
+    save_to_json(list(records()), json_path)
+    if snapshot_path:
+        save_snapshot(records(), snapshot_path)
+    return schema
+
+
+@profiled('history')
+def record_history(competitions: Iterable[Dict[str, Any]], directory: str = DEFAULT_HISTORY):
+    """Append this run's registration and view counts to the metrics history."""
+    with MetricsHistory(directory) as history:
+        count = history.append(competitions)
+    print(f"Appended {count} competitions to the history in {directory}/")
+
+
+@profiled('index')
+def index_competitions(competitions: Iterable[Dict[str, Any]], path: str = DEFAULT_INDEX,
+                       blobs: Optional[BlobStore] = None):
+    """Rebuild the full-text and facet search index (see search_index.py)."""
+    counts = build_index(competitions, path, blobs)
+    print(f"Indexed {counts['docs']} competitions ({counts['terms']} terms) into {path}")
+
+
+@profiled('snapshot_write')
+def save_snapshot(competitions: Iterable[Dict[str, Any]], filename: str = "competitions.snap"):
+    """Save competitions to the compact columnar snapshot read by create_charts.py."""
+    count = write_snapshot(competitions, filename)
+    print(f"Saved {count} competitions to snapshot {filename}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape open competitions from unstop.com")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="search endpoint, e.g. a local mock_unstop_server.py (default: %(default)s)")
+    parser.add_argument("--per-page", type=int, default=PER_PAGE,
+                        help="competitions per request (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="maximum requests in flight (default: %(default)s)")
+    parser.add_argument("--target", dest="targets", action="append", type=CrawlTarget.parse,
+                        metavar="OPPORTUNITY:STATUS[:FILTERS]",
+                        help="listing to crawl into the --db store, e.g. hackathons:open, jobs:recent "
+                             "or competitions:closed:category=quiz; repeatable")
+    parser.add_argument("--queue", nargs="?", const=DEFAULT_QUEUE, metavar="PATH",
+                        help="SQLite work queue shared by crawl workers (default path: %(const)s); "
+                             "without --target, work an already planned queue")
+    parser.add_argument("--plan", action="store_true",
+                        help="with --target and --queue, only plan the pages into the queue")
+    parser.add_argument("--enrich", action="store_true",
+                        help="fetch each competition's detail record (cached in --db) and merge "
+                             "it into the output")
+    parser.add_argument("--detail-url", default=DETAIL_URL,
+                        help="detail endpoint, {id} is replaced (default: %(default)s)")
+    parser.add_argument("--rate", type=float,
+                        help=f"maximum requests per second (default: unlimited; {DETAIL_RATE:g} "
+                             f"for --enrich detail requests)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE, metavar="PATH",
+                        help="keep responses in a compressed on-disk cache and revalidate them with "
+                             "ETag/Last-Modified (default path: %(const)s)")
+    parser.add_argument("--cache-ttl", type=float, metavar="SECONDS",
+                        help="replay cached responses younger than this without any request")
+    parser.add_argument("--offline", action="store_true",
+                        help="serve everything from --cache (within --cache-ttl, if given); "
+                             "uncached requests fail")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="probe the largest accepted per_page and adapt requests in flight "
+                             "(starting at --concurrency) to throttling and latency")
+    parser.add_argument("--max-concurrency", type=int, default=ADAPTIVE_MAX_CONCURRENCY,
+                        help="upper bound on requests in flight with --adaptive (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                        help="per-request timeout in seconds (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help="retries per page on 5xx/429/timeouts (default: %(default)s)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write pages to NDJSON and CSV as they arrive instead of "
+                             "holding the whole dataset in memory")
+    parser.add_argument("--ndjson", default="competitions.ndjson",
+                        help="NDJSON output path for --stream (default: %(default)s)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="upsert into the SQLite store instead of rewriting the exports")
+    parser.add_argument("--db", default=DEFAULT_DB,
+                        help="SQLite store used by --incremental, --target and as the --enrich "
+                             "detail cache (default: %(default)s)")
+    parser.add_argument("--export", action="store_true",
+                        help="with --incremental, regenerate CSV/JSON from the store afterwards")
+    parser.add_argument("--export-only", action="store_true",
+                        help="regenerate CSV/JSON from the store without scraping")
+    parser.add_argument("--schema", metavar="PATH",
+                        help="CSV column schema file: used when it exists, (re)written after the run")
+    parser.add_argument("--columns", type=lambda s: [c for c in s.split(",") if c],
+                        help="comma-separated CSV columns to export (default: all)")
+    parser.add_argument("--metrics-dir", metavar="DIR",
+                        help="write per-request metrics as metrics.json and metrics.prom here")
+    add_profile_args(parser)
+    parser.add_argument("--history", default=DEFAULT_HISTORY, metavar="DIR",
+                        help="metrics history every complete scrape is appended to; queue workers "
+                             "(--queue without --target) do not append (default: %(default)s)")
+    parser.add_argument("--no-history", dest="history", action="store_const", const=None,
+                        help="do not append to the history")
+    parser.add_argument("--blobs", default=DEFAULT_BLOBS, metavar="PATH",
+                        help="compressed store the heavy HTML/text fields are moved to; exports keep "
+                             "\"blob:<id>/<field>\" references (default: %(default)s)")
+    parser.add_argument("--no-blobs", dest="blobs", action="store_const", const=None,
+                        help="keep heavy fields inline in the exports")
+    parser.add_argument("--blob-text", action="store_true",
+                        help="also store a cleaned plain-text version of each blob")
+    parser.add_argument("--index", nargs="?", const=DEFAULT_INDEX, metavar="PATH",
+                        help="rebuild the search index for search_index.py after the scrape "
+                             "(default path: %(const)s)")
+    parser.add_argument("--snapshot", default="competitions.snap",
+                        help="columnar snapshot written alongside the exports (default: %(default)s)")
+    parser.add_argument("--no-snapshot", dest="snapshot", action="store_const", const=None,
+                        help="do not write the snapshot")
+    args = parser.parse_args(argv)
+    if args.plan and not (args.targets and args.queue):
+        parser.error("--plan needs --target and --queue")
+    if (args.cache_ttl is not None or args.offline) and not args.cache:
+        args.cache = DEFAULT_CACHE
+    if args.blob_text and not args.blobs:
+        parser.error("--blob-text needs --blobs")
+    if args.enrich and args.stream:
+        parser.error("--enrich is not supported with --stream")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    config = FetchConfig(concurrency=args.concurrency, timeout=args.timeout,
+                         max_retries=args.retries, per_page=args.per_page, base_url=args.base_url,
+                         metrics=ScrapeMetrics() if args.metrics_dir else None,
+                         rate_limiter=RateLimiter(args.rate) if args.rate else None,
+                         cache=ResponseCache(args.cache, args.cache_ttl, args.offline) if args.cache else None)
+    if args.adaptive:
+        ceiling = max(args.concurrency, args.max_concurrency)
+        config = replace(config, concurrency=ceiling,
+                         limiter=AdaptiveLimiter(initial=args.concurrency, maximum=ceiling),
+                         page_sizes=tuple(sorted({args.per_page, *PAGE_SIZE_CANDIDATES})))
+    blobs = BlobSplitter(BlobStore(args.blobs), plain_text=args.blob_text) if args.blobs else None
+    profiler = StageProfiler.from_args(args, "scrape")
+    try:
+        with profiler or contextlib.nullcontext():
+            return await run(args, config, blobs)
+    finally:
+        if profiler is not None:
+            print(profiler.summary())
+            print(f"Saved profile to {', '.join(profiler.save())}")
+        if blobs is not None:
+            if blobs.referenced:
+                print(blobs.report())
+            blobs.store.close()
+        if config.limiter is not None:
+            print(config.limiter.report())
+        if config.cache is not None:
+            print(config.cache.report())
+            config.cache.close()
+        if config.metrics is not None:
+            export_metrics(config.metrics, args.metrics_dir)
+
+
+def export_metrics(metrics: ScrapeMetrics, directory: str) -> None:
+    """Write the run's metrics as a JSON summary and a Prometheus text file."""
+    os.makedirs(directory, exist_ok=True)
+    metrics.write_json(os.path.join(directory, "metrics.json"))
+    metrics.write_prometheus(os.path.join(directory, "metrics.prom"))
+    print(f"Metrics: {metrics.report()}")
+    print(f"Saved metrics to {directory}/metrics.json and {directory}/metrics.prom")
+
+
+async def run(args: argparse.Namespace, config: FetchConfig,
+              blobs: Optional[BlobSplitter] = None) -> int:
+
+    schema = FlatSchema.load(args.schema) if args.schema and os.path.exists(args.schema) else None
+
+    def keep_schema(used: Optional[FlatSchema]):
+        if args.schema and used is not None:
+            used.save(args.schema)
+
+    async def enrich(store: CompetitionStore, competitions: Iterable[Dict[str, Any]]):
+        detail_config = replace(config, rate_limiter=RateLimiter(args.rate or DETAIL_RATE))
+        await enrich_details(store, competitions, detail_config, args.detail_url)
+
+    def report_columns(exc: UnknownColumnsError):
+        print(f"{exc}. Available columns: {', '.join(exc.available)}")
+
+    if schema is not None and args.columns:
+        try:
+            schema.check_columns(args.columns)
+        except UnknownColumnsError as exc:
+            report_columns(exc)
+            return 1
+
     print("Starting async scrape of unstop.com competitions...")
     print("-" * 50)
 
-    competitions = await fetch_all_competitions()
+    if args.export_only:
+        with CompetitionStore(args.db) as store:
+            keep_schema(export_from_store(store, schema=schema, columns=args.columns,
+                                          snapshot_path=args.snapshot, blobs=blobs))
+        return 0
+
+    try:
+        if args.targets or args.queue:
+            with WorkQueue(args.queue or ":memory:") as queue:
+                if args.targets:
+                    added = await plan_crawl(queue, args.targets, config)
+                    print(f"Queued {added} page(s) from {len(args.targets)} target(s)")
+                if args.plan:
+                    return 0
+                with CompetitionStore(args.db) as store:
+                    # An in-memory queue planned here has no other workers
+                    await sync_queue_to_store(store, queue, config,
+                                              args.targets if not args.queue else None)
+                    if args.history and args.targets:
+                        record_history(store.iter_records(seen=True), args.history)
+                    if args.enrich:
+                        await enrich(store, store.iter_records())
+                    if args.index:
+                        index_competitions(store.iter_records(with_details=True), args.index)
+                    if args.export:
+                        keep_schema(export_from_store(store, schema=schema, columns=args.columns,
+                                                      snapshot_path=args.snapshot, blobs=blobs))
+            return 0
+        if args.incremental:
+            with CompetitionStore(args.db) as store:
+                await sync_to_store(store, config)
+                if args.history:
+                    record_history(store.iter_records(seen=True), args.history)
+                if args.enrich:
+                    await enrich(store, store.iter_records())
+                if args.index:
+                    index_competitions(store.iter_records(with_details=True), args.index)
+                if args.export:
+                    keep_schema(export_from_store(store, schema=schema, columns=args.columns,
+                                                  snapshot_path=args.snapshot, blobs=blobs))
+            return 0
+        if args.stream:
+            history = MetricsHistory(args.history) if args.history else None
+            writer = StreamWriter(args.ndjson, schema=schema, columns=args.columns,
+                                  snapshot_path=args.snapshot,
+                                  history=history.recorder() if history else None, blobs=blobs)
+            try:
+                count = await stream_all_competitions(config, writer)
+                if history is not None:
+                    print(f"Appended {writer.history.commit()} competitions to the history "
+                          f"in {args.history}/")
+            finally:
+                if history is not None:
+                    history.close()
+            keep_schema(writer.schema)
+            if args.index:
+                index_competitions(iter_competitions(args.ndjson), args.index,
+                                   blobs.store if blobs else None)
+            print("-" * 50)
+            print(f"Total competitions fetched: {count}")
+            return 0
+        competitions = await fetch_all_competitions(config)
+    except IncompleteScrapeError as exc:
+        print("-" * 50)
+        print(f"Scrape incomplete: {exc}. Existing output files were left untouched.")
+        for page, error in sorted(exc.failed_pages.items()):
+            print(f"  page {page}: {error}")
+        return 1
+    except CacheMiss as exc:
+        print(f"Offline and not in the cache: {exc}")
+        return 1
+    except UnknownColumnsError as exc:
+        # Store modes keep the crawl in --db (re-export with --export-only);
+        # --stream leaves the previous outputs in place
+        report_columns(exc)
+        return 1
 
     print("-" * 50)
     print(f"Total competitions fetched: {len(competitions)}")
+    if args.enrich:
+        with CompetitionStore(args.db) as store:
+            await enrich(store, competitions)
+            competitions = merge_details(competitions, store.details())
+    with stage('derive'):
+        competitions = [add_derived(competition) for competition in competitions]
+    if blobs is not None:
+        with stage('blob_split'):
+            competitions = blobs.split_list(competitions)
 
     # Save to both CSV and JSON
-    save_to_csv(competitions)
+    if competitions:
+        schema = schema or FlatSchema.infer(competitions)
+        keep_schema(schema)
+        if args.columns:
+            try:
+                schema.check_columns(args.columns)
+            except UnknownColumnsError as exc:
+                # Keep the crawl: write the JSON, but no CSV without its columns
+                save_to_json(competitions)
+                report_columns(exc)
+                return 1
+    save_to_csv(competitions, schema=schema, columns=args.columns)
     save_to_json(competitions)
+    if args.snapshot and competitions:
+        save_snapshot(competitions, args.snapshot)
+    if args.history and competitions:
+        record_history(competitions, args.history)
+    if args.index and competitions:
+        index_competitions(competitions, args.index, blobs.store if blobs else None)
 
     # Print sample of fields found
     if competitions:
         sample = competitions[0]
         print(f"\nSample competition: {sample.get('title', 'N/A')}")
         print(f"Fields available: {len(sample.keys())}")
+    return 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
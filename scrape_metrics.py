@@ -0,0 +1,167 @@
+"""Per-request metrics for the scraper, exported as JSON and Prometheus text.
+
+Every HTTP attempt made by ``scrape_competitions.fetch_json`` is recorded as
+a ``RequestSample``: time to first byte, total latency, response size, JSON
+decode time, status code and which retry it was. ``ScrapeMetrics``
+aggregates the samples into histograms and counters.
+"""
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+METRIC_PREFIX = "unstop_scrape"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DECODE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000, 10_000_000)
+
+
+@dataclass
+class RequestSample:
+    """Measurements of one HTTP attempt."""
+    page: Optional[int]
+    status: Optional[int]  # None when no response arrived (timeout, connection error)
+    ttfb: Optional[float] = None  # Seconds until response headers arrived
+    latency: Optional[float] = None  # Seconds until the body was read (or the attempt failed)
+    size: int = 0  # Response body bytes
+    decode: Optional[float] = None  # Seconds spent in json.loads
+    attempt: int = 0  # 0 for the first try, n for the n-th retry
+    error: Optional[str] = None  # Exception class name for failed attempts
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            if n and seen + n >= rank:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / n
+            seen += n
+            lower = bound if bound != float('inf') else lower
+        return lower
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p90': round(self.quantile(0.9), 6),
+            'p99': round(self.quantile(0.99), 6),
+            'buckets': {str(b): c for b, c in zip(self.buckets + ('+Inf',), self.counts)},
+        }
+
+    def prometheus(self, name: str, help_text: str) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum:.6f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class ScrapeMetrics:
+    """Histograms and counters for one scrape run."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.ttfb = Histogram(LATENCY_BUCKETS)
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.decode = Histogram(DECODE_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.requests_by_status: Dict[str, int] = {}
+        self.errors_by_type: Dict[str, int] = {}
+        self.retries = 0
+        self.bytes_total = 0
+
+    def observe(self, sample: RequestSample) -> None:
+        status = str(sample.status) if sample.status is not None else 'none'
+        self.requests_by_status[status] = self.requests_by_status.get(status, 0) + 1
+        if sample.attempt:
+            self.retries += 1
+        if sample.error:
+            self.errors_by_type[sample.error] = self.errors_by_type.get(sample.error, 0) + 1
+        if sample.ttfb is not None:
+            self.ttfb.observe(sample.ttfb)
+        if sample.latency is not None:
+            self.latency.observe(sample.latency)
+        if sample.decode is not None:
+            self.decode.observe(sample.decode)
+        if sample.size:
+            self.response_bytes.observe(sample.size)
+            self.bytes_total += sample.size
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.time() - self.started
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'requests_total': sum(self.requests_by_status.values()),
+            'requests_by_status': self.requests_by_status,
+            'retries_total': self.retries,
+            'errors_by_type': self.errors_by_type,
+            'response_bytes_total': self.bytes_total,
+            'ttfb_seconds': self.ttfb.to_dict(),
+            'latency_seconds': self.latency.to_dict(),
+            'decode_seconds': self.decode.to_dict(),
+            'response_bytes': self.response_bytes.to_dict(),
+        }
+
+    def write_json(self, filename: str) -> None:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def prometheus(self) -> str:
+        p = METRIC_PREFIX
+        lines = [f"# HELP {p}_requests_total HTTP attempts by status code",
+                 f"# TYPE {p}_requests_total counter"]
+        for status, n in sorted(self.requests_by_status.items()):
+            lines.append(f'{p}_requests_total{{status="{status}"}} {n}')
+        lines += [f"# HELP {p}_retries_total Attempts that were retries",
+                  f"# TYPE {p}_retries_total counter", f"{p}_retries_total {self.retries}",
+                  f"# HELP {p}_errors_total Failed attempts by exception type",
+                  f"# TYPE {p}_errors_total counter"]
+        for error, n in sorted(self.errors_by_type.items()):
+            lines.append(f'{p}_errors_total{{type="{error}"}} {n}')
+        lines += self.ttfb.prometheus(f"{p}_ttfb_seconds", "Time to response headers")
+        lines += self.latency.prometheus(f"{p}_request_duration_seconds", "Time to full response body")
+        lines += self.decode.prometheus(f"{p}_json_decode_seconds", "JSON decode time per response")
+        lines += self.response_bytes.prometheus(f"{p}_response_bytes", "Response body size")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filename: str) -> None:
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+
+    def report(self) -> str:
+        """One-line human summary printed at the end of a run."""
+        lat, ttfb, dec = self.latency, self.ttfb, self.decode
+        return (f"{sum(self.requests_by_status.values())} requests, {self.retries} retries, "
+                f"{self.bytes_total / 1e6:.1f} MB | latency p50 {lat.quantile(0.5) * 1000:.0f} ms "
+                f"p99 {lat.quantile(0.99) * 1000:.0f} ms | ttfb p50 {ttfb.quantile(0.5) * 1000:.0f} ms "
+                f"| decode total {dec.sum:.2f} s")
@@ -0,0 +1,406 @@
+"""Inverted full-text index and bitmap facet indexes over the competitions.
+
+``build_index`` writes one SQLite file (``competitions_index.db``):
+
+* ``terms``   per token, the rows containing it and a field-weighted term
+              frequency (title x3, skills and organisation x2, description x1)
+              as packed NumPy arrays
+* ``facets``  per facet value, a packed bitmap over the rows
+* ``docs``    id, title, organisation and registrations per row
+
+``SearchIndex.search`` answers a query by combining postings and bitmaps as
+boolean masks, so a lookup touches only the terms and facets it names::
+
+    ml hackathon region:online paid:false prize:cash iit*
+    "machine learning" OR ai -quiz category:Hackathon eligible:"Engineering Students"
+
+Bare words are ANDed, ``OR`` separates alternatives, ``-word``/``NOT word``
+excludes, ``word*`` matches a prefix and ``facet:value`` filters on one of
+``FACETS``. Matches are ranked by BM25, then by registrations.
+"""
+import argparse
+import math
+import os
+import re
+import shlex
+import sqlite3
+import sys
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from blob_store import DEFAULT_BLOBS, BlobStore, html_to_text, parse_ref
+from competition_table import iter_competitions, top_k
+from derived_fields import DERIVED_FIELDS, derived_view
+
+DEFAULT_INDEX = "competitions_index.db"
+INDEX_FIELDS = ('id', 'title', 'registerCount', 'organisation', 'required_skills', 'details',
+                'region', 'subtype', 'isPaid', 'filters', 'prizes') + DERIVED_FIELDS
+FIELD_WEIGHTS = {'title': 3, 'skills': 2, 'organisation': 2, 'description': 1}
+FACETS = ('region', 'subtype', 'paid', 'eligible', 'category', 'prize')
+MAX_PREFIX_TERMS = 512  # Most frequent expansions kept for one ``word*``
+BM25_K1, BM25_B = 1.2, 0.75
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has in is it its of on or the to was were will with'.split())
+_TOKEN = re.compile(r'[^\W_]+')
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE docs (
+    row INTEGER PRIMARY KEY,
+    id INTEGER,
+    title TEXT,
+    organisation TEXT,
+    registrations REAL NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL, rows BLOB NOT NULL, tf BLOB NOT NULL);
+CREATE TABLE facets (
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    bitmap BLOB NOT NULL,
+    PRIMARY KEY (facet, value)
+);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens without stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _description(record: Dict[str, Any], blobs: Optional[BlobStore]) -> str:
+    value = record.get('details')
+    ref = parse_ref(value)
+    if ref is not None:
+        if blobs is None:
+            return ''
+        text = blobs.get(*ref, text=True)
+        if text is not None:
+            return text
+        value = blobs.get(*ref)
+    return html_to_text(value) if isinstance(value, str) else ''
+
+
+def facet_values(record: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """``(facet, value)`` pairs of one record, values lower-cased."""
+    if record.get('region'):
+        yield 'region', str(record['region']).lower()
+    yield 'subtype', str(record.get('subtype') or 'other').lower()
+    d = derived_view(record)
+    yield 'paid', 'true' if d['derived_paid'] else 'false'
+    for name in d['derived_eligibility']:
+        yield 'eligible', name.lower()
+    for name in d['derived_categories']:
+        yield 'category', name.lower()
+    for kind in d['derived_prize_types']:
+        yield 'prize', kind
+
+
+def build_index(competitions: Iterable[Dict[str, Any]], path: str = DEFAULT_INDEX,
+                blobs: Optional[BlobStore] = None) -> Dict[str, int]:
+    """Index ``competitions`` into ``path``, replacing any previous index.
+
+    Descriptions referenced into ``blobs`` use their stored plain text when
+    there is one. Returns document, term and facet-value counts.
+    """
+    postings: Dict[str, Tuple[array, array]] = {}
+    facet_rows: Dict[Tuple[str, str], array] = {}
+    docs = []
+    row = -1
+    for row, record in enumerate(competitions):
+        org = record.get('organisation') or {}
+        org_name = org.get('name') if isinstance(org, dict) else None
+        skills = ' '.join(s.get('skill_name') or s.get('skill', '')
+                          for s in record.get('required_skills') or [])
+        weights: Dict[str, int] = {}
+        length = 0
+        for name, text in (('title', record.get('title') or ''), ('skills', skills),
+                           ('organisation', org_name or ''),
+                           ('description', _description(record, blobs))):
+            tokens = tokenize(text)
+            length += len(tokens)
+            weight = FIELD_WEIGHTS[name]
+            for token, n in Counter(tokens).items():
+                weights[token] = weights.get(token, 0) + n * weight
+        for token, weight in weights.items():
+            rows, tfs = postings.get(token) or postings.setdefault(token, (array('I'), array('H')))
+            rows.append(row)
+            tfs.append(min(weight, 0xFFFF))
+        for key in set(facet_values(record)):
+            facet_rows.setdefault(key, array('I')).append(row)
+        try:
+            registrations = float(record.get('registerCount') or 0)
+        except (TypeError, ValueError):
+            registrations = 0.0
+        docs.append((row, record.get('id'), record.get('title'), org_name, registrations, length))
+    count = row + 1
+
+    part = path + ".part"
+    if os.path.exists(part):
+        os.remove(part)
+    conn = sqlite3.connect(part)
+    conn.executescript(SCHEMA)
+    avg_length = sum(d[5] for d in docs) / count if count else 0.0
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [('docs', count), ('avg_length', avg_length)])
+    conn.executemany("INSERT INTO docs VALUES (?, ?, ?, ?, ?, ?)", docs)
+    conn.executemany("INSERT INTO terms VALUES (?, ?, ?, ?)",
+                     ((term, len(rows), rows.tobytes(), tfs.tobytes())
+                      for term, (rows, tfs) in postings.items()))
+    bitmap = np.zeros(count, dtype=np.bool_)
+    facet_blobs = []
+    for (facet, value), rows in facet_rows.items():
+        bitmap[:] = False
+        bitmap[np.frombuffer(rows, dtype=np.uint32)] = True
+        facet_blobs.append((facet, value, len(rows), np.packbits(bitmap).tobytes()))
+    conn.executemany("INSERT INTO facets VALUES (?, ?, ?, ?)", facet_blobs)
+    conn.commit()
+    conn.close()
+    os.replace(part, path)
+    return {'docs': count, 'terms': len(postings), 'facet_values': len(facet_rows)}
+
+
+@dataclass
+class Hit:
+    id: Any
+    title: Optional[str]
+    organisation: Optional[str]
+    registrations: float
+    score: float
+
+
+@dataclass
+class SearchResult:
+    total: int
+    hits: List[Hit]
+    facets: Dict[str, List[Tuple[str, int]]] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+class QueryError(ValueError):
+    """The query names an unknown facet or cannot be parsed."""
+
+
+class SearchIndex:
+    """Read side of an index built by ``build_index``."""
+
+    def __init__(self, path: str = DEFAULT_INDEX):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No index at {path}; build one with 'search_index.py build'")
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.count = int(meta['docs'])
+        self.avg_length = float(meta['avg_length']) or 1.0
+        registrations, lengths = zip(*self.conn.execute(
+            "SELECT registrations, length FROM docs ORDER BY row")) if self.count else ((), ())
+        self.registrations = np.array(registrations, dtype=np.float64)
+        self.lengths = np.array(lengths, dtype=np.float64)
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / self.avg_length)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Building blocks
+
+    def _postings(self, rows: Iterable[Tuple[int, bytes, bytes]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Match mask and BM25 scores of the union of some terms' postings."""
+        mask = np.zeros(self.count, dtype=np.bool_)
+        scores = np.zeros(self.count, dtype=np.float64)
+        for df, rows_blob, tf_blob in rows:
+            docs = np.frombuffer(rows_blob, dtype=np.uint32)
+            tf = np.frombuffer(tf_blob, dtype=np.uint16).astype(np.float64)
+            idf = math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            mask[docs] = True
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + self._norm[docs])
+        return mask, scores
+
+    def term(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        return self._postings(self.conn.execute(
+            "SELECT df, rows, tf FROM terms WHERE term = ?", (token,)))
+
+    def prefix(self, stem: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows matching any term starting with ``stem`` (its most frequent expansions)."""
+        upper = stem[:-1] + chr(ord(stem[-1]) + 1)
+        return self._postings(self.conn.execute(
+            "SELECT df, rows, tf FROM (SELECT df, rows, tf FROM terms WHERE term >= ? AND term < ?"
+            " ORDER BY df DESC LIMIT ?)", (stem, upper, MAX_PREFIX_TERMS)))
+
+    def facet(self, facet: str, value: str) -> np.ndarray:
+        if facet not in FACETS:
+            raise QueryError(f"unknown facet {facet!r}; expected one of {', '.join(FACETS)}")
+        row = self.conn.execute("SELECT bitmap FROM facets WHERE facet = ? AND value = ?",
+                                (facet, value.lower())).fetchone()
+        if row is None:
+            return np.zeros(self.count, dtype=np.bool_)
+        return np.unpackbits(np.frombuffer(row[0], dtype=np.uint8), count=self.count).view(np.bool_)
+
+    def facet_values(self, facet: str) -> List[Tuple[str, int]]:
+        """Values of ``facet`` with their document counts, most common first."""
+        return self.conn.execute("SELECT value, count FROM facets WHERE facet = ?"
+                                 " ORDER BY count DESC, value", (facet,)).fetchall()
+
+    def facet_counts(self, mask: np.ndarray, facet: str, n: int = 10) -> List[Tuple[str, int]]:
+        """Counts of ``facet``'s values among the rows in ``mask``."""
+        counts = []
+        for value, bitmap in self.conn.execute(
+                "SELECT value, bitmap FROM facets WHERE facet = ?", (facet,)):
+            bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), count=self.count).view(np.bool_)
+            hits = int(np.count_nonzero(bits & mask))
+            if hits:
+                counts.append((value, hits))
+        return sorted(counts, key=lambda c: (-c[1], c[0]))[:n]
+
+    # Queries
+
+    def _clause(self, token: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Mask and (for text clauses) scores of one query clause."""
+        name, sep, value = token.partition(':')
+        if sep and name.lower() in FACETS:
+            return self.facet(name.lower(), value), None
+        if token.endswith('*'):
+            stems = tokenize(token[:-1])
+            if not stems:
+                raise QueryError(f"empty prefix {token!r}")
+            *words, stem = stems
+            mask, scores = self.prefix(stem)
+        else:
+            words, mask, scores = tokenize(token), None, None
+        for word in words:
+            word_mask, word_scores = self.term(word)
+            mask = word_mask if mask is None else mask & word_mask
+            scores = word_scores if scores is None else scores + word_scores
+        if mask is None:  # only stopwords
+            return np.ones(self.count, dtype=np.bool_), None
+        return mask, scores
+
+    def match(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Boolean mask and relevance scores of every row for ``query``."""
+        try:
+            tokens = shlex.split(query)
+        except ValueError as exc:
+            raise QueryError(str(exc)) from None
+        mask = np.zeros(self.count, dtype=np.bool_)
+        scores = np.zeros(self.count, dtype=np.float64)
+        groups: List[List[str]] = [[]]
+        for token in tokens:
+            if token == 'OR':
+                groups.append([])
+            elif token != 'AND':
+                groups[-1].append(token)
+        for group in groups:
+            if not group:
+                continue
+            group_mask = np.ones(self.count, dtype=np.bool_)
+            group_scores = np.zeros(self.count, dtype=np.float64)
+            negate = False
+            for token in group:
+                if token == 'NOT':
+                    negate = True
+                    continue
+                if token.startswith('-') and len(token) > 1:
+                    negate, token = True, token[1:]
+                clause_mask, clause_scores = self._clause(token)
+                if negate:
+                    group_mask &= ~clause_mask
+                else:
+                    group_mask &= clause_mask
+                    if clause_scores is not None:
+                        group_scores += clause_scores
+                negate = False
+            mask |= group_mask
+            scores = np.maximum(scores, np.where(group_mask, group_scores, 0.0))
+        return mask, scores
+
+    def search(self, query: str, limit: int = 10, facets: Iterable[str] = ()) -> SearchResult:
+        """Top ``limit`` matches of ``query``, plus value counts of ``facets`` among all matches."""
+        start = time.perf_counter()
+        mask, scores = self.match(query)
+        rows = np.flatnonzero(mask)
+        # Rank by relevance, registrations breaking ties (scaled well below one BM25 point)
+        rank = scores[rows] + np.log1p(self.registrations[rows]) * 1e-6
+        best = rows[top_k(rank, limit)]
+        docs = {row: doc for row, *doc in self.conn.execute(
+            f"SELECT row, id, title, organisation, registrations FROM docs"
+            f" WHERE row IN ({','.join('?' * len(best))})", [int(r) for r in best])}
+        hits = [Hit(*docs[int(r)], score=float(scores[r])) for r in best]
+        counts = {facet: self.facet_counts(mask, facet) for facet in facets}
+        return SearchResult(len(rows), hits, counts, time.perf_counter() - start)
+
+
+def print_result(result: SearchResult) -> None:
+    print(f"{result.total} match(es) in {result.elapsed * 1000:.1f} ms")
+    for i, hit in enumerate(result.hits, 1):
+        print(f"{i:>3}. {hit.title}  [{hit.organisation or 'Unknown'}]  "
+              f"id={hit.id} registrations={hit.registrations:,.0f} score={hit.score:.2f}")
+    for facet, counts in result.facets.items():
+        print(f"\n{facet}: " + ", ".join(f"{value} ({count})" for value, count in counts))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Full-text and facet search over the competitions")
+    parser.add_argument("--index", default=DEFAULT_INDEX,
+                        help="index file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="(re)build the index from a dataset file")
+    build.add_argument("--input", default="competitions.json",
+                       help="JSON, NDJSON or .snap file of competitions (default: %(default)s)")
+    build.add_argument("--blobs", default=DEFAULT_BLOBS,
+                       help="blob store holding referenced descriptions (default: %(default)s)")
+    query = commands.add_parser("query", help="search the index")
+    query.add_argument("query", nargs="+",
+                       help="query clauses, one per argument as the shell splits them, e.g. "
+                            "ml hackathon region:online 'eligible:Engineering Students' 'iit*'")
+    query.add_argument("-n", "--limit", type=int, default=10,
+                       help="matches to show (default: %(default)s)")
+    query.add_argument("--facets", nargs="*", default=[], choices=FACETS, metavar="FACET",
+                       help=f"also count values of these facets among the matches ({', '.join(FACETS)})")
+    facets = commands.add_parser("facets", help="list facet values and their counts")
+    facets.add_argument("facet", nargs="*", choices=FACETS, metavar="FACET",
+                        help="facets to list (default: all)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command == "build":
+        start = time.perf_counter()
+        blobs = BlobStore(args.blobs) if os.path.exists(args.blobs) else None
+        try:
+            counts = build_index(iter_competitions(args.input, fields=INDEX_FIELDS), args.index, blobs)
+        finally:
+            if blobs is not None:
+                blobs.close()
+        print(f"Indexed {counts['docs']} competitions ({counts['terms']} terms, "
+              f"{counts['facet_values']} facet values) into {args.index} "
+              f"in {time.perf_counter() - start:.1f}s")
+        return 0
+    with SearchIndex(args.index) as index:
+        if args.command == "facets":
+            for facet in args.facet or FACETS:
+                values = index.facet_values(facet)
+                print(f"{facet}: " + ", ".join(f"{value} ({count})" for value, count in values))
+            return 0
+        try:
+            result = index.search(shlex.join(args.query), args.limit, args.facets)
+        except QueryError as exc:
+            print(f"Bad query: {exc}")
+            return 2
+        print_result(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
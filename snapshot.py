@@ -0,0 +1,250 @@
+"""Compact columnar snapshot of the competitions dataset.
+
+Layout of a ``.snap`` file::
+
+    MAGIC
+    per field: data block      values as compact JSON, each followed by ','
+               offsets block   uint64 start of each value within the block
+               presence block  one byte per record, 0 when the field is absent
+    index                      JSON: record count and block positions per field
+    trailer                    uint64 index position + MAGIC
+
+Readers memory-map the file and only touch the blocks of the fields they
+ask for, so heavy fields such as ``details`` are never read or decoded by
+the analysis side. A whole column decodes with a single ``json.loads``;
+single records decode lazily, one field at a time.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+MAGIC = b'UNSNAP01'
+TRAILER = struct.Struct('<Q8s')
+_NULL = b'null,'
+_FLUSH_ROWS = 4096
+
+
+class SnapshotError(Exception):
+    """The file is not a readable snapshot."""
+
+
+def _copy(f, out) -> int:
+    """Copy a temp file into ``out``; returns the bytes copied."""
+    f.seek(0)
+    written = 0
+    while True:
+        chunk = f.read(1 << 20)
+        if not chunk:
+            return written
+        out.write(chunk)
+        written += len(chunk)
+
+
+class _Column:
+    """Spooled on-disk buffers for one field while a snapshot is written."""
+
+    def __init__(self, rows_before: int):
+        self.data = tempfile.TemporaryFile()
+        self.offsets = tempfile.TemporaryFile()
+        self.presence = tempfile.TemporaryFile()
+        self.size = 0
+        self._offsets = array('Q')
+        self._presence = bytearray()
+        for _ in range(rows_before):
+            self.append(_NULL, False)
+
+    def append(self, encoded: bytes, present: bool) -> None:
+        self._offsets.append(self.size)
+        self._presence.append(present)
+        self.data.write(encoded)
+        self.size += len(encoded)
+        if len(self._presence) >= _FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        self._offsets.tofile(self.offsets)
+        self.presence.write(self._presence)
+        self._offsets = array('Q')
+        self._presence = bytearray()
+
+    def close(self) -> None:
+        self.data.close()
+        self.offsets.close()
+        self.presence.close()
+
+
+class SnapshotWriter:
+    """Write records to a snapshot file; fields may vary between records.
+
+    Output goes to ``<path>.part`` and is renamed into place by ``close()``.
+    """
+
+    def __init__(self, path: str = 'competitions.snap'):
+        self.path = path
+        self.count = 0
+        self._columns: Dict[str, _Column] = {}
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                                        check_circular=False).encode
+
+    def write(self, record: Dict[str, Any]) -> None:
+        for name, column in self._columns.items():
+            if name not in record:
+                column.append(_NULL, False)
+        for name, value in record.items():
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = _Column(self.count)
+            column.append((self._encode(value) + ',').encode('utf-8'), True)
+        self.count += 1
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self) -> None:
+        part = self.path + '.part'
+        index = {'count': self.count, 'fields': {}}
+        with open(part, 'wb') as out:
+            out.write(MAGIC)
+            pos = len(MAGIC)
+            for name, column in self._columns.items():
+                column.flush()
+                entry = {}
+                for key, f in (('data', column.data), ('offsets', column.offsets),
+                               ('presence', column.presence)):
+                    size = _copy(f, out)
+                    entry[key] = [pos, size]
+                    pos += size
+                index['fields'][name] = entry
+                column.close()
+            out.write(json.dumps(index).encode('utf-8'))
+            out.write(TRAILER.pack(pos, MAGIC))
+        os.replace(part, self.path)
+        self._columns = {}
+
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        for column in self._columns.values():
+            column.close()
+        self._columns = {}
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_snapshot(records: Iterable[Dict[str, Any]], path: str = 'competitions.snap') -> int:
+    """Write ``records`` to ``path``; returns the number of records."""
+    with SnapshotWriter(path) as writer:
+        return writer.write_many(records)
+
+
+class LazyRecord(Mapping):
+    """Read-only view of one record that decodes each field on first access."""
+
+    def __init__(self, snapshot: "Snapshot", row: int):
+        self._snapshot = snapshot
+        self._row = row
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._cache:
+            self._cache[name] = self._snapshot.value(self._row, name)
+        return self._cache[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._snapshot.fields if self._snapshot.has(self._row, name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class Snapshot:
+    """Memory-mapped reader for a ``.snap`` file."""
+
+    def __init__(self, path: str = 'competitions.snap'):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise SnapshotError(f"{path} is empty")
+        if self._mm[:len(MAGIC)] != MAGIC or len(self._mm) < len(MAGIC) + TRAILER.size:
+            self.close()
+            raise SnapshotError(f"{path} is not a snapshot file")
+        index_pos, magic = TRAILER.unpack(self._mm[-TRAILER.size:])
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError(f"{path} is truncated")
+        index = json.loads(self._mm[index_pos:-TRAILER.size])
+        self.count: int = index['count']
+        self._index: Dict[str, Dict[str, List[int]]] = index['fields']
+        self._offsets: Dict[str, memoryview] = {}
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._index)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._offsets.clear()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _block(self, name: str, key: str) -> bytes:
+        start, size = self._index[name][key]
+        return self._mm[start:start + size]
+
+    def column(self, name: str) -> List[Any]:
+        """Decode every value of one field (``None`` where absent)."""
+        if name not in self._index:
+            return [None] * self.count
+        data = self._block(name, 'data')
+        return json.loads(b'[' + data[:-1] + b']') if data else []
+
+    def has(self, row: int, name: str) -> bool:
+        entry = self._index.get(name)
+        return bool(entry) and self._mm[entry['presence'][0] + row] == 1
+
+    def value(self, row: int, name: str) -> Any:
+        """Decode a single field of a single record."""
+        if not self.has(row, name):
+            raise KeyError(name)
+        offsets = self._offsets.get(name)
+        if offsets is None:
+            offsets = self._offsets[name] = memoryview(self._block(name, 'offsets')).cast('Q')
+        start = self._index[name]['data'][0]
+        end = offsets[row + 1] if row + 1 < self.count else self._index[name]['data'][1]
+        return json.loads(self._mm[start + offsets[row]:start + end - 1])
+
+    def record(self, row: int) -> LazyRecord:
+        return LazyRecord(self, row)
+
+    def iter_records(self, fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield records holding only ``fields`` (default: all), column-decoded."""
+        names = [n for n in (fields or self.fields) if n in self._index]
+        columns = [self.column(n) for n in names]
+        presence = [self._block(n, 'presence') for n in names]
+        for row in range(self.count):
+            yield {name: column[row] for name, column, present in zip(names, columns, presence)
+                   if present[row]}
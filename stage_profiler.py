@@ -0,0 +1,316 @@
+"""Per-stage timing and memory profiling for the scraper and the chart generator.
+
+Pipeline stages are marked with ``stage(name)`` blocks, ``@profiled(name)``
+functions or ``timed(fn, name)`` wrappers. They cost one global lookup until
+a ``StageProfiler`` is started (``--profile``), which then records for every
+stage path (e.g. ``scrape;crawl;fetch;decode``):
+
+    calls, seconds, max_seconds  wall time; summed over concurrent calls
+    self_seconds                 seconds not spent in child stages
+    alloc_bytes                  net tracemalloc growth (memory kept)
+    peak_bytes                   highest tracemalloc usage above the start
+
+Stage nesting follows contextvars, so concurrent fetch tasks and
+``asyncio.to_thread`` writers nest under the stage that started them.
+``timed`` wrappers (per-record hot paths such as flattening) record time
+only. ``--profile-stage NAME`` also attaches cProfile to every span of that
+stage (in the thread that entered it).
+
+``save()`` writes ``<entry>_profile.json``, ``<entry>_profile.folded``
+(collapsed stacks of self time in microseconds, for flamegraph.pl, inferno
+or speedscope) and ``<entry>_<stage>.prof`` (pstats, e.g. for snakeviz).
+"""
+import argparse
+import contextlib
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_PROFILE_DIR = "profile"
+TOP_FUNCTIONS = 25  # cProfile entries kept in the JSON report
+
+_active: Optional["StageProfiler"] = None
+_path: contextvars.ContextVar = contextvars.ContextVar("stage_path", default=())
+_NULL = contextlib.nullcontext()
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    alloc_bytes: int = 0
+    peak_bytes: int = 0
+
+    def add(self, seconds: float, alloc: int = 0, peak: int = 0) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.alloc_bytes += alloc
+        self.peak_bytes = max(self.peak_bytes, peak)
+
+
+class _Span:
+    """One execution of a stage; use through ``stage()``."""
+    __slots__ = ('profiler', 'name', 'stats', 'token', 'start', 'mem_start', 'peak')
+
+    def __init__(self, profiler: "StageProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        p = self.profiler
+        path = _path.get() + (self.name,)
+        self.stats = p._stats(path)  # registered on entry, so reports list parents first
+        self.token = _path.set(path)
+        if p.memory:
+            with p._lock:
+                # Spans still open keep their peak; then measure from here
+                current, peak = tracemalloc.get_traced_memory()
+                for span in p._open:
+                    span.peak = max(span.peak, peak)
+                tracemalloc.reset_peak()
+                self.mem_start = self.peak = current
+                p._open.add(self)
+        if self.name == p.cprofile_stage:
+            p._cprofile_enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.start
+        p = self.profiler
+        if self.name == p.cprofile_stage:
+            p._cprofile_exit()
+        alloc = peak = 0
+        if p.memory:
+            with p._lock:
+                current, traced_peak = tracemalloc.get_traced_memory()
+                p._open.discard(self)
+                alloc = current - self.mem_start
+                peak = max(self.peak, traced_peak) - self.mem_start
+        self.stats.add(elapsed, alloc, peak)
+        _path.reset(self.token)
+
+
+class StageProfiler:
+    """Collects stage spans while started; one per run of an entry point.
+
+    ``with StageProfiler(...)`` starts it and wraps the run in a root stage
+    named ``entry``.
+    """
+
+    def __init__(self, entry: str, directory: str = DEFAULT_PROFILE_DIR,
+                 cprofile_stage: Optional[str] = None, memory: bool = True):
+        self.entry = entry
+        self.directory = directory
+        self.cprofile_stage = cprofile_stage
+        self.memory = memory
+        self.stats: Dict[Tuple[str, ...], StageStats] = {}
+        self.wall = 0.0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._open: set = set()
+        self._cprofile = cProfile.Profile() if cprofile_stage else None
+        self._cprofile_depth = 0
+        self._root: Optional[_Span] = None
+        self._started = 0.0
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, entry: str) -> Optional["StageProfiler"]:
+        """The profiler requested by ``add_profile_args`` options, or None."""
+        if args.profile is None:
+            return None
+        return cls(entry, args.profile, args.profile_stage, not args.profile_no_memory)
+
+    def _stats(self, path: Tuple[str, ...]) -> StageStats:
+        stats = self.stats.get(path)
+        if stats is None:
+            stats = self.stats.setdefault(path, StageStats())
+        return stats
+
+    def _cprofile_enter(self) -> None:
+        with self._lock:
+            self._cprofile_depth += 1
+            if self._cprofile_depth == 1:
+                self._cprofile.enable()
+
+    def _cprofile_exit(self) -> None:
+        with self._lock:
+            self._cprofile_depth -= 1
+            if self._cprofile_depth == 0:
+                self._cprofile.disable()
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def start(self) -> None:
+        global _active
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _active = self
+        self._started = time.perf_counter()
+        self._root = self.span(self.entry)
+        self._root.__enter__()
+
+    def stop(self) -> None:
+        global _active
+        self._root.__exit__(None, None, None)
+        self.wall = time.perf_counter() - self._started
+        _active = None
+        if self.memory:
+            self.peak = self.stats[(self.entry,)].peak_bytes
+            tracemalloc.stop()
+
+    def __enter__(self) -> "StageProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def self_seconds(self, path: Tuple[str, ...]) -> float:
+        children = sum(stats.seconds for child, stats in self.stats.items()
+                       if len(child) == len(path) + 1 and child[:-1] == path)
+        return max(0.0, self.stats[path].seconds - children)
+
+    @property
+    def cprofiled(self) -> bool:
+        """Whether cProfile was attached and its stage actually ran."""
+        return self._cprofile is not None and any(path[-1] == self.cprofile_stage
+                                                  for path in self.stats)
+
+    def _top_functions(self) -> List[Dict[str, Any]]:
+        if not self.cprofiled:
+            return []
+        stats = pstats.Stats(self._cprofile, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({'function': f"{os.path.basename(filename)}:{line}({function})",
+                         'calls': calls, 'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)})
+        rows.sort(key=lambda row: row['cumtime'], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+    def report(self) -> Dict[str, Any]:
+        """The machine-readable per-stage report."""
+        stages = [dict(path=';'.join(path), name=path[-1], depth=len(path) - 1,
+                       self_seconds=round(self.self_seconds(path), 6), **asdict(stats))
+                  for path, stats in self.stats.items()]
+        for stage_row in stages:
+            stage_row['seconds'] = round(stage_row['seconds'], 6)
+            stage_row['max_seconds'] = round(stage_row['max_seconds'], 6)
+        report = {'entry': self.entry, 'wall_seconds': round(self.wall, 6),
+                  'memory': self.memory, 'peak_traced_bytes': self.peak, 'stages': stages}
+        if self._cprofile is not None:
+            report['cprofile'] = {'stage': self.cprofile_stage, 'top': self._top_functions()}
+        return report
+
+    def folded(self) -> List[str]:
+        """Collapsed stacks, one ``a;b;c <self microseconds>`` line per stage path."""
+        lines = []
+        for path in self.stats:
+            micros = int(self.self_seconds(path) * 1e6)
+            if micros:
+                lines.append(f"{';'.join(path)} {micros}")
+        return lines
+
+    def save(self) -> List[str]:
+        """Write the JSON report, folded stacks and (if attached) the cProfile data."""
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{self.entry}_profile")
+        with open(base + ".json", 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(base + ".folded", 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.folded()) + '\n')
+        paths = [base + ".json", base + ".folded"]
+        if self.cprofiled:
+            prof = os.path.join(self.directory, f"{self.entry}_{self.cprofile_stage}.prof")
+            self._cprofile.dump_stats(prof)
+            paths.append(prof)
+        return paths
+
+    def summary(self) -> str:
+        """Indented stage tree with times and memory, in first-seen order."""
+        mb = 1024 * 1024
+        lines = [f"Profile: {self.wall:.2f}s wall" +
+                 (f", peak traced memory {self.peak / mb:.1f} MB" if self.memory else "")]
+        for path, stats in self.stats.items():
+            line = (f"  {'  ' * (len(path) - 1)}{path[-1]:<{max(4, 28 - 2 * len(path))}} "
+                    f"{stats.calls:>7} call(s) {stats.seconds:9.3f}s "
+                    f"(self {self.self_seconds(path):.3f}s)")
+            if self.memory and stats.peak_bytes:
+                line += f"  alloc {stats.alloc_bytes / mb:+.1f} MB  peak {stats.peak_bytes / mb:.1f} MB"
+            lines.append(line)
+        if self._cprofile is not None and not self.cprofiled:
+            lines.append(f"  (cProfile: no stage named {self.cprofile_stage!r} ran)")
+        return '\n'.join(lines)
+
+
+def active() -> Optional[StageProfiler]:
+    return _active
+
+
+def stage(name: str):
+    """Context manager marking a pipeline stage; a no-op unless profiling."""
+    return _active.span(name) if _active is not None else _NULL
+
+
+def profiled(name: str) -> Callable:
+    """Decorator running every call of a function (sync or async) as a stage."""
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                if _active is None:
+                    return await fn(*args, **kwargs)
+                with _active.span(name):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if _active is None:
+                return fn(*args, **kwargs)
+            with _active.span(name):
+                return fn(*args, **kwargs)
+        return run
+    return decorate
+
+
+def timed(fn: Callable, name: str) -> Callable:
+    """``fn`` itself, or while profiling a wrapper adding its time to a child stage.
+
+    For per-record hot paths: timing only, no memory tracing per call.
+    """
+    if _active is None:
+        return fn
+    stats = _active._stats(_path.get() + (name,))
+    clock = time.perf_counter
+
+    def run(*args):
+        start = clock()
+        result = fn(*args)
+        stats.add(clock() - start)
+        return result
+    return run
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    """The ``--profile`` options shared by the entry points."""
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help="time and memory-trace each pipeline stage; writes a JSON report "
+                             f"and folded stacks to DIR (default: {DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--profile-stage", metavar="STAGE",
+                        help="also run cProfile over this stage (e.g. decode, csv_write, savefig)")
+    parser.add_argument("--profile-no-memory", action="store_true",
+                        help="time stages without tracemalloc, which slows allocation-heavy code")
@@ -0,0 +1,356 @@
+"""Synthetic competition catalogs of any size for benchmarking the analysis side.
+
+Records have the full listing shape (``organisation``, ``filters``,
+``prizes``, ``required_skills``, ``regnRequirements``, an HTML ``details``
+description, ...) with distributions calibrated on the scraped
+``competitions.csv``:
+
+* organisations and skills follow a Zipf law over a pool that grows with the
+  catalog (~40 * sqrt(count) organisations), so a few hosts dominate and the
+  long tail keeps growing like the real listing;
+* categories, eligibility and the number of skills / prize ranks follow the
+  observed frequencies;
+* registrations and views are correlated log-normals (median ~100 and
+  ~20k) with a heavy tail, and ~5% of competitions have no registrations;
+* ``details`` HTML length is log-normal around 2.4 KB with a tail past 20 KB
+  (``--html-scale`` multiplies it).
+
+Output is deterministic for a given count, seed and scale, and is streamed,
+so even 1M-record catalogs are written in constant memory (snapshots excepted).
+
+    python synthetic_catalog.py 100000 -o bench_data/competitions_100000.snap
+    python synthetic_catalog.py 1000000 -o big.ndjson --html-scale 2 --raw
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from competition_table import detect_format
+from derived_fields import add_derived
+from snapshot import write_snapshot
+
+IST = timezone(timedelta(hours=5, minutes=30))
+REFERENCE_TIME = datetime(2025, 12, 18, 10, 0, tzinfo=IST)  # "now" of every catalog
+FIRST_ID = 2_000_000
+CDN = "https://d8it4huxumps7.cloudfront.net"
+
+# (value, weight) pairs observed in competitions.csv
+TYPES = (('competitions', 291), ('hackathons', 82), ('quizzes', 48))
+SUBTYPES = (('general_competition', 198), ('online_coding_challenge', 81),
+            ('case_competition', 56), ('innovation_challenge', 37), ('hiring_challenge', 3))
+ELIGIBILITY = (('Postgraduate', 287), ('Undergraduate', 268), ('Engineering Students', 257),
+               ('Arts, Commerce, Sciences & Others', 215), ('Management', 194), ('Law', 147),
+               ('Medical', 145), ('All', 93), ('School Students', 16), ('Fresher', 16),
+               ('Experienced Professionals', 13), ('MBA Students', 4))
+ELIGIBILITY_COUNTS = ((0, 21), (1, 128), (2, 11), (3, 44), (4, 17), (5, 51), (6, 8), (7, 128),
+                      (8, 11), (9, 2))
+CATEGORIES = (('Case Study', 100), ('Business Plan', 81), ('College Festival', 80), ('Strategy', 67),
+              ('Hackathon', 59), ('Coding Challenge', 54), ('Online Quiz', 52),
+              ('Entrepreneurship', 45), ('Others', 38), ('Presentation', 35), ('Finance', 33),
+              ('Robotics', 28), ('Data Analytics', 24), ('Designing', 20), ('Marketing', 19),
+              ('Article Writing', 19), ('Simulation Game', 14), ('Data Science', 13),
+              ('Online Trading', 13), ('On Campus Quiz', 12), ('Public Speaking', 9),
+              ('Photography', 8), ('Debate', 7), ('Social Impact', 6), ('Policy', 5),
+              ('Video Making', 4), ('Gaming', 3), ('Music', 2), ('Dance', 2), ('Sustainability', 2))
+CATEGORY_COUNTS = ((1, 218), (2, 68), (3, 44), (4, 40), (5, 51))
+SKILL_COUNTS = ((0, 7), (1, 3), (2, 10), (3, 33), (4, 110), (5, 176), (6, 14), (7, 19), (8, 9),
+                (9, 14), (10, 19), (11, 3), (12, 1), (13, 2), (17, 1))
+PRIZE_COUNTS = ((0, 117), (1, 31), (2, 37), (3, 172), (4, 30), (5, 16), (6, 9), (7, 3), (8, 1),
+                (9, 2), (10, 2), (11, 1))
+# (cash, certificate, others) per prize rank
+PRIZE_KINDS = (((True, True, False), 375), ((True, True, True), 146), ((False, True, True), 116),
+               ((True, False, False), 116), ((False, False, True), 69), ((False, True, False), 63),
+               ((True, False, True), 55), ((False, False, False), 13))
+WINNER_CASH = ((500, 3), (1000, 8), (2000, 10), (3000, 12), (5000, 20), (7000, 8), (10000, 18),
+               (15000, 6), (20000, 8), (25000, 4), (50000, 5), (100000, 3), (150000, 1),
+               (500000, 0.3))
+RANKS = ('Winner', 'First Runner Up', 'Second Runner Up', 'Third Runner Up')
+# Most frequent skills first; the Zipf tail adds generated names
+SKILLS = ('Communication Skills', 'Creativity', 'Analytical Skills', 'Teamwork and Collaboration',
+          'Decision Making', 'Business Acumen', 'Problem Identification', 'Strategic Thinking',
+          'Presentation Design', 'Artificial Intelligence (AI)', 'Business Planning',
+          'Problem Solving', 'Teamwork', 'Project Management', 'Machine Learning Concepts',
+          'Financial Analysis', 'Creative Thinking', 'Communication',
+          'Computer-Aided Design (CAD)', 'Quick Learning', 'Python', 'Data Analysis',
+          'Marketing Strategy', 'Public Speaking', 'Research', 'Leadership', 'Critical Thinking',
+          'Web Development', 'UI/UX Design', 'Embedded Systems')
+ORG_KINDS = ('Indian Institute of Technology (IIT)', 'National Institute of Technology (NIT)',
+             'Indian Institute of Management (IIM)', 'Symbiosis Institute', 'University',
+             'College of Engineering', 'Business School', 'Technologies Pvt Ltd', 'Foundation')
+CITIES = ('Delhi', 'Mumbai', 'Bangalore', 'Hyderabad', 'Chennai', 'Pune', 'Kolkata', 'Jaipur',
+          'Jodhpur', 'Madras', 'Kharagpur', 'Surathkal', 'Nashik', 'Indore', 'Lucknow')
+WORDS = ('innovation', 'challenge', 'students', 'teams', 'round', 'submission', 'prototype',
+         'presentation', 'judges', 'industry', 'solution', 'problem', 'statement', 'analysis',
+         'registration', 'eligibility', 'campus', 'online', 'assessment', 'deadline', 'mentors',
+         'certificate', 'winners', 'participants', 'evaluation', 'criteria', 'design', 'impact',
+         'technology', 'business', 'strategy', 'finance', 'market', 'research', 'data', 'model')
+TITLE_WORDS = ('Hack', 'Quest', 'Summit', 'Challenge', 'Cup', 'Fest', 'League', 'Sprint', 'Arena',
+               'Conclave', 'Olympiad', 'Premier', 'Code', 'Case', 'Ideathon', 'Pitch')
+
+HTML_MEDIAN = 2400  # characters of ``details``; log-normal
+HTML_SIGMA = 0.7
+REGISTER_MEDIAN, REGISTER_SIGMA = 100.0, 1.95
+VIEWS_MEDIAN, VIEWS_SIGMA = 20000.0, 1.15
+
+
+class _Weighted:
+    """Weighted choice with precomputed cumulative weights."""
+
+    def __init__(self, pairs: Sequence[Tuple[Any, float]]):
+        self.values = [value for value, _ in pairs]
+        self.cum = list(accumulate(weight for _, weight in pairs))
+
+    def pick(self, rng: random.Random) -> Any:
+        return rng.choices(self.values, cum_weights=self.cum)[0]
+
+    def sample(self, rng: random.Random, k: int) -> List[Any]:
+        """Up to ``k`` distinct values, frequent ones more likely."""
+        if k <= 0:
+            return []
+        picked = dict.fromkeys(rng.choices(self.values, cum_weights=self.cum, k=k * 2))
+        return list(picked)[:k]
+
+
+def _zipf(names: Sequence[str], exponent: float = 1.0) -> _Weighted:
+    return _Weighted([(name, 1.0 / (rank + 1) ** exponent) for rank, name in enumerate(names)])
+
+
+def _stamp(moment: datetime) -> str:
+    return moment.isoformat(timespec='seconds')
+
+
+class CatalogGenerator:
+    """Deterministic synthetic records for a catalog of ``count`` competitions."""
+
+    def __init__(self, count: int, seed: int = 0, html_scale: float = 1.0):
+        self.count = count
+        self.seed = seed
+        self.html_scale = html_scale
+        rng = random.Random(f"pools-{seed}")
+        org_pool = max(50, int(40 * math.sqrt(count)))
+        skill_pool = max(len(SKILLS), int(15 * math.sqrt(count)))
+        self.orgs = [self._organisation(n, rng) for n in range(org_pool)]
+        self.org_pick = _zipf(range(org_pool), 0.9)
+        skills = list(SKILLS) + [f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {n}"
+                                 for n in range(skill_pool - len(SKILLS))]
+        self.skill_pick = _zipf(skills, 1.1)
+        self.skill_ids = {skill: 640_000 + n for n, skill in enumerate(skills)}
+        self.types = _Weighted(TYPES)
+        self.subtypes = _Weighted(SUBTYPES)
+        self.eligibility = _Weighted(ELIGIBILITY)
+        self.eligibility_counts = _Weighted(ELIGIBILITY_COUNTS)
+        self.categories = _Weighted(CATEGORIES)
+        self.category_counts = _Weighted(CATEGORY_COUNTS)
+        self.skill_counts = _Weighted(SKILL_COUNTS)
+        self.prize_counts = _Weighted(PRIZE_COUNTS)
+        self.prize_kinds = _Weighted(PRIZE_KINDS)
+        self.winner_cash = _Weighted(WINNER_CASH)
+        self.filter_ids = {name: 400 + n for n, (name, _) in enumerate(ELIGIBILITY + CATEGORIES)}
+        self.blocks = self._html_blocks(rng)
+
+    @staticmethod
+    def _organisation(n: int, rng: random.Random) -> Dict[str, Any]:
+        name = f"{rng.choice(ORG_KINDS)}, {rng.choice(CITIES)} #{n}"
+        return {'id': 1000 + n, 'name': name, 'tier': rng.choice([None, None, None, 1, 2, 3]),
+                'logoUrl': f"{CDN}/images/partners/partners75/org{n}.png",
+                'logoUrl2': f"{CDN}/images/partners/partners125/org{n}.png",
+                'public_url': f"c/organisation-{n}", 'official_email_domains': f"@org{n}.ac.in",
+                'show_evaluator_login_link': False}
+
+    @staticmethod
+    def _html_blocks(rng: random.Random) -> List[str]:
+        def sentence() -> str:
+            words = rng.choices(WORDS, k=rng.randint(6, 18))
+            return ' '.join(words).capitalize() + '.'
+
+        blocks = []
+        for n in range(256):
+            if n % 3 == 0:
+                items = ''.join(f"<li>{sentence()}</li>" for _ in range(rng.randint(2, 6)))
+                blocks.append(f"<p><strong>{rng.choice(WORDS).title()}:</strong></p><ul>{items}</ul>")
+            else:
+                blocks.append('<p>' + ' '.join(sentence() for _ in range(rng.randint(1, 5))) + '</p>')
+        return blocks
+
+    def _details(self, rng: random.Random) -> str:
+        target = int(rng.lognormvariate(math.log(HTML_MEDIAN * self.html_scale), HTML_SIGMA))
+        parts, size = [], 0
+        while size < target:
+            block = rng.choice(self.blocks)
+            parts.append(block)
+            size += len(block)
+        return '\n'.join(parts)
+
+    def _filters(self, rng: random.Random) -> List[Dict[str, Any]]:
+        named = [(name, 'category') for name in
+                 self.categories.sample(rng, self.category_counts.pick(rng))]
+        named += [(name, 'eligible') for name in
+                  self.eligibility.sample(rng, self.eligibility_counts.pick(rng))]
+        return [{'id': self.filter_ids[name], 'name': name, 'type': kind, 'subtype': None,
+                 'file_name': name.lower().replace(' ', '_'), 'domain_id': 0,
+                 'icon_url': f"{CDN}/images/icons/color_icons/{self.filter_ids[name]}.svg"}
+                for name, kind in named]
+
+    def _prizes(self, rng: random.Random, comp_id: int) -> List[Dict[str, Any]]:
+        prizes = []
+        cash = self.winner_cash.pick(rng)
+        for rank in range(self.prize_counts.pick(rng)):
+            has_cash, certificate, others = self.prize_kinds.pick(rng)
+            prizes.append({
+                'id': comp_id * 16 + rank, 'rank': RANKS[rank] if rank < len(RANKS) else f"Rank {rank + 1}",
+                'cash': max(100, int(cash / (rank + 1) // 100 * 100)) if has_cash else None,
+                'currency': 'fa-rupee', 'certificate': int(certificate), 'entity_id': comp_id,
+                'entity_type': 'App\\Model\\Opportunity',
+                'others': rng.choice(['Goodies', 'Internship Opportunity', 'Trophy', 'Swag Kit'])
+                if others else None,
+                'currencyCode': None, 'cash_postfix': None, 'max_cash': None,
+                'pre_placement_internship': 0, 'pre_placement_opportunity': 0})
+        return prizes
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """The ``i``-th competition of the catalog (independent of the others)."""
+        rng = random.Random(self.seed * 1_000_003 + i)
+        comp_id = FIRST_ID + i
+        opportunity = self.types.pick(rng)
+        subtype = self.subtypes.pick(rng) if opportunity != 'quizzes' else None
+        title = f"{rng.choice(TITLE_WORDS)}{rng.choice(TITLE_WORDS).lower()} {rng.choice(['', '2.0 ', 'X '])}" \
+                f"{rng.choice(['25-26', '2025', '2026', 'Season 3'])}"
+        slug = f"{title.lower().replace(' ', '-')}-{comp_id}"
+        org = self.orgs[self.org_pick.pick(rng)]
+        z = rng.gauss(0, 1)
+        registrations = 0 if rng.random() < 0.05 else \
+            int(math.exp(math.log(REGISTER_MEDIAN) + REGISTER_SIGMA * z))
+        views = int(math.exp(math.log(VIEWS_MEDIAN) +
+                             VIEWS_SIGMA * (0.6 * z + 0.8 * rng.gauss(0, 1))))
+        if rng.random() < 0.01:  # viral listings
+            views *= rng.randint(20, 100)
+        start = REFERENCE_TIME - timedelta(days=rng.expovariate(1 / 10))
+        end = REFERENCE_TIME + timedelta(days=rng.expovariate(1 / 20), seconds=rng.randint(0, 86399))
+        updated = REFERENCE_TIME - timedelta(hours=rng.expovariate(1 / 72))
+        region = 'online' if rng.random() < 0.525 else 'offline'
+        skills = self.skill_pick.sample(rng, self.skill_counts.pick(rng))
+        team = rng.choice([1, 1, 2, 3, 4, 5])
+        return {
+            'id': comp_id,
+            'title': title,
+            'seo_url': f"https://unstop.com/{opportunity}/{slug}",
+            'public_url': f"{opportunity}/{slug}",
+            'type': opportunity,
+            'subtype': subtype,
+            'status': 'LIVE',
+            'registerCount': registrations,
+            'viewsCount': views,
+            'end_date': _stamp(end),
+            'address_with_country_logo': {
+                'id': comp_id + 7_000_000, 'address_title': 'event_location',
+                'addressable_id': comp_id, 'addressable_type': 'App\\Model\\Opportunity',
+                'city': rng.choice(CITIES) if region == 'offline' else None,
+                'country': None, 'created_at': _stamp(start), 'updated_at': _stamp(updated)},
+            'approved_date': start.strftime('%Y-%m-%d %H:%M:%S%z'),
+            'banner_mobile': None,
+            'details': self._details(rng),
+            'festival': None,
+            'filters': self._filters(rng),
+            'isPaid': rng.random() < 0.145,
+            'jobDetail': None,
+            'logoUrl2': org['logoUrl2'],
+            'opportunity_config': {'id': comp_id - 300_000, 'opportunity_id': comp_id,
+                                   'show_impressions': 1, 'show_region': 1,
+                                   'show_registrations_count': 1, 'show_team_size': 1,
+                                   'banner_config': json.dumps({'text': title, 'type': 3})},
+            'organisation': dict(org),
+            'organization_id': org['id'],
+            'payment_services': [],
+            'prizes': self._prizes(rng, comp_id),
+            'region': region,
+            'regnRequirements': {
+                'opportunity_id': comp_id, 'reg_status': 'STARTED', 'show_deadline': 1,
+                'start_regn_dt': _stamp(start), 'end_regn_dt': _stamp(end),
+                'min_team_size': 1, 'max_team_size': team,
+                'remain_days': f"{(end - REFERENCE_TIME).days} days left",
+                'remaining_time': int((end - REFERENCE_TIME).total_seconds()),
+                'remainingDaysArray': {'durations': (end - REFERENCE_TIME).days, 'text': ' days left'}},
+            'regn_open': 1,
+            'required_skills': [{'id': self.skill_ids[skill], 'skill': skill,
+                                 'skill_name': skill,
+                                 'pivot': {'entity_id': comp_id, 'ai_generated': True}}
+                                for skill in skills],
+            'short_id': f"s{comp_id:x}",
+            'short_url': f"https://unstop.com/o/s{comp_id:x}",
+            'tags': [],
+            'thumb': None,
+            'updated_at': _stamp(updated),
+            'visibility': 'public',
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self.record(i) for i in range(self.count))
+
+
+def generate(count: int, seed: int = 0, html_scale: float = 1.0,
+             derived: bool = True) -> Iterator[Dict[str, Any]]:
+    """Stream ``count`` records; ``derived`` adds the ``derived_*`` fields the scraper stores."""
+    records = iter(CatalogGenerator(count, seed, html_scale))
+    return (add_derived(record) for record in records) if derived else records
+
+
+def write_catalog(path: str, count: int, seed: int = 0, html_scale: float = 1.0,
+                  derived: bool = True, fmt: Optional[str] = None) -> int:
+    """Write a catalog as a JSON array, NDJSON or snapshot (by extension); returns the count."""
+    fmt = fmt or detect_format(path)
+    records = generate(count, seed, html_scale, derived)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if fmt == 'snapshot':
+        return write_snapshot(records, path)
+    written = 0
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        if fmt == 'json':
+            f.write('[\n')
+        for record in records:
+            if written and fmt == 'json':
+                f.write(',\n')
+            f.write(json.dumps(record, ensure_ascii=False))
+            if fmt == 'ndjson':
+                f.write('\n')
+            written += 1
+        if fmt == 'json':
+            f.write('\n]\n')
+    os.replace(path + '.part', path)
+    return written
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic competitions catalog")
+    parser.add_argument("count", type=int, help="number of competitions, e.g. 10000 to 1000000")
+    parser.add_argument("-o", "--output", help="output file; .json, .ndjson/.jsonl or .snap "
+                                               "(default: synthetic/competitions_<count>.json)")
+    parser.add_argument("--format", choices=["json", "ndjson", "snapshot"],
+                        help="output format (default: from the file extension)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--html-scale", type=float, default=1.0,
+                        help="multiplier for the details HTML length (default: %(default)s)")
+    parser.add_argument("--raw", action="store_true",
+                        help="omit the derived_* fields the scraper adds")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    path = args.output or os.path.join('synthetic', f"competitions_{args.count}.json")
+    start = time.perf_counter()
+    count = write_catalog(path, args.count, args.seed, args.html_scale, not args.raw, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} synthetic competitions to {path} "
+          f"({os.path.getsize(path) / 1024 / 1024:.1f} MB) in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Watch daemon: poll the listing cheaply, sync changes and re-render affected charts.
+
+Every poll requests page 1 only and compares its ``total`` and the ids and
+``updated_at`` of its items with the previous poll. Nothing else is fetched
+unless they differ:
+
+* changed items: pages are walked from the top and upserted into the store
+  until a page holds no new or changed competition;
+* a smaller total (competitions removed), a walk that leaves the store short
+  of the total, or every ``--full-every`` polls (registration counts change
+  without touching ``updated_at``): a full incremental sync, which also
+  records removals.
+
+A change appends a snapshot to the metrics history, and the record fields it
+touched select the charts to refresh (``create_charts.affected_charts``).
+Renders are coalesced to at most one per ``--render-interval``, polls never
+overlap (a slow sync or render delays the next poll), and errors back the poll
+interval off exponentially up to ``--max-interval``.
+
+    python watch_competitions.py --interval 60 --render-interval 300
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+
+from blob_store import DEFAULT_BLOBS, BlobSplitter, BlobStore
+from competition_store import DEFAULT_DB, CompetitionStore
+from competition_table import load_table
+from create_charts import (CHARTS, TREND_CHARTS, affected_charts, chart_payloads, compute_stats,
+                           input_fingerprint, update_charts)
+from derived_fields import ensure_derived
+from http_cache import CacheMiss, ResponseCache
+from metrics_history import DEFAULT_HISTORY, ROLLUPS_FILE, MetricsHistory
+from scrape_competitions import (BASE_URL, PER_PAGE, CrawlTarget, FetchConfig, IncompleteScrapeError,
+                                 RetryableStatus, build_params, fetch_json, make_session, page_items,
+                                 record_history, save_snapshot, sync_to_store)
+from scrape_metrics import ScrapeMetrics
+
+POLL_INTERVAL = 60.0
+MAX_POLL_INTERVAL = 900.0
+RENDER_INTERVAL = 300.0
+FULL_SYNC_EVERY = 60  # Polls between full syncs; 0 never forces one
+
+
+@dataclass(frozen=True)
+class PageSignature:
+    """What page 1 says about the listing: its size and its newest items."""
+    total: int
+    items: Tuple[Tuple[Any, Any], ...]
+
+    @classmethod
+    def of(cls, data: Dict[str, Any]) -> "PageSignature":
+        return cls(data.get("data", {}).get("total", 0),
+                   tuple((item.get("id"), item.get("updated_at")) for item in page_items(data)))
+
+
+@dataclass
+class WatchState:
+    signature: Optional[PageSignature] = None
+    polls: int = 0
+    syncs: int = 0
+    pending: Set[str] = field(default_factory=set)  # Charts waiting for the next render
+    last_render: float = 0.0
+    # Upserted by syncs that then failed; reported with the next successful poll
+    carried: Dict[str, int] = field(default_factory=dict)
+    carried_fields: Set[str] = field(default_factory=set)
+
+    def carry(self, counts: Dict[str, int], fields: Set[str]) -> None:
+        self.carried = _merge(self.carried, counts)
+        self.carried_fields |= fields
+
+    def with_carried(self, counts: Dict[str, int], fields: Set[str]) -> Tuple[Dict[str, int], Set[str]]:
+        """``counts`` and ``fields`` plus what failed syncs upserted, which is then forgotten."""
+        counts, fields = _merge(counts, self.carried), fields | self.carried_fields
+        self.carried, self.carried_fields = {}, set()
+        return counts, fields
+
+    def unreported(self) -> Optional[Tuple[Dict[str, int], Set[str]]]:
+        """What failed syncs upserted, for a poll that found nothing new, or None."""
+        return self.with_carried({}, set()) if self.carried else None
+
+
+def _changed(items: List[Dict[str, Any]], known: Dict[int, Optional[str]]) -> int:
+    """Items that are new or have a different ``updated_at`` than the store."""
+    return sum(1 for item in items
+               if item.get("id") not in known or known[item.get("id")] != item.get("updated_at"))
+
+
+async def walk_changes(session: aiohttp.ClientSession, store: CompetitionStore,
+                       config: FetchConfig, first: Dict[str, Any]) -> Dict[str, int]:
+    """Upsert pages from the top until one holds nothing new or changed.
+
+    Returns the store counts of the partial run (no removals are recorded).
+    """
+    known = store.versions()
+    total = first.get("data", {}).get("total", 0)
+    last_page = (total + config.per_page - 1) // config.per_page
+    store.begin_run()
+    try:
+        page, data = 1, first
+        while True:
+            items = page_items(data)
+            if not _changed(items, known):
+                break
+            store.upsert(items, config.target.spec)
+            page += 1
+            if page > last_page:
+                break
+            data = await fetch_json(session, build_params(page, config.per_page, config.target), config)
+    finally:
+        counts = store.finish_run(complete=False)
+    counts['pages'] = page
+    return counts
+
+
+def _merge(counts: Dict[str, int], more: Dict[str, int]) -> Dict[str, int]:
+    return {key: counts.get(key, 0) + more.get(key, 0) for key in counts.keys() | more.keys()}
+
+
+async def poll(session: aiohttp.ClientSession, store: CompetitionStore, config: FetchConfig,
+               state: WatchState, full_every: int) -> Optional[Tuple[Dict[str, int], Set[str]]]:
+    """One poll; returns the sync counts and changed record fields, or None when nothing changed.
+
+    The page signature is only kept once the sync succeeds, so a failed sync
+    is retried by the next poll; what it upserted before failing is reported
+    with the next successful one.
+    """
+    state.polls += 1
+    first = await fetch_json(session, build_params(1, config.per_page, config.target), config)
+    signature = PageSignature.of(first)
+    full_due = bool(full_every) and state.polls % full_every == 0
+    if signature == state.signature and not full_due:
+        return state.unreported()
+    known = store.versions()
+    counts: Dict[str, int] = {}
+    fields: Set[str] = set()
+    run_id = store.run_id
+    try:
+        # Growth is usually new competitions at the top; removals need a full sync to find
+        if not (full_due or not known or signature.total < len(known)):
+            if state.signature is None and signature.total == len(known) and \
+                    not _changed(page_items(first), known):
+                state.signature = signature
+                return state.unreported()  # first poll and the store is already current
+            counts = await walk_changes(session, store, config, first)
+            fields |= store.changed_fields
+            run_id = store.run_id
+            if len(store.versions()) == signature.total:
+                state.signature = signature
+                state.syncs += 1
+                return state.with_carried(counts, fields)
+        reason = 'scheduled' if full_due else f"total {len(known)} -> {signature.total}"
+        print(f"Full sync ({reason})")
+        counts = _merge(counts, await sync_to_store(store, config))
+        fields |= store.changed_fields
+    except BaseException:
+        if store.run_id != run_id:  # the failed run's upserts are committed
+            state.carry(_merge(counts, store.run_counts()), fields | store.changed_fields)
+        elif counts:
+            state.carry(counts, fields)
+        raise
+    state.signature = signature
+    state.syncs += 1
+    return state.with_carried(counts, fields)
+
+
+def render(names: Set[str], args: argparse.Namespace, blobs: Optional[BlobSplitter]) -> Dict[str, str]:
+    """Write the snapshot from the store and re-render ``names`` (blocking).
+
+    Runs in a worker thread, so it reads the store through its own connection.
+    """
+    with CompetitionStore(args.db) as store:
+        records = ensure_derived(store.iter_records(with_details=True))
+        save_snapshot(blobs.split(records) if blobs is not None else records, args.snapshot)
+    table_names = [name for name in names if name not in TREND_CHARTS]
+    trend_names = [name for name in names if name in TREND_CHARTS]
+    payloads: Dict[str, Dict[str, Any]] = {}
+    inputs: Dict[str, Dict[str, Any]] = {}
+    if table_names:
+        payloads.update(chart_payloads(compute_stats(load_table(args.snapshot)), table_names))
+        inputs.update(dict.fromkeys(table_names, input_fingerprint(args.snapshot)))
+    if trend_names and args.history:
+        with MetricsHistory(args.history) as history:
+            payloads.update(chart_payloads(history, trend_names))
+        inputs.update(dict.fromkeys(trend_names, input_fingerprint(
+            os.path.join(args.history, ROLLUPS_FILE))))
+    os.makedirs(args.output_dir, exist_ok=True)
+    return update_charts(payloads, args.output_dir, args.workers, input_info=inputs)
+
+
+async def watch(args: argparse.Namespace, config: FetchConfig) -> int:
+    state = WatchState()
+    interval = args.interval
+    blobs = BlobSplitter(BlobStore(args.blobs)) if args.blobs else None
+    print(f"Watching {config.target.spec} every {args.interval:g}s "
+          f"(renders at most every {args.render_interval:g}s)")
+    try:
+        with CompetitionStore(args.db) as store:
+            async with make_session(config) as session:
+                while args.polls is None or state.polls < args.polls:
+                    started = time.monotonic()
+                    requests = config.metrics.latency.count
+                    failed = False
+                    try:
+                        change = await poll(session, store, config, state, args.full_every)
+                        interval = args.interval
+                    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, RetryableStatus,
+                            IncompleteScrapeError, CacheMiss, sqlite3.Error) as exc:
+                        interval = min(args.max_interval, interval * 2)
+                        print(f"Poll {state.polls} failed: {exc!r}; next poll in {interval:g}s")
+                        change, failed = None, True
+                    made = config.metrics.latency.count - requests
+                    counts, fields = change or ({}, set())
+                    if counts.get('inserted') or counts.get('updated') or counts.get('removed'):
+                        if args.history:
+                            # The whole watched listing, not just the pages this poll walked
+                            record_history(store.iter_records(targets=[config.target.spec]),
+                                           args.history)
+                        affected = affected_charts(fields, bool(counts['inserted'] or counts['removed']),
+                                                   history_changed=bool(args.history))
+                        state.pending.update(name for name in affected if name in args.charts)
+                        print(f"Poll {state.polls}: {counts['inserted']} new, {counts['updated']} "
+                              f"updated, {counts['removed']} removed ({made} request(s)); "
+                              f"{len(state.pending)} chart(s) pending")
+                    elif made and not failed:
+                        print(f"Poll {state.polls}: no change ({made} request(s))")
+
+                    due = time.monotonic() - state.last_render >= args.render_interval
+                    if state.pending and due:
+                        names, state.pending = state.pending, set()
+                        errors = await asyncio.to_thread(render, names, args, blobs)
+                        state.last_render = time.monotonic()
+                        for name, error in sorted(errors.items()):
+                            print(f"Failed: {name}: {error}")
+
+                    if args.polls is None or state.polls < args.polls:
+                        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+                if state.pending:  # flush before a bounded run exits
+                    await asyncio.to_thread(render, state.pending, args, blobs)
+    finally:
+        if blobs is not None:
+            blobs.store.close()
+    print(f"{state.polls} poll(s), {state.syncs} sync(s), {config.metrics.latency.count} request(s)")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Poll unstop.com and keep the store and charts current")
+    parser.add_argument("--base-url", default=BASE_URL,
+                        help="search endpoint (default: %(default)s)")
+    parser.add_argument("--target", type=CrawlTarget.parse, default=CrawlTarget(),
+                        metavar="OPPORTUNITY:STATUS[:FILTERS]",
+                        help="listing to watch (default: competitions:open)")
+    parser.add_argument("--per-page", type=int, default=PER_PAGE,
+                        help="competitions per request (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="requests in flight during a full sync (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                        help="seconds between polls (default: %(default)s)")
+    parser.add_argument("--max-interval", type=float, default=MAX_POLL_INTERVAL,
+                        help="poll interval ceiling while polls keep failing (default: %(default)s)")
+    parser.add_argument("--render-interval", type=float, default=RENDER_INTERVAL,
+                        help="minimum seconds between chart renders (default: %(default)s)")
+    parser.add_argument("--full-every", type=int, default=FULL_SYNC_EVERY,
+                        help="polls between full syncs that pick up count-only changes; "
+                             "0 disables (default: %(default)s)")
+    parser.add_argument("--polls", type=int,
+                        help="stop after this many polls (default: run until interrupted)")
+    parser.add_argument("--db", default=DEFAULT_DB,
+                        help="SQLite store kept in sync (default: %(default)s)")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="revalidate page 1 with ETag/Last-Modified through this response cache")
+    parser.add_argument("--snapshot", default="competitions.snap",
+                        help="snapshot rewritten before each render (default: %(default)s)")
+    parser.add_argument("--blobs", default=DEFAULT_BLOBS, metavar="PATH",
+                        help="blob store for heavy fields in the snapshot (default: %(default)s)")
+    parser.add_argument("--no-blobs", dest="blobs", action="store_const", const=None,
+                        help="keep heavy fields inline in the snapshot")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, metavar="DIR",
+                        help="metrics history appended on every change (default: %(default)s)")
+    parser.add_argument("--no-history", dest="history", action="store_const", const=None,
+                        help="do not append to the history")
+    parser.add_argument("--output-dir", default="charts",
+                        help="directory for the PNG files (default: %(default)s)")
+    parser.add_argument("--charts", nargs="+", choices=list(CHARTS), default=list(CHARTS),
+                        metavar="CHART", help="charts to keep current (default: all)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="render processes; 1 renders in-process (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    config = FetchConfig(concurrency=args.concurrency, per_page=args.per_page,
+                         base_url=args.base_url, target=args.target, metrics=ScrapeMetrics(),
+                         cache=ResponseCache(args.cache) if args.cache else None)
+    try:
+        return await watch(args, config)
+    finally:
+        if config.cache is not None:
+            print(config.cache.report())
+            config.cache.close()
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("Stopped")
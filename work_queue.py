@@ -0,0 +1,121 @@
+"""SQLite-backed queue of page-level crawl work, shared by any number of workers.
+
+Each unit is one page of one crawl target (``"hackathons:open"``, ...). Units
+are leased rather than popped: a worker that dies simply lets its lease
+expire and another worker picks the unit up. The file is opened in WAL mode
+so several worker processes can share it; workers on other machines need it
+on a filesystem with working locks.
+"""
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+DEFAULT_QUEUE = "crawl_queue.db"
+LEASE_SECONDS = 300  # A unit leased longer than this is handed to another worker
+MAX_ATTEMPTS = 3  # Failed fetches (each already retried by the fetch engine) before giving up
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    per_page INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    UNIQUE (target, page)
+);
+CREATE INDEX IF NOT EXISTS units_state ON units (state, lease_expires);
+"""
+
+
+@dataclass
+class WorkUnit:
+    """One page of one crawl target."""
+    id: int
+    target: str
+    page: int
+    per_page: int
+    attempts: int = 0
+
+
+class WorkQueue:
+    """Lease-based work queue in a SQLite file (``":memory:"`` for one process)."""
+
+    def __init__(self, path: str = DEFAULT_QUEUE, lease_seconds: float = LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # Autocommit mode; leases take an explicit write lock with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, target: str, pages: Iterable[int], per_page: int) -> int:
+        """Enqueue pages of ``target``; pages already queued are left alone."""
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO units (target, page, per_page) VALUES (?, ?, ?)",
+            [(target, page, per_page) for page in pages])
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def lease(self, owner: str, limit: int = 1) -> List[WorkUnit]:
+        """Claim up to ``limit`` pending (or abandoned) units for ``owner``."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                "SELECT id, target, page, per_page, attempts FROM units"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)"
+                " ORDER BY id LIMIT ?", (now, limit)).fetchall()
+            self.conn.executemany(
+                "UPDATE units SET state = 'leased', owner = ?, lease_expires = ? WHERE id = ?",
+                [(owner, now + self.lease_seconds, row[0]) for row in rows])
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [WorkUnit(*row) for row in rows]
+
+    def complete(self, unit: WorkUnit) -> None:
+        self.conn.execute("UPDATE units SET state = 'done', error = NULL, lease_expires = NULL"
+                          " WHERE id = ?", (unit.id,))
+
+    def fail(self, unit: WorkUnit, error: str, max_attempts: int = MAX_ATTEMPTS) -> str:
+        """Record a failed fetch; the unit is re-queued until ``max_attempts``."""
+        attempts = unit.attempts + 1
+        state = 'failed' if attempts >= max_attempts else 'pending'
+        self.conn.execute("UPDATE units SET state = ?, attempts = ?, error = ?, lease_expires = NULL"
+                          " WHERE id = ?", (state, attempts, error, unit.id))
+        return state
+
+    def requeue_failed(self) -> int:
+        """Give units that ran out of attempts another round."""
+        return self.conn.execute("UPDATE units SET state = 'pending', attempts = 0"
+                                 " WHERE state = 'failed'").rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Units per state."""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(self.conn.execute("SELECT state, COUNT(*) FROM units GROUP BY state"))
+        return counts
+
+    def failures(self) -> Dict[str, str]:
+        """Last error per failed unit, keyed ``"target#page"``."""
+        rows = self.conn.execute("SELECT target, page, error FROM units WHERE state = 'failed'"
+                                 " ORDER BY id")
+        return {f"{target}#{page}": error for target, page, error in rows}